@@ -1,12 +1,160 @@
 import csv
+import io
 import json
 
-from os import path
+from typing import BinaryIO
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from zipfile import ZipFile
 
 import dask.dataframe as dd
+import numpy as np
+import pandas as pd
 import prefect
+import pyarrow as pa
 
+from icontract import require
 from prefect import Task
+from pyarrow import csv as pa_csv
+
+from drem.load.parquet import convert_dtypes_to_arrow_types
+from drem.load.parquet import write_dask_parquet
+from drem.load.parquet import write_parquet_in_chunks
+from drem.utilities.convert import is_up_to_date
+
+
+def _drop_malformed_lines(block: bytes, number_of_delimiters: int) -> Tuple[bytes, int]:
+
+    chars = np.frombuffer(block, dtype=np.uint8)
+    line_ends = np.flatnonzero(chars == ord("\n"))
+    line_starts = np.concatenate([[0], line_ends[:-1] + 1])
+    # Count the tabs on every line at once from the positions of all tabs
+    tabs_before_line_ends = np.searchsorted(
+        np.flatnonzero(chars == ord("\t")), line_ends,
+    )
+    tabs_per_line = np.diff(tabs_before_line_ends, prepend=0)
+
+    invalid_lines = np.flatnonzero(tabs_per_line != number_of_delimiters)
+    if not invalid_lines.size:
+        return block, 0
+
+    # Keep the runs of valid lines between invalid lines
+    run_starts = np.concatenate([[0], line_ends[invalid_lines] + 1]).tolist()
+    run_ends = np.concatenate([line_starts[invalid_lines], [len(block)]]).tolist()
+    valid_lines = b"".join(
+        block[run_start:run_end] for run_start, run_end in zip(run_starts, run_ends)
+    )
+    is_blank = line_ends[invalid_lines] == line_starts[invalid_lines]
+
+    return valid_lines, int(np.count_nonzero(~is_blank))
+
+
+class _TabSeparatedLatin1Blocks(object):
+    """Read a latin-1 tab-separated file as utf-8 blocks of whole, valid lines.
+
+    Arrow only reads utf-8 & fails on lines with too many or too few fields, so
+    each block is transcoded & any line whose number of fields differs from the
+    header's is dropped.
+    """
+
+    def __init__(self, raw: BinaryIO, block_size: int = 1 << 26):
+        header = raw.readline().rstrip(b"\n")
+        self.column_names = header.decode("latin-1").split("\t")
+        self.raw = raw
+        self.block_size = block_size
+        self.number_of_delimiters = header.count(b"\t")
+        self.skipped_lines = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        remainder = b""
+        while True:
+            block = self.raw.read(self.block_size)
+            if not block:
+                break
+            block = remainder + block
+            end_of_last_line = block.rfind(b"\n") + 1
+            lines = block[:end_of_last_line]
+            remainder = block[end_of_last_line:]
+            if lines:
+                yield self._clean(lines)
+
+        if remainder:
+            yield self._clean(remainder + b"\n")
+
+    def _clean(self, lines: bytes) -> bytes:
+
+        valid_lines, skipped_lines = _drop_malformed_lines(
+            lines, self.number_of_delimiters,
+        )
+        self.skipped_lines += skipped_lines
+        return valid_lines.decode("latin-1").encode("utf-8")
+
+
+def _read_csv_blocks(
+    blocks: _TabSeparatedLatin1Blocks,
+    column_types: Dict[str, pa.DataType],
+    parse_block_size: int,
+) -> Iterable[pa.Table]:
+
+    for block in blocks:
+        if not block:
+            continue
+        table = pa_csv.read_csv(
+            io.BytesIO(block),
+            read_options=pa_csv.ReadOptions(
+                use_threads=True,
+                block_size=parse_block_size,
+                column_names=blocks.column_names,
+            ),
+            parse_options=pa_csv.ParseOptions(delimiter="\t", quote_char=False),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types, strings_can_be_null=True,
+            ),
+        )
+        # Pin the types inferred from the first block so every block shares them
+        column_types = {
+            field.name: pa.string() if pa.types.is_null(field.type) else field.type
+            for field in table.schema
+        }
+        yield table.cast(pa.schema(column_types))
+
+
+def _convert_ber_publicsearch_to_parquet_via_arrow(
+    input_filepath: str,
+    output_filepath: str,
+    dtypes: Dict[str, str],
+    block_size: int = 1 << 26,
+    parse_block_size: int = 1 << 20,
+) -> int:
+    """Convert BERPublicsearch to parquet via Arrow's multithreaded csv reader.
+
+    The file is read block_size bytes at a time & each block is parsed by Arrow in
+    parallel in parse_block_size pieces, so memory is bounded by block_size.
+
+    Args:
+        input_filepath (str): Path to input data
+        output_filepath (str): Path to output data
+        dtypes (Dict[str, str]): Maps column names to pandas dtypes
+        block_size (int, optional): Number of bytes to read & write at a time.
+            Defaults to 64MB.
+        parse_block_size (int, optional): Number of bytes parsed by each thread at a
+            time. Defaults to 1MB.
+
+    Returns:
+        int: Number of malformed lines skipped
+    """
+    with open(input_filepath, "rb") as raw_file:
+        blocks = _TabSeparatedLatin1Blocks(raw_file, block_size=block_size)
+        tables = _read_csv_blocks(
+            blocks, convert_dtypes_to_arrow_types(dtypes), parse_block_size,
+        )
+        write_parquet_in_chunks(tables, output_filepath)
+
+    return blocks.skipped_lines
 
 
 class BerPublicSearchToDaskParquet(Task):
@@ -16,24 +164,42 @@ class BerPublicSearchToDaskParquet(Task):
         Task (prefect.Task): see  https://docs.prefect.io/core/concepts/tasks.html
     """
 
+    @require(lambda engine: engine in {"dask", "pyarrow"})
     def run(
-        self, input_filepath: str, output_filepath: str, dtypes_filepath: str,
+        self,
+        input_filepath: str,
+        output_filepath: str,
+        dtypes_filepath: str,
+        engine: str = "dask",
     ) -> None:
         """Convert csv file to parquet.
 
+        The 'pyarrow' engine parses the file on all cores with bounded memory,
+        writing a single parquet file one row group at a time.
+
         Args:
             input_filepath (str): Path to input data
             output_filepath (str): Path to output data
             dtypes_filepath (str): Path to file containing dtypes
+            engine (str, optional): Engine used to parse the input data, 'dask' or
+                'pyarrow'. Defaults to 'dask'.
         """
         logger = prefect.context.get("logger")
-        if path.exists(output_filepath):
-            logger.info(f"{output_filepath} already exists")
+        if is_up_to_date(output_filepath, input_filepath):
+            logger.info(f"{output_filepath} is up to date")
 
         else:
             with open(dtypes_filepath, "r") as json_file:
                 dtypes = json.load(json_file)
 
+            if engine == "pyarrow":
+                skipped_lines = _convert_ber_publicsearch_to_parquet_via_arrow(
+                    input_filepath, output_filepath, dtypes,
+                )
+                if skipped_lines > 0:
+                    logger.warning(f"Skipped {skipped_lines} malformed lines")
+                return
+
             ber_raw = dd.read_csv(
                 input_filepath,
                 sep="\t",
@@ -45,7 +211,66 @@ class BerPublicSearchToDaskParquet(Task):
                 quoting=csv.QUOTE_NONE,
             )
 
-            ber_raw.to_parquet(output_filepath, schema="infer")
+            write_dask_parquet(ber_raw, output_filepath, schema="infer")
+
+
+class BerPublicSearchZipToParquet(Task):
+    """Create prefect.Task to Stream zipped BERPublicsearch to Parquet.
+
+    The zipped text file is decompressed on the fly & written to parquet chunk by
+    chunk so the multi-GB text file is never extracted to disk or held in memory.
+
+    Args:
+        Task (prefect.Task): see  https://docs.prefect.io/core/concepts/tasks.html
+    """
+
+    def run(
+        self,
+        input_filepath: str,
+        output_filepath: str,
+        dtypes_filepath: str,
+        filename: str = "BERPublicsearch.txt",
+        chunksize: int = 100000,
+        partition_cols: Optional[List[str]] = None,
+    ) -> None:
+        """Convert zipped txt file to parquet.
+
+        Args:
+            input_filepath (str): Path to zipped input data
+            output_filepath (str): Path to output data
+            dtypes_filepath (str): Path to file containing dtypes
+            filename (str, optional): Name of zipped txt file. Defaults to
+                "BERPublicsearch.txt".
+            chunksize (int, optional): Number of rows to read & write at a time.
+                Defaults to 100000.
+            partition_cols (Optional[List[str]], optional): Names of columns by which
+                to partition the output parquet dataset such as 'CountyName'. Defaults
+                to None.
+        """
+        logger = prefect.context.get("logger")
+        if is_up_to_date(output_filepath, input_filepath):
+            logger.info(f"{output_filepath} is up to date")
+
+        else:
+            with open(dtypes_filepath, "r") as json_file:
+                dtypes = json.load(json_file)
+
+            with ZipFile(input_filepath) as zipped_file, zipped_file.open(
+                filename,
+            ) as ber_raw:
+                chunks = pd.read_csv(
+                    ber_raw,
+                    sep="\t",
+                    dtype=dtypes,
+                    encoding="latin-1",
+                    lineterminator="\n",
+                    error_bad_lines=False,
+                    quoting=csv.QUOTE_NONE,
+                    chunksize=chunksize,
+                )
+                write_parquet_in_chunks(
+                    chunks, output_filepath, partition_cols=partition_cols,
+                )
 
 
 if __name__ == "__main__":
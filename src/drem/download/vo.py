@@ -1,49 +1,124 @@
-import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from os import mkdir
 from os import path
+from time import perf_counter
+from typing import Dict
 from typing import List
+from typing import Tuple
 
 import requests
 
 from loguru import logger
 from prefect import Task
+from requests.adapters import HTTPAdapter
 
 from drem.filepaths import EXTERNAL_DIR
 from drem.utilities.download import download
 
 
-def _download_by_local_authority(savedir, local_authorities):
-    categories = [
-        "OFFICE",
-        "FUEL/DEPOT",
-        "LEISURE",
-        "INDUSTRIAL USES",
-        "HEALTH",
-        "HOSPITALITY",
-        "MINERALS",
-        "MISCELLANEOUS",
-        "RETAIL (SHOPS)",
-        "UTILITY",
-        "RETAIL (WAREHOUSE)",
-        "NO CATEGORY SELECTED",
-        "CENTRAL VALUATION LIST",
-        "CHECK CATEGORY",
-        "NON-LIST",
-        "NON-LIST EXEMPT",
-    ]
-
-    for local_authority in local_authorities:
-        for category in categories:
-            category_without_slashes = category.replace("/", " or ")
-            try:
-                download(
-                    url=f"https://api.valoff.ie/api/Property/GetProperties?Fields=*&LocalAuthority={local_authority}&CategorySelected={category}&Format=csv&Download=true",
-                    filepath=path.join(
-                        savedir, f"{local_authority} - {category_without_slashes}.csv",
-                    ),
+VO_CATEGORIES: Tuple[str, ...] = (
+    "OFFICE",
+    "FUEL/DEPOT",
+    "LEISURE",
+    "INDUSTRIAL USES",
+    "HEALTH",
+    "HOSPITALITY",
+    "MINERALS",
+    "MISCELLANEOUS",
+    "RETAIL (SHOPS)",
+    "UTILITY",
+    "RETAIL (WAREHOUSE)",
+    "NO CATEGORY SELECTED",
+    "CENTRAL VALUATION LIST",
+    "CHECK CATEGORY",
+    "NON-LIST",
+    "NON-LIST EXEMPT",
+)
+
+
+def _get_vo_url(local_authority: str, category: str) -> str:
+
+    return f"https://api.valoff.ie/api/Property/GetProperties?Fields=*&LocalAuthority={local_authority}&CategorySelected={category}&Format=csv&Download=true"
+
+
+def _get_vo_filepath(savedir: str, local_authority: str, category: str) -> str:
+
+    category_without_slashes = category.replace("/", " or ")
+    return path.join(savedir, f"{local_authority} - {category_without_slashes}.csv")
+
+
+def _create_session(max_workers: int) -> requests.Session:
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def _download_and_time(url: str, filepath: str, session: requests.Session) -> float:
+
+    start = perf_counter()
+    download(url=url, filepath=filepath, session=session)
+
+    return perf_counter() - start
+
+
+def _download_by_local_authority(
+    savedir: str, local_authorities: List[str], max_workers: int = 8,
+) -> Dict[str, str]:
+    """Download all local authority/category files concurrently.
+
+    Each file is fetched by a bounded pool of worker threads that share a single
+    keep-alive session, so connections are reused across requests.
+
+    Args:
+        savedir (str): Path to directory where data will be saved
+        local_authorities (List[str]): Names of local authorities to be queried
+        max_workers (int, optional): Maximum number of concurrent downloads.
+            Defaults to 8.
+
+    Returns:
+        Dict[str, str]: Maps the filepath of each failed download to its error
+    """
+    failed_downloads: Dict[str, str] = {}
+
+    with _create_session(max_workers) as session, ThreadPoolExecutor(
+        max_workers=max_workers,
+    ) as executor:
+
+        future_to_filepath = {}
+        for local_authority in local_authorities:
+            for category in VO_CATEGORIES:
+                filepath = _get_vo_filepath(savedir, local_authority, category)
+                future = executor.submit(
+                    _download_and_time,
+                    url=_get_vo_url(local_authority, category),
+                    filepath=filepath,
+                    session=session,
                 )
-            except requests.HTTPError as error:
-                logger.info(error)
+                future_to_filepath[future] = filepath
+
+        for future in as_completed(future_to_filepath):
+            filepath = future_to_filepath[future]
+            try:
+                elapsed = future.result()
+            except requests.RequestException as error:
+                failed_downloads[filepath] = str(error)
+            else:
+                logger.info(f"Downloaded {filepath} in {elapsed:.2f}s")
+
+    if failed_downloads:
+        failures = "\n".join(
+            f"{filepath}: {error}" for filepath, error in failed_downloads.items()
+        )
+        logger.warning(
+            f"{len(failed_downloads)} of {len(future_to_filepath)} downloads failed:\n{failures}",
+        )
+
+    return failed_downloads
 
 
 class DownloadValuationOffice(Task):
@@ -53,21 +128,30 @@ class DownloadValuationOffice(Task):
         Task (prefect.Task): see https://docs.prefect.io/core/concepts/tasks.html
     """
 
-    def run(self, dirpath: str, local_authorities: List[str]):
+    def run(
+        self, dirpath: str, local_authorities: List[str], max_workers: int = 8,
+    ) -> Dict[str, str]:
         """Download Local Authority Valuation Office Data category-by-category.
 
         Args:
             dirpath (str): Path to directory where data will be saved
             local_authorities (List[str]): Names of local authorities to be queried
+            max_workers (int, optional): Maximum number of concurrent downloads.
+                Defaults to 8.
+
+        Returns:
+            Dict[str, str]: Maps the filepath of each failed download to its error
         """
         savedir = path.join(dirpath, "vo")
 
         if path.exists(savedir):
             logger.info(f"{savedir} already exists")
+            return {}
 
-        else:
-            mkdir(savedir)
-            _download_by_local_authority(savedir, local_authorities)
+        mkdir(savedir)
+        return _download_by_local_authority(
+            savedir, local_authorities, max_workers=max_workers,
+        )
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Any
 from typing import Iterable
+from typing import List
 
 import pandas as pd
 
@@ -12,9 +13,20 @@ from prefect.utilities.debug import raise_on_exception
 
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
 from drem.utilities.visualize import VisualizeMixin
 
 
+BER_COLUMNS: List[str] = [
+    "postcodes",
+    "cso_period_built",
+    "DeliveredEnergyMainSpace",
+    "DeliveredEnergyMainWater",
+    "DeliveredEnergySecondarySpace",
+    "DeliveredEnergySupplementaryWater",
+]
+
+
 @task
 def _get_mean_heat_demand_per_archetype(
     ber: pd.DataFrame, group_by: Iterable[str], target: str, result: str,
@@ -27,21 +39,10 @@ with Flow("Create BER Archetypes") as flow:
 
     ber_fpath = Parameter("ber_fpath")
 
-    clean_ber = pdt.read_parquet(ber_fpath)
+    clean_ber = pdt.read_parquet(ber_fpath, columns=BER_COLUMNS)
 
-    select_columns_from_raw = pdt.get_columns(
-        clean_ber,
-        column_names=[
-            "postcodes",
-            "cso_period_built",
-            "DeliveredEnergyMainSpace",
-            "DeliveredEnergyMainWater",
-            "DeliveredEnergySecondarySpace",
-            "DeliveredEnergySupplementaryWater",
-        ],
-    )
     sum_hh_heat_demand_columns = pdt.get_sum_of_columns(
-        select_columns_from_raw,
+        clean_ber,
         target=[
             "DeliveredEnergyMainSpace",
             "DeliveredEnergyMainWater",
@@ -91,7 +92,9 @@ class CreateBERArchetypes(Task, VisualizeMixin):
 
         result = state.result[ber_archetypes].result
 
-        result.to_parquet(output_filepath)
+        write_parquet(
+            result, output_filepath, sort_by=["postcodes", "cso_period_built"],
+        )
 
 
 create_ber_archetypes = CreateBERArchetypes()
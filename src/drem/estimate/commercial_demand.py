@@ -1,16 +1,29 @@
 import geopandas as gpd
+import pandas as pd
 
 from drem.filepaths import PROCESSED_DIR
 from drem.filepaths import ROUGHWORK_DIR
+from drem.utilities.crs import read_parquet_in_crs
 
 
+# Link buildings to Small Areas in ITM & only reproject outputs to lat/long
 sa_geoms = gpd.read_parquet(PROCESSED_DIR / "small_area_geometries_2016.parquet")
-pcodes = gpd.read_parquet(PROCESSED_DIR / "dublin_postcodes.parquet")
 vo = gpd.read_parquet(PROCESSED_DIR / "vo.parquet")
-non_resi_gas = gpd.read_parquet(PROCESSED_DIR / "non_residential_postcode_gas.parquet")
+sa_geoms_lat_long = read_parquet_in_crs(
+    PROCESSED_DIR / "small_area_geometries_2016.parquet",
+    columns=["small_area", "geometry"],
+)
+pcodes = read_parquet_in_crs(PROCESSED_DIR / "dublin_postcodes.parquet")
+non_resi_gas = read_parquet_in_crs(
+    PROCESSED_DIR / "non_residential_postcode_gas.parquet",
+).astype({"year": "int16"})
+
+sa_lookup = pd.read_parquet(
+    PROCESSED_DIR / "small_area_lookup.parquet", columns=["small_area", "postcodes"],
+)
 
-vo_pcode = gpd.sjoin(pcodes, vo)
 vo_sas = gpd.sjoin(sa_geoms, vo)
+vo_pcode = vo_sas.merge(sa_lookup, on="small_area")
 
 vo_pcode_elec_demand = (
     vo_pcode.groupby("postcodes")["estimated_electricity_kwh"].sum().reset_index()
@@ -27,8 +40,8 @@ vo_sa_ff_demand = (
 
 pcodes_elec_demand = pcodes.merge(vo_pcode_elec_demand)
 pcodes_ff_demand = pcodes.merge(vo_pcode_ff_demand)
-sas_elec_demand = sa_geoms.merge(vo_sa_elec_demand)
-sas_ff_demand = sa_geoms.merge(vo_sa_ff_demand)
+sas_elec_demand = sa_geoms_lat_long.merge(vo_sa_elec_demand)
+sas_ff_demand = sa_geoms_lat_long.merge(vo_sa_ff_demand)
 
 pcodes_elec_demand.to_file(ROUGHWORK_DIR / "vo_pcode_elec_demand")
 pcodes_ff_demand.to_file(ROUGHWORK_DIR / "vo_pcode_ff_demand")
@@ -1,17 +1,25 @@
-import geopandas as gpd
+import pandas as pd
 
 from drem.filepaths import PROCESSED_DIR
 from drem.filepaths import ROUGHWORK_DIR
+from drem.utilities.crs import read_parquet_in_crs
 
 
-sa_geoms = gpd.read_parquet(PROCESSED_DIR / "small_area_geometries_2016.parquet")
-pcodes = gpd.read_parquet(PROCESSED_DIR / "dublin_postcodes.parquet")
-resi_gas = gpd.read_parquet(PROCESSED_DIR / "residential_postcode_gas.parquet")
-ber_sa_estimate = gpd.read_parquet(
+pcodes = read_parquet_in_crs(PROCESSED_DIR / "dublin_postcodes.parquet")
+# Partitioned by year which is read as a category
+resi_gas = read_parquet_in_crs(
+    PROCESSED_DIR / "residential_postcode_gas.parquet",
+).astype({"year": "int16"})
+ber_sa_estimate = pd.read_parquet(
     PROCESSED_DIR / "small_area_heat_demand_estimate.parquet",
+    columns=["small_area", "total_heat_demand_per_sa_kwh"],
 )
 
-ber_pcode = gpd.sjoin(pcodes, ber_sa_estimate)
+sa_lookup = pd.read_parquet(
+    PROCESSED_DIR / "small_area_lookup.parquet", columns=["small_area", "postcodes"],
+)
+
+ber_pcode = ber_sa_estimate.merge(sa_lookup, on="small_area")
 ber_pcode_est = (
     ber_pcode[["postcodes", "total_heat_demand_per_sa_kwh"]]
     .groupby("postcodes")["total_heat_demand_per_sa_kwh"]
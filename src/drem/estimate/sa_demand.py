@@ -13,6 +13,8 @@ from prefect.utilities.debug import raise_on_exception
 import drem.utilities.geopandas_tasks as gpdt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
+
 
 @task
 def _merge(gdf: gpd.GeoDataFrame, df: pd.DataFrame, **kwargs: Any) -> gpd.GeoDataFrame:
@@ -54,7 +56,10 @@ with Flow("Estimate Dublin Small Area Annual Energy Demands") as flow:
     ber_archetype_averages_fpath = Parameter("ber_archetype_averages_fpath")
     sa_geometries_fpath = Parameter("sa_geometries_fpath")
 
-    sa_periods_built = gpdt.read_parquet(sa_periods_built_fpath)
+    sa_periods_built = pdt.read_parquet(
+        sa_periods_built_fpath,
+        columns=["small_area", "postcodes", "cso_period_built", "households"],
+    )
     ber_archetype_averages = pdt.read_parquet(ber_archetype_averages_fpath)
     sa_geometries = gpdt.read_parquet(sa_geometries_fpath)
 
@@ -121,7 +126,7 @@ class EstimateSmallAreaDemand(Task):
 
         result = state.result[sa_demand_with_geometries].result
 
-        result.to_parquet(output_filepath)
+        write_parquet(result, output_filepath, sort_by=["small_area"])
 
 
 estimate_sa_demand = EstimateSmallAreaDemand()
@@ -12,6 +12,7 @@ from drem.utilities.get_data_dir import get_data_dir
 
 data_dir = get_data_dir()
 external_dir = path.join(data_dir, "external")
+interim_dir = path.join(data_dir, "interim")
 processed_dir = path.join(data_dir, "processed")
 
 benchmarks_dir = path.join(data_dir, "commercial_building_benchmarks")
@@ -38,6 +39,7 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
         output_filepath=path.join(processed_dir, "vo.parquet"),
         benchmarks_dirpath=benchmarks_dir,
         unmatched_filepath=path.join(benchmarks_dir, "Unmatched.txt"),
+        cache_dirpath=path.join(interim_dir, "vo"),
     )
 
     vo_clean.set_upstream(valuation_office_downloaded)
@@ -1,3 +1,4 @@
+import csv
 import warnings
 
 from os import path
@@ -18,8 +19,10 @@ from drem.transform.cso_gas import transform_cso_gas
 from drem.transform.dublin_postcodes import transform_dublin_postcodes
 from drem.transform.sa_geometries import transform_sa_geometries
 from drem.transform.sa_statistics import transform_sa_statistics
+from drem.transform.small_area_lookup import create_small_area_lookup
 from drem.utilities import convert as convert_util
 from drem.utilities.download import Download
+from drem.utilities.dtypes import InferCompactDtypes
 from drem.utilities.get_data_dir import get_data_dir
 from drem.utilities.visualize import VisualizeMixin
 from drem.utilities.zip import unzip as unzip_util
@@ -35,12 +38,16 @@ interim_dir = path.join(data_dir, "interim")
 processed_dir = path.join(data_dir, "processed")
 
 ber_publicsearch_filename = "BERPublicsearch"
-cso_gas_filename = "cso_gas_2019"
+cso_gas_filename = "cso_gas"
+# Years of each CSO Networked Gas Consumption release to be combined
+cso_gas_years = [2019]
 dublin_postcode_geometries_filename = "dublin_postcodes"
 small_area_statistics_filename = "small_area_statistics_2016"
 small_area_glossary_filename = "small_area_glossary_2016"
 small_area_geometries_filename = "small_area_geometries_2016"
 
+download_manifest_filepath = path.join(external_dir, "download_manifest.json")
+
 # Get Prefect secrets
 # -------------------
 email_address = PrefectSecret("email_address")
@@ -51,39 +58,50 @@ download_sa_statistics = Download(
     name="Download Small Area Statistics",
     url="https://www.cso.ie/en/media/csoie/census/census2016/census2016boundaryfiles/SAPS2016_SA2017.csv",
     dirpath=external_dir,
+    manifest_filepath=download_manifest_filepath,
     filename=f"{small_area_statistics_filename}.zip",
 )
 download_sa_glossary = Download(
     name="Download Small Area Glossary",
     url="https://www.cso.ie/en/media/csoie/census/census2016/census2016boundaryfiles/SAPS_2016_Glossary.xlsx",
     dirpath=external_dir,
+    manifest_filepath=download_manifest_filepath,
     filename=f"{small_area_glossary_filename}.xlsx",
 )
 download_sa_geometries = Download(
     name="Download Small Area Geometries",
     url="http://data-osi.opendata.arcgis.com/datasets/c85e610da1464178a2cd84a88020c8e2_3.zip",
     dirpath=external_dir,
+    manifest_filepath=download_manifest_filepath,
     filename=f"{small_area_geometries_filename}.zip",
 )
 download_dublin_postcode_geometries = Download(
     name="Download Dublin Postcode Geometries",
     url="https://github.com/rdmolony/dublin-postcode-shapefiles/archive/master.zip",
     dirpath=external_dir,
+    manifest_filepath=download_manifest_filepath,
     filename=f"{dublin_postcode_geometries_filename}.zip",
 )
-download_cso_gas = Download(
-    name="Download CSO 2019 Postcode Annual Network Gas Consumption",
-    url="https://www.cso.ie/en/releasesandpublications/er/ngc/networkedgasconsumption2019/",
-    dirpath=external_dir,
-    filename=f"{cso_gas_filename}.html",
-)
+download_cso_gas = [
+    Download(
+        name=f"Download CSO {year} Postcode Annual Network Gas Consumption",
+        url=f"https://www.cso.ie/en/releasesandpublications/er/ngc/networkedgasconsumption{year}/",
+        dirpath=external_dir,
+        manifest_filepath=download_manifest_filepath,
+        filename=f"{cso_gas_filename}_{year}.html",
+    )
+    for year in cso_gas_years
+]
 download_ber = download.BERPublicsearch(name="Download Ireland BER Data")
 
 
 # Setup convert tasks
 # -------------------
-convert_berpublicsearch_to_parquet = convert.BerPublicSearchToDaskParquet(
-    name="Convert BERPublicsearch from txt to dask parquet",
+convert_berpublicsearch_to_parquet = convert.BerPublicSearchZipToParquet(
+    name="Convert BERPublicsearch from zipped txt to parquet",
+)
+infer_berpublicsearch_dtypes = InferCompactDtypes(
+    name="Infer compact BERPublicsearch dtypes",
 )
 
 
@@ -95,7 +113,9 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
     sa_glossary_downloaded = download_sa_glossary()
     sa_geometries_downloaded = download_sa_geometries()
     dublin_postcodes_downloaded = download_dublin_postcode_geometries()
-    cso_gas_downloaded = download_cso_gas()
+    cso_gas_downloaded = [
+        download_cso_gas_release() for download_cso_gas_release in download_cso_gas
+    ]
     ber_downloaded = download_ber(
         email_address=email_address,
         filepath=path.join(external_dir, f"{ber_publicsearch_filename}.zip"),
@@ -115,10 +135,6 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
             external_dir, f"{dublin_postcode_geometries_filename}",
         ),
     )
-    ber_unzipped = unzip_util(
-        input_filepath=path.join(external_dir, f"{ber_publicsearch_filename}.zip"),
-        output_filepath=path.join(external_dir, f"{ber_publicsearch_filename}"),
-    )
 
     # Convert all data to parquet for faster io
     # -----------------------------------------
@@ -149,12 +165,26 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
             interim_dir, f"{dublin_postcode_geometries_filename}.parquet",
         ),
     )
-    ber_converted = convert_berpublicsearch_to_parquet(
-        input_filepath=path.join(
-            external_dir, ber_publicsearch_filename, f"{ber_publicsearch_filename}.txt",
+    ber_dtypes_inferred = infer_berpublicsearch_dtypes(
+        input_filepath=path.join(external_dir, f"{ber_publicsearch_filename}.zip"),
+        output_filepath=path.join(
+            interim_dir, f"{ber_publicsearch_filename}_dtypes.json",
         ),
-        output_filepath=path.join(interim_dir, f"{ber_publicsearch_filename}.parquet"),
         dtypes_filepath=path.join(dtypes_dir, f"{ber_publicsearch_filename}.json"),
+        filename=f"{ber_publicsearch_filename}.txt",
+        sep="\t",
+        encoding="latin-1",
+        lineterminator="\n",
+        error_bad_lines=False,
+        quoting=csv.QUOTE_NONE,
+    )
+    ber_converted = convert_berpublicsearch_to_parquet(
+        input_filepath=path.join(external_dir, f"{ber_publicsearch_filename}.zip"),
+        output_filepath=path.join(interim_dir, f"{ber_publicsearch_filename}.parquet"),
+        dtypes_filepath=path.join(
+            interim_dir, f"{ber_publicsearch_filename}_dtypes.json",
+        ),
+        partition_cols=["CountyName"],
     )
 
     # Clean data
@@ -181,6 +211,15 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
             processed_dir, f"{dublin_postcode_geometries_filename}.parquet",
         ),
     )
+    sa_lookup_created = create_small_area_lookup(
+        sa_geometries_filepath=path.join(
+            processed_dir, f"{small_area_geometries_filename}.parquet",
+        ),
+        postcodes_filepath=path.join(
+            processed_dir, f"{dublin_postcode_geometries_filename}.parquet",
+        ),
+        output_filepath=path.join(processed_dir, "small_area_lookup.parquet"),
+    )
     sa_statistics_clean = transform_sa_statistics(
         input_filepath=path.join(
             interim_dir, f"{small_area_statistics_filename}.parquet",
@@ -188,9 +227,7 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
         sa_glossary_filepath=path.join(
             interim_dir, f"{small_area_glossary_filename}.parquet",
         ),
-        postcodes_filepath=path.join(
-            processed_dir, f"{dublin_postcode_geometries_filename}.parquet",
-        ),
+        sa_lookup_filepath=path.join(processed_dir, "small_area_lookup.parquet"),
         sa_geometries_filepath=path.join(
             processed_dir, f"{small_area_geometries_filename}.parquet",
         ),
@@ -200,7 +237,10 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
         output_filepath_boilers=path.join(processed_dir, "small_area_boilers.parquet"),
     )
     cso_gas_clean = transform_cso_gas(
-        input_filepath=path.join(external_dir, f"{cso_gas_filename}.html"),
+        input_filepaths={
+            year: path.join(external_dir, f"{cso_gas_filename}_{year}.html")
+            for year in cso_gas_years
+        },
         postcodes_filepath=path.join(
             processed_dir, f"{dublin_postcode_geometries_filename}.parquet",
         ),
@@ -238,21 +278,25 @@ with Flow("Extract, Transform & Load DREM Data") as flow:
     dublin_postcodes_unzipped.set_upstream(dublin_postcodes_downloaded)
     sa_statistics_converted.set_upstream(sa_statistics_downloaded)
     sa_glossary_converted.set_upstream(sa_glossary_downloaded)
-    cso_gas_clean.set_upstream(cso_gas_downloaded)
-    ber_unzipped.set_upstream(ber_downloaded)
+    for cso_gas_release_downloaded in cso_gas_downloaded:
+        cso_gas_clean.set_upstream(cso_gas_release_downloaded)
 
     sa_geometries_converted.set_upstream(sa_geometries_unzipped)
     dublin_postcodes_converted.set_upstream(dublin_postcodes_unzipped)
-    ber_converted.set_upstream(ber_unzipped)
+    ber_dtypes_inferred.set_upstream(ber_downloaded)
+    ber_converted.set_upstream(ber_dtypes_inferred)
 
     ber_clean.set_upstream(ber_converted)
     dublin_postcodes_clean.set_upstream(dublin_postcodes_converted)
     sa_geometries_clean.set_upstream(sa_geometries_converted)
 
+    sa_lookup_created.set_upstream(sa_geometries_clean)
+    sa_lookup_created.set_upstream(dublin_postcodes_clean)
+
     sa_statistics_clean.set_upstream(sa_statistics_converted)
     sa_statistics_clean.set_upstream(sa_glossary_converted)
     sa_statistics_clean.set_upstream(sa_geometries_clean)
-    sa_statistics_clean.set_upstream(dublin_postcodes_clean)
+    sa_statistics_clean.set_upstream(sa_lookup_created)
 
     cso_gas_clean.set_upstream(dublin_postcodes_clean)
     cso_gas_clean.set_upstream(sa_statistics_clean)
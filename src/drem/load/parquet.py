@@ -1,11 +1,328 @@
+import os
+import shutil
+
 from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
 from typing import Union
 
+import dask.dataframe as dd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
 from geopandas import GeoDataFrame
+from loguru import logger
 from pandas import DataFrame
 from prefect import Task
 
 
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Options passed to pyarrow.parquet.write_table by every parquet writer in drem
+PARQUET_WRITE_PROFILE: Dict[str, Any] = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 131072,
+    "use_dictionary": True,
+    "write_statistics": True,
+}
+
+ARROW_TYPES = {
+    "string": pa.string(),
+    "object": pa.string(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "bool": pa.bool_(),
+    "float64": pa.float64(),
+    "float32": pa.float32(),
+    "int64": pa.int64(),
+    "int32": pa.int32(),
+    "int16": pa.int16(),
+    "int8": pa.int8(),
+    "Int64": pa.int64(),
+    "Int32": pa.int32(),
+    "Int16": pa.int16(),
+    "Int8": pa.int8(),
+}
+
+
+def convert_dtypes_to_arrow_types(dtypes: Dict[str, str]) -> Dict[str, pa.DataType]:
+    """Convert pandas dtype names to their Arrow equivalents.
+
+    Args:
+        dtypes (Dict[str, str]): Maps column names to pandas dtypes such as 'int16'
+
+    Returns:
+        Dict[str, pa.DataType]: Maps column names to Arrow data types
+    """
+    return {column: ARROW_TYPES[dtype] for column, dtype in dtypes.items()}
+
+
+def get_parquet_write_profile(**overrides: Any) -> Dict[str, Any]:
+    """Get the project-wide parquet write options.
+
+    Example:
+        Write a smaller file at the expense of a slower write,
+        get_parquet_write_profile(compression_level=19)
+
+    Args:
+        **overrides (Any): Options which replace those in PARQUET_WRITE_PROFILE such
+            as 'use_dictionary' (a bool or a list of column names); overrides set to
+            None fall back to the profile
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for pyarrow.parquet.write_table
+    """
+    return {
+        **PARQUET_WRITE_PROFILE,
+        **{option: value for option, value in overrides.items() if value is not None},
+    }
+
+
+def _lock_schema(
+    schema: pa.Schema, schema_overrides: Optional[Dict[str, pa.DataType]],
+) -> pa.Schema:
+
+    for index, field in enumerate(schema):
+        # Later chunks may have more categories than fit in the first chunk's codes
+        if pa.types.is_dictionary(field.type):
+            widened_type = pa.dictionary(pa.int32(), field.type.value_type)
+            schema = schema.set(index, pa.field(field.name, widened_type))
+
+    for column, data_type in (schema_overrides or {}).items():
+        index = schema.get_field_index(column)
+        schema = schema.set(index, pa.field(column, data_type))
+
+    return schema
+
+
+def _convert_chunk_to_table(
+    chunk: Union[pd.DataFrame, pa.RecordBatch, pa.Table],
+    schema: Optional[pa.Schema],
+    partition_cols: Optional[List[str]],
+) -> pa.Table:
+
+    if isinstance(chunk, pd.DataFrame):
+        if partition_cols:
+            # Rows with missing partition values would otherwise be silently dropped
+            chunk = chunk.astype(dict.fromkeys(partition_cols, "object")).fillna(
+                dict.fromkeys(partition_cols, HIVE_DEFAULT_PARTITION),
+            )
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    table = chunk if isinstance(chunk, pa.Table) else pa.Table.from_batches([chunk])
+    return table.cast(schema) if schema else table
+
+
+def write_parquet(
+    df: Union[DataFrame, GeoDataFrame],
+    filepath: Union[str, Path],
+    sort_by: Optional[List[str]] = None,
+    **overrides: Any,
+) -> None:
+    """Write a DataFrame or GeoDataFrame to parquet using the project write profile.
+
+    Sorting by the columns most often filtered on keeps similar values in the same
+    row groups so their min/max statistics let readers skip the rest.
+
+    Args:
+        df (Union[DataFrame, GeoDataFrame]): Data to be saved
+        filepath (Union[str, Path]): Path to output parquet file
+        sort_by (Optional[List[str]], optional): Names of columns by which to sort
+            rows before writing. Defaults to None.
+        **overrides (Any): Passed to get_parquet_write_profile
+    """
+    if sort_by:
+        df = df.sort_values(sort_by, ignore_index=isinstance(df.index, pd.RangeIndex))
+
+    df.to_parquet(filepath, **get_parquet_write_profile(**overrides))
+
+
+def write_partitioned_parquet(
+    df: Union[DataFrame, GeoDataFrame],
+    dirpath: Union[str, Path],
+    partition_col: str,
+    sort_by: Optional[List[str]] = None,
+    **overrides: Any,
+) -> None:
+    """Write a DataFrame or GeoDataFrame to a Hive-partitioned parquet dataset.
+
+    Each partition is written via write_parquet to
+    `<dirpath>/<partition_col>=<value>/part.0.parquet` so GeoDataFrames keep their
+    geometry metadata. The dataset is written to `<dirpath>.part` and only replaces
+    dirpath once every partition has been written.
+
+    Args:
+        df (Union[DataFrame, GeoDataFrame]): Data to be saved
+        dirpath (Union[str, Path]): Path to output parquet directory
+        partition_col (str): Name of column by which to partition the dataset
+        sort_by (Optional[List[str]], optional): Names of columns by which to sort
+            rows within each partition. Defaults to None.
+        **overrides (Any): Passed to get_parquet_write_profile
+    """
+    partial_dirpath = Path(f"{dirpath}.part")
+    if partial_dirpath.exists():
+        shutil.rmtree(partial_dirpath)
+
+    for value, partition in df.groupby(partition_col, sort=False):
+        partition_dirpath = partial_dirpath / f"{partition_col}={value}"
+        partition_dirpath.mkdir(parents=True)
+        write_parquet(
+            partition.drop(columns=partition_col).reset_index(drop=True),
+            partition_dirpath / "part.0.parquet",
+            sort_by=sort_by,
+            **overrides,
+        )
+
+    if Path(dirpath).is_dir():
+        shutil.rmtree(dirpath)
+    os.replace(partial_dirpath, dirpath)
+
+
+def write_dask_parquet(
+    ddf: dd.DataFrame, dirpath: Union[str, Path], **overrides: Any,
+) -> None:
+    """Write a Dask DataFrame to parquet using the project write profile.
+
+    Any existing dataset at dirpath is deleted first as dask would otherwise leave
+    its stale part files alongside the new ones.
+
+    Args:
+        ddf (dd.DataFrame): Data to be saved
+        dirpath (Union[str, Path]): Path to output parquet directory
+        **overrides (Any): Passed to get_parquet_write_profile, or to
+            dask.dataframe.to_parquet such as schema="infer"
+    """
+    if Path(dirpath).is_dir():
+        shutil.rmtree(dirpath)
+    ddf.to_parquet(dirpath, engine="pyarrow", **get_parquet_write_profile(**overrides))
+
+
+def write_parquet_in_chunks(
+    chunks: Iterable[Union[pd.DataFrame, pa.RecordBatch, pa.Table]],
+    filepath: str,
+    schema: Optional[pa.Schema] = None,
+    partition_cols: Optional[List[str]] = None,
+    schema_overrides: Optional[Dict[str, pa.DataType]] = None,
+    **overrides: Any,
+) -> None:
+    """Write DataFrame chunks to parquet one row group at a time.
+
+    Only one chunk is held in memory at a time.  The file schema is locked by the
+    first chunk (unless passed explicitly) and every later chunk is cast to it, so
+    columns whose inferred type may change between chunks (such as integers with
+    missing values) should be pinned via schema_overrides. Data
+    is written to `<filepath>.part` and only renamed to filepath once every chunk has
+    been written.  If chunks is empty a file with no rows is written from schema, or
+    ValueError is raised if there is no schema or partition_cols are specified.
+
+    If partition_cols are specified a Hive-partitioned parquet dataset directory is
+    written instead of a single file so readers can skip irrelevant partitions.
+
+    Args:
+        chunks (Iterable[Union[pd.DataFrame, pa.RecordBatch, pa.Table]]): DataFrames
+            or Arrow RecordBatches/Tables sharing the same columns
+        filepath (str): Path to output parquet file
+        schema (Optional[pa.Schema], optional): Schema of the output file. Defaults
+            to None.
+        partition_cols (Optional[List[str]], optional): Names of columns by which to
+            partition the dataset. Defaults to None.
+        schema_overrides (Optional[Dict[str, pa.DataType]], optional): Maps column
+            names to Arrow types which replace those inferred from the first chunk.
+            Defaults to None.
+        **overrides (Any): Passed to get_parquet_write_profile such as
+            row_group_size, the maximum number of rows per row group
+    """
+    write_options = get_parquet_write_profile(**overrides)
+    row_group_size = write_options.pop("row_group_size")
+    partial_filepath = f"{filepath}.part"
+    writer = None
+
+    # Otherwise a dataset left by a crashed run would be appended to
+    if Path(partial_filepath).is_dir():
+        shutil.rmtree(partial_filepath)
+
+    try:
+        for chunk in chunks:
+            if schema is None:
+                first_table = _convert_chunk_to_table(chunk, schema, partition_cols)
+                schema = _lock_schema(first_table.schema, schema_overrides)
+            table = _convert_chunk_to_table(chunk, schema, partition_cols)
+            if partition_cols:
+                pq.write_to_dataset(
+                    table,
+                    partial_filepath,
+                    partition_cols=partition_cols,
+                    row_group_size=row_group_size,
+                    **write_options,
+                )
+                continue
+            if writer is None:
+                writer = pq.ParquetWriter(partial_filepath, schema, **write_options)
+            writer.write_table(table, row_group_size=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if not Path(partial_filepath).exists():
+        if schema is None or partition_cols:
+            raise ValueError(f"No chunks to write to {filepath}")
+        pq.write_table(schema.empty_table(), partial_filepath, **write_options)
+
+    if Path(filepath).is_dir():
+        shutil.rmtree(filepath)
+    os.replace(partial_filepath, filepath)
+
+
+def _read_row_groups(filepath: Path) -> Iterable[pa.Table]:
+
+    parquet_file = pq.ParquetFile(filepath)
+    for row_group in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(row_group)
+
+
+def _sort_table(table: pa.Table, sort_by: List[str]) -> pa.Table:
+
+    sort_keys = table.select(sort_by).to_pandas()
+    return table.take(sort_keys.sort_values(sort_by).index.to_numpy())
+
+
+def rewrite_parquet(
+    path: Union[str, Path], sort_by: Optional[List[str]] = None, **overrides: Any,
+) -> None:
+    """Rewrite an existing parquet file or dataset under the project write profile.
+
+    Files are rewritten one row group at a time unless sorting is requested, in
+    which case each file is loaded in full. Stale dask '_metadata' summary files are
+    deleted so that readers fall back to the rewritten file footers.
+
+    Args:
+        path (Union[str, Path]): Path to a parquet file or a directory of them
+        sort_by (Optional[List[str]], optional): Names of columns by which to sort
+            the rows of each file. Defaults to None.
+        **overrides (Any): Passed to get_parquet_write_profile
+    """
+    path = Path(path)
+    filepaths = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+
+    for filepath in filepaths:
+        if sort_by:
+            chunks = [_sort_table(pq.read_table(filepath), sort_by)]
+        else:
+            chunks = _read_row_groups(filepath)
+        write_parquet_in_chunks(
+            chunks, str(filepath), schema=pq.read_schema(filepath), **overrides,
+        )
+        logger.info(f"Rewrote {filepath}")
+
+    summary_filepath = path / "_metadata"
+    if summary_filepath.exists():
+        summary_filepath.unlink()
+
+
 class LoadToParquet(Task):
     """A generic Task class to load Data to parquet files.
 
@@ -23,7 +340,7 @@ class LoadToParquet(Task):
             df (Union[DataFrame, GeoDataFrame]): In-memory data to be saved to disk
             filepath (Path): Save path for data
         """
-        df.to_parquet(filepath)
+        write_parquet(df, filepath)
 
 
 load_to_parquet = LoadToParquet(name="Load Data to Parquet file")
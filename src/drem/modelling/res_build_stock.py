@@ -74,7 +74,7 @@ def _spatial_join(
     left: gpd.GeoDataFrame, right: gpd.GeoDataFrame, **kwargs,
 ) -> gpd.GeoDataFrame:
 
-    right = right.set_crs(epsg="4326")
+    right = right.set_crs(epsg="4326").to_crs(left.crs)
 
     return gpd.sjoin(left, right)
 
@@ -1,7 +1,6 @@
-import json
-
-from collections import defaultdict
 from pathlib import Path
+from typing import Iterable
+from typing import Optional
 
 import dask.dataframe as dd
 import numpy as np
@@ -12,12 +11,13 @@ from prefect import Flow
 from prefect import Parameter
 from prefect import task
 from prefect.engine.results import LocalResult
-from tqdm import tqdm
-from tqdm import trange
 
 from drem.filepaths import INTERIM_DIR
 from drem.filepaths import PROCESSED_DIR
 from drem.filepaths import ROUGHWORK_DIR
+from drem.utilities.demand_matrix import read_demand_matrix
+from drem.utilities.parquet_index import has_parquet_index
+from drem.utilities.parquet_index import read_parquet_by_index
 
 
 @task
@@ -52,7 +52,27 @@ def _get_random_sample(series: pd.Series, size: int, seed: int) -> np.ndarray:
 
 
 @task
-def _extract_sample(ddf: dd.DataFrame, on: str, ids: int) -> pd.DataFrame:
+def _extract_sample(
+    ddf: dd.DataFrame, on: str, ids: int, dirpath: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Extract the demands of a sample of meters.
+
+    If the dataset at dirpath is indexed by drem.utilities.parquet_index only the
+    row groups containing the sampled meters are read, otherwise every row of ddf is
+    scanned.
+
+    Args:
+        ddf (dd.DataFrame): Demands of all meters
+        on (str): Name of meter id column
+        ids (int): Ids of sampled meters
+        dirpath (Optional[Path], optional): Path to the parquet dataset ddf was read
+            from. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Demands of sampled meters
+    """
+    if dirpath is not None and has_parquet_index(dirpath):
+        return read_parquet_by_index(dirpath, on=on, values=ids)
 
     return ddf[ddf[on].isin(ids)].compute()
 
@@ -65,6 +85,103 @@ def _calculate_relative_peak_demand(
     return df.groupby(group_on)[target].sum().max() / size
 
 
+def _draw_samples(
+    rng: np.random.Generator, n_meters: int, sample_size: int, n_samples: int,
+) -> np.ndarray:
+
+    # Sort random keys so each sample holds sample_size distinct meters
+    samples = rng.random((n_samples, n_meters)).argsort(axis=1)[:, :sample_size]
+    is_sampled = np.zeros((n_samples, n_meters), dtype="float32")
+    is_sampled[np.arange(n_samples)[:, np.newaxis], samples] = 1
+
+    return is_sampled
+
+
+def simulate_relative_peak_demands(
+    demands: np.ndarray,
+    sample_sizes: Iterable[int],
+    number_of_simulations: int,
+    seed: int = 0,
+    chunk_size: int = 4096,
+) -> pd.DataFrame:
+    """Simulate the peak demand relative to sample size of random samples of meters.
+
+    Every sample of every size is drawn up front as an array of row numbers, so the
+    demands are read once in chunks of chunk_size half hours & the total demand of
+    every sample in each half hour is found by a single matrix product of sampled
+    meter indicators & demands.  Each sample holds sample_size distinct meters
+    (so no meter is counted twice) & as in _calculate_relative_peak_demand missing
+    demands are treated as zero.
+
+    Example:
+        Simulate the CRU electricity diversity curve,
+        demands, ids, datetimes = read_demand_matrix(matrix_dirpath)
+        simulate_relative_peak_demands(demands, [1, 10, 100], 20)
+
+    Args:
+        demands (np.ndarray): Demands of meters (rows) by half hours (columns) such
+            as a memory-mapped matrix from drem.utilities.demand_matrix
+        sample_sizes (Iterable[int]): Numbers of meters per sample
+        number_of_simulations (int): Number of samples of each size
+        seed (int, optional): Seed of the random number generator. Defaults to 0.
+        chunk_size (int, optional): Number of half hours read at once. Defaults to
+            4096.
+
+    Returns:
+        pd.DataFrame: Relative peak demand of each sample_size & simulation
+
+    Raises:
+        ValueError: If a sample size exceeds the number of meters
+    """
+    n_meters, n_datetimes = demands.shape
+    rng = np.random.default_rng(seed)
+
+    sample_sizes = list(sample_sizes)
+    if max(sample_sizes) > n_meters:
+        raise ValueError(f"Cannot sample more than {n_meters} distinct meters")
+    is_sampled = np.concatenate(
+        [
+            _draw_samples(rng, n_meters, sample_size, number_of_simulations)
+            for sample_size in sample_sizes
+        ],
+    )
+
+    peak_demands = np.full(len(is_sampled), -np.inf, dtype="float32")
+    for start in range(0, n_datetimes, chunk_size):
+        chunk = np.nan_to_num(np.asarray(demands[:, start : start + chunk_size]))
+        peak_demands = np.maximum(peak_demands, (is_sampled @ chunk).max(axis=1))
+
+    simulation_sample_sizes = np.repeat(sample_sizes, number_of_simulations)
+    return pd.DataFrame(
+        {
+            "sample_size": simulation_sample_sizes,
+            "simulation": np.tile(np.arange(number_of_simulations), len(sample_sizes)),
+            "relative_peak_demand": peak_demands / simulation_sample_sizes,
+        },
+    )
+
+
+def get_percentile_bands(
+    simulations: pd.DataFrame, percentiles: Iterable[int] = (5, 50, 95),
+) -> pd.DataFrame:
+    """Summarise simulated relative peak demands by sample size.
+
+    Args:
+        simulations (pd.DataFrame): Output of simulate_relative_peak_demands
+        percentiles (Iterable[int], optional): Percentiles of each band. Defaults to
+            (5, 50, 95).
+
+    Returns:
+        pd.DataFrame: Mean & percentiles of relative peak demand by sample size
+    """
+    grouped = simulations.groupby("sample_size")["relative_peak_demand"]
+    bands = {
+        f"percentile_{percentile}": grouped.quantile(percentile / 100)
+        for percentile in percentiles
+    }
+    return pd.DataFrame({"mean": grouped.mean(), **bands}).reset_index()
+
+
 with Flow("Calculate Relative Peak Demand for Sample Size N") as flow:
 
     dirpath = Parameter("dirpath")
@@ -75,7 +192,7 @@ with Flow("Calculate Relative Peak Demand for Sample Size N") as flow:
     random_seed = Parameter("random_seed")
 
     sample_ids = _get_random_sample(unique_ids, size=sample_size, seed=random_seed)
-    sample = _extract_sample(elec_demands, on="id", ids=sample_ids)
+    sample = _extract_sample(elec_demands, on="id", ids=sample_ids, dirpath=dirpath)
     relative_peak_demands = _calculate_relative_peak_demand(
         sample, group_on="datetime", target="demand", size=sample_size,
     )
@@ -83,40 +200,24 @@ with Flow("Calculate Relative Peak Demand for Sample Size N") as flow:
 
 if __name__ == "__main__":
 
-    data_dir = str(PROCESSED_DIR / "SM_electricity")
+    demands, _, _ = read_demand_matrix(PROCESSED_DIR / "SM_electricity_matrix")
     sample_sizes = (1, 2, 10, 20, 50, 100, 200, 500, 1000, 2000)
     number_of_simulations = 20
 
-    simulation_results = defaultdict(dict)
-
-    for sample_sz in tqdm(sample_sizes):
-
-        sample_size_results = defaultdict(list)
-        for simulation_number in trange(number_of_simulations):
-
-            state = flow.run(
-                parameters=dict(
-                    dirpath=data_dir,
-                    sample_size=sample_sz,
-                    random_seed=simulation_number,
-                ),
-            )
-            simulation_result = state.result[relative_peak_demands].result
-            sample_size_results[simulation_number] = simulation_result
-
-        simulation_results[sample_sz] = sample_size_results
-
-    filepath_to_simulation_results = str(ROUGHWORK_DIR / "sim_results.json")
-    with open(filepath_to_simulation_results, "w") as file:
-        json.dump(simulation_result, file)
-
-    results_extracted_from_defaultdict = {
-        key: list(value_list.values()) for key, value_list in simulation_results.items()
-    }
-    clean_demands = pd.DataFrame(results_extracted_from_defaultdict).T
+    simulation_results = simulate_relative_peak_demands(
+        demands, sample_sizes, number_of_simulations,
+    )
+    simulation_results.to_json(ROUGHWORK_DIR / "sim_results.json", orient="records")
+    get_percentile_bands(simulation_results).to_csv(
+        ROUGHWORK_DIR / "elec_diversity_curve.csv", index=False,
+    )
 
-    sns.relplot(data=clean_demands).set(
+    grid = sns.relplot(
+        data=simulation_results, x="sample_size", y="relative_peak_demand",
+    )
+    grid.set(
         title="CRU Smart Meter Electricity Demand",
         ylabel="Peak Demand / Sample Size [kWh/HH]",
         xlabel="Sample Size [HH]",
-    ).savefig(ROUGHWORK_DIR / "elec_diversity_curve")
+    )
+    grid.savefig(ROUGHWORK_DIR / "elec_diversity_curve")
@@ -1,5 +1,9 @@
 from pathlib import Path
 from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import unquote
 
 import numpy as np
 import pandas as pd
@@ -13,9 +17,21 @@ from prefect.utilities.debug import raise_on_exception
 import drem.utilities.dask_dataframe_tasks as ddt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
 from drem.utilities.visualize import VisualizeMixin
 
 
+# Raw columns needed to create BER archetypes
+BER_COLUMNS: List[str] = [
+    "CountyName",
+    "Year_of_Construction",
+    "DeliveredEnergyMainSpace",
+    "DeliveredEnergyMainWater",
+    "DeliveredEnergySecondarySpace",
+    "DeliveredEnergySupplementaryWater",
+]
+
+
 @task
 def _bin_year_of_construction_as_in_census(
     ber: pd.DataFrame, target: str, result: str,
@@ -56,18 +72,60 @@ def _bin_year_of_construction_as_in_census(
     return ber
 
 
+@task
+def _get_filters_for_partitions_containing_substring(
+    dirpath: Path, partition_col: str, substring: str,
+) -> Optional[List[List[Tuple[str, str, str]]]]:
+    """Get parquet filters selecting Hive partitions whose value contains substring.
+
+    Example:
+        A dataset partitioned into 'CountyName=Co. Cork' & 'CountyName=Dublin 1'
+        directories with substring 'Dublin' returns [[("CountyName", "==", "Dublin 1")]]
+
+    Args:
+        dirpath (Path): Path to Hive-partitioned parquet dataset
+        partition_col (str): Name of partition column
+        substring (str): Substring to be queried in partition values
+
+    Returns:
+        Optional[List[List[Tuple[str, str, str]]]]: Filters in disjunctive normal form
+            or None if the dataset is not partitioned on partition_col
+    """
+    partition_values = [
+        unquote(partition.name.split("=", 1)[1])
+        for partition in Path(dirpath).glob(f"{partition_col}=*")
+    ]
+    if not partition_values:
+        return None
+
+    return [
+        [(partition_col, "==", partition_value)]
+        for partition_value in sorted(partition_values)
+        if substring in partition_value
+    ]
+
+
 with Flow("Cleaning the BER Data...") as flow:
 
     ber_fpath = Parameter("ber_fpath")
 
-    raw_ber = ddt.read_parquet(ber_fpath)
+    dublin_partitions = _get_filters_for_partitions_containing_substring(
+        ber_fpath, partition_col="CountyName", substring="Dublin",
+    )
+    raw_ber = ddt.read_parquet(
+        ber_fpath, columns=BER_COLUMNS, filters=dublin_partitions,
+    )
 
     get_dublin_rows = pdt.get_rows_where_column_contains_substring(
         raw_ber, target="CountyName", substring="Dublin",
     )
     raw_dublin_ber = ddt.compute(get_dublin_rows)
 
-    rename_postcodes = pdt.rename(raw_dublin_ber, columns={"CountyName": "postcodes"})
+    # Partition columns are read as categoricals of every partition value
+    decategorize_postcodes = pdt.astype(raw_dublin_ber, dtype={"CountyName": "object"})
+    rename_postcodes = pdt.rename(
+        decategorize_postcodes, columns={"CountyName": "postcodes"},
+    )
     bin_year_built_into_census_categories = _bin_year_of_construction_as_in_census(
         rename_postcodes, target="Year_of_Construction", result="cso_period_built",
     )
@@ -101,7 +159,9 @@ class TransformBERPublicsearch(Task, VisualizeMixin):
             state = self.flow.run(ber_fpath=input_filepath)
 
         result = state.result[bin_year_built_into_census_categories].result
-        result.to_parquet(output_filepath)
+        write_parquet(
+            result, output_filepath, sort_by=["postcodes", "cso_period_built"],
+        )
 
 
 transform_ber_publicsearch = TransformBERPublicsearch()
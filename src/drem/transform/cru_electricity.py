@@ -1,9 +1,12 @@
 from pathlib import Path
 from typing import Any
 from typing import Iterable
+from typing import Optional
 from typing import Tuple
 
 import dask.dataframe as dd
+import numpy as np
+import pandas as pd
 
 from prefect import Flow
 from prefect import Task
@@ -12,9 +15,57 @@ from prefect.engine.state import State
 
 import drem
 
+from drem.load.parquet import write_dask_parquet
+from drem.utilities.demand_matrix import write_demand_matrix
+from drem.utilities.parquet_index import write_parquet_index
+
+
+# timeid is a 5 digit code 'DDDHH' where DDD is the day (day 1 is 2009-01-01) &
+# HH the half hour; the trial ran from day 195 for 536 days & the day the clocks go
+# back has 50 half hours, so its ids 49 & 50 map onto 00:30 & 01:00 of the next day
+FIRST_DAY = 195
+N_DAYS = 536
+MAX_HALFHOURLY_ID = 50
+
+
+def _create_datetime_lookup() -> np.ndarray:
+
+    days = np.arange(FIRST_DAY, FIRST_DAY + N_DAYS)
+    halfhourly_ids = np.arange(MAX_HALFHOURLY_ID + 1)
+    return (
+        np.datetime64("2009-01-01", "ns")
+        + days[:, np.newaxis] * np.timedelta64(1, "D")
+        + halfhourly_ids[np.newaxis, :] * np.timedelta64(30, "m")
+    )
+
+
+# Datetime of each day (row) & half hour (column)
+DATETIME_LOOKUP = _create_datetime_lookup()
+
+
+def _get_datetimes_from_lookup(df: pd.DataFrame) -> pd.DataFrame:
+
+    day_index = df["day"].to_numpy().astype("int64") - FIRST_DAY
+    halfhourly_ids = df["halfhourly_id"].to_numpy().astype("int64")
+    is_in_trial = (
+        (day_index >= 0)
+        & (day_index < N_DAYS)
+        & (halfhourly_ids >= 0)
+        & (halfhourly_ids <= MAX_HALFHOURLY_ID)
+    )
+
+    datetimes = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+    datetimes[is_in_trial] = DATETIME_LOOKUP[
+        day_index[is_in_trial], halfhourly_ids[is_in_trial]
+    ]
+
+    return df.drop(columns=["day", "halfhourly_id"]).assign(datetime=datetimes)
+
 
 @task
-def _read_txt_files(dirpath: Path) -> Iterable[dd.DataFrame]:
+def _read_txt_files(
+    dirpath: Path, timeid_dtype: str = "string",
+) -> Iterable[dd.DataFrame]:
 
     return [
         dd.read_csv(
@@ -22,7 +73,7 @@ def _read_txt_files(dirpath: Path) -> Iterable[dd.DataFrame]:
             sep=" ",
             header=None,
             names=["id", "timeid", "demand"],
-            dtype={"id": "int16", "timeid": "string", "demand": "float32"},
+            dtype={"id": "int16", "timeid": timeid_dtype, "demand": "float32"},
         )
         for filepath in dirpath.glob("*.txt")
     ]
@@ -43,6 +94,24 @@ def _slice_timeid_column(ddf: dd.DataFrame) -> dd.DataFrame:
     return ddf.drop(columns=["timeid"])
 
 
+@task
+def _split_timeid_column(ddf: dd.DataFrame) -> dd.DataFrame:
+
+    ddf["day"] = (ddf["timeid"] // 100).astype("int16")
+    ddf["halfhourly_id"] = (ddf["timeid"] % 100).astype("int8")
+
+    return ddf.drop(columns=["timeid"])
+
+
+@task
+def _lookup_dayid_datetime(ddf: dd.DataFrame) -> dd.DataFrame:
+
+    meta = ddf.dtypes.drop(["day", "halfhourly_id"]).to_dict()
+    meta["datetime"] = np.dtype("datetime64[ns]")
+
+    return ddf.map_partitions(_get_datetimes_from_lookup, meta=meta)
+
+
 @task
 def _convert_dayid_to_datetime(ddf: dd.DataFrame) -> dd.DataFrame:
 
@@ -53,10 +122,29 @@ def _convert_dayid_to_datetime(ddf: dd.DataFrame) -> dd.DataFrame:
     return ddf.drop(columns=["day", "halfhourly_id"])
 
 
+def _sort_by_id_and_datetime(df: pd.DataFrame) -> pd.DataFrame:
+
+    return df.sort_values(["id", "datetime"], kind="mergesort")
+
+
 @task
-def _to_parquet(ddf: dd.DataFrame, savepath: Path):
+def _to_parquet(ddf: dd.DataFrame, savepath: Path) -> Path:
 
-    return ddf.to_parquet(savepath)
+    # Sort by meter so each meter is stored in only one or two row groups which the
+    # index lets samples of meters read without scanning every file
+    ddf_sorted_by_id = (
+        ddf.set_index("id").reset_index().map_partitions(_sort_by_id_and_datetime)
+    )
+    write_dask_parquet(ddf_sorted_by_id, savepath, write_index=False)
+    write_parquet_index(savepath, on="id")
+
+    return savepath
+
+
+@task
+def _to_demand_matrix(dirpath: Path, savedirpath: Path) -> None:
+
+    write_demand_matrix(dirpath, savedirpath, datetimes=np.unique(DATETIME_LOOKUP))
 
 
 class CleanCRUElecDemand(Task):
@@ -71,23 +159,42 @@ class CleanCRUElecDemand(Task):
     id      datetime                demand
     1392    2009-07-15 01:30:00     0.14
 
+    The saved dataset is sorted by meter id & indexed by
+    drem.utilities.parquet_index.write_parquet_index so samples of meters can be
+    read via drem.utilities.parquet_index.read_parquet_by_index.  It can also be
+    saved as a dense meters by half hours matrix, see drem.utilities.demand_matrix.
+
     Args:
         Task (prefect.Task): see https://docs.prefect.io/core/concepts/tasks.html
     """
 
     def __init__(
-        self, dirpath: Path, savepath: Path, **kwargs: Any,
+        self,
+        dirpath: Path,
+        savepath: Path,
+        integer_timeid: bool = True,
+        matrix_dirpath: Optional[Path] = None,
+        **kwargs: Any,
     ):
         """Initialise class with paths and flow executor.
 
         Args:
             dirpath (Path): Path to directory containing raw data files
             savepath (Path): Path where clean data will be saved
+            integer_timeid (bool, optional): Read timeid as an integer, split it into
+                day & half hour via integer division & look up their datetimes in
+                DATETIME_LOOKUP rather than slicing strings & adding timedeltas row
+                by row. Defaults to True.
+            matrix_dirpath (Optional[Path], optional): Path to directory where the
+                clean data will also be saved as a meters by half hours matrix.
+                Defaults to None which skips the matrix.
             **kwargs (Any): Keyword arguments that will be passed to the Task
                 constructor Task, see https://docs.prefect.io/api/latest/core/task.html
         """
         self.dirpath = dirpath
         self.savepath = savepath
+        self.integer_timeid = integer_timeid
+        self.matrix_dirpath = matrix_dirpath
 
         super().__init__(name="Clean CRU Electricity Demands", **kwargs)
 
@@ -99,11 +206,19 @@ class CleanCRUElecDemand(Task):
         """
         with Flow("Transform CRU Smart Meter Data") as fw:
 
-            ddfs = _read_txt_files(self.dirpath)
-            demand_raw = _concat_ddfs(ddfs)
-            demand_with_times = _slice_timeid_column(demand_raw)
-            demand_with_datetimes = _convert_dayid_to_datetime(demand_with_times)
-            _to_parquet(demand_with_datetimes, self.savepath)
+            if self.integer_timeid:
+                ddfs = _read_txt_files(self.dirpath, timeid_dtype="int32")
+                demand_raw = _concat_ddfs(ddfs)
+                demand_with_times = _split_timeid_column(demand_raw)
+                demand_with_datetimes = _lookup_dayid_datetime(demand_with_times)
+            else:
+                ddfs = _read_txt_files(self.dirpath)
+                demand_raw = _concat_ddfs(ddfs)
+                demand_with_times = _slice_timeid_column(demand_raw)
+                demand_with_datetimes = _convert_dayid_to_datetime(demand_with_times)
+            clean_dirpath = _to_parquet(demand_with_datetimes, self.savepath)
+            if self.matrix_dirpath is not None:
+                _to_demand_matrix(clean_dirpath, self.matrix_dirpath)
 
         return fw, demand_with_datetimes
 
@@ -123,5 +238,6 @@ if __name__ == "__main__":
     clean_cru_elec_demand = CleanCRUElecDemand(
         dirpath=drem.filepaths.RAW_DIR / "SM_electricity",
         savepath=drem.filepaths.PROCESSED_DIR / "SM_electricity",
+        matrix_dirpath=drem.filepaths.PROCESSED_DIR / "SM_electricity_matrix",
     )
     clean_cru_elec_demand.run()
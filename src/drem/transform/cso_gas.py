@@ -2,35 +2,53 @@ import re
 
 from pathlib import Path
 from typing import Any
+from typing import Dict
+from typing import List
 
+import geopandas as gpd
 import pandas as pd
 
 from prefect import Flow
 from prefect import Parameter
 from prefect import Task
 from prefect import task
+from prefect import unmapped
+from prefect.engine.executors import LocalDaskExecutor
 
 import drem.utilities.geopandas_tasks as gpdt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_partitioned_parquet
+from drem.utilities.html_tables import read_html_tables
 from drem.utilities.visualize import VisualizeMixin
 
 
+# Locate tables by title rather than by position so other CSO releases can be read
+GAS_TABLE_TITLES = {
+    "non_resid_annual_gas_by_county": (
+        "Networked Gas Consumption by County.* for Non-Residential Sector"
+    ),
+    "resid_annual_gas_by_county": (
+        "Networked Gas Consumption by County.* for Residential Sector"
+    ),
+    "non_resid_annual_gas_by_pcode": (
+        "Networked Gas Consumption by Dublin Postal District for Non-Residential"
+    ),
+    "resid_annual_gas_by_pcode": (
+        "Networked Gas Consumption by Dublin Postal District for Residential"
+    ),
+}
+
+
 standardise_postcode_names = pdt.ReplaceSubstringInColumn(
     name="Delete all county names starting with a 0 followed by a number",
 )
 standardise_co_dublin_string = pdt.Replace(
     name="Replace 'Dublin County' with 'Co. Dublin'",
 )
-join_postcodes_to_counties = pdt.Concat(
-    name="Join County-level Data to Postcode-level Data",
-)
 link_postcode_demands_to_boiler_totals = pdt.Merge(
     name="Link Postcode Demands to Dwelling Boiler Totals",
 )
-link_postcode_demands_to_postcode_geometries = pdt.Merge(
-    name="Link Postcode Demands to Postcode Geometries",
-)
 calc_gas_boiler_total_for_each_postcode = pdt.GroupbySum(
     name="Calculate the total number of boilers in each Postcode",
 )
@@ -46,6 +64,18 @@ link_gas_boiler_totals_to_boiler_totals = pdt.Merge(
 )
 
 
+@task(name="Read CSO Gas tables")
+def _read_gas_tables(filepath: Path) -> Dict[str, pd.DataFrame]:
+
+    return read_html_tables(filepath, titles=GAS_TABLE_TITLES)
+
+
+@task(name="Get CSO Gas table")
+def _get_gas_table(tables: Dict[str, pd.DataFrame], name: str) -> pd.DataFrame:
+
+    return tables[name]
+
+
 @task(name="Replace column names with values from the row")
 def _replace_column_names_with_third_row(df: pd.DataFrame) -> pd.DataFrame:
 
@@ -57,60 +87,143 @@ def _replace_column_names_with_third_row(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop(index=[0, 1, 2]).reset_index(drop=True)
 
 
-with Flow("Transform CSO Residential Network Gas Data") as flow:
+@task(name="Join County-level Data to Postcode-level Data")
+def _join_postcodes_to_counties(
+    postcodes: pd.DataFrame, counties: pd.DataFrame,
+) -> pd.DataFrame:
 
-    fpath = Parameter("fpath")
-    postcode_geometries_fpath = Parameter("postcode_geometries_fpath")
-    sa_boilers_fpath = Parameter("sa_boilers_fpath")
+    return pd.concat([postcodes, counties], axis="index", ignore_index=True)
 
-    raw_gas_tables = pdt.read_html(fpath)
-    postcode_geometries = gpdt.read_parquet(postcode_geometries_fpath)
-    sa_boilers = gpdt.read_parquet(sa_boilers_fpath)
-
-    # Residential Postcode Annual Gas Consumption
-    # -------------------------------------------
-    table_number_of_resid_annual_gas_by_pcode = 11
-    raw_resid_annual_gas_by_pcode = raw_gas_tables[
-        table_number_of_resid_annual_gas_by_pcode
-    ]
-    resid_annual_gas_by_pcode_col_names_replaced = _replace_column_names_with_third_row(
-        raw_resid_annual_gas_by_pcode,
-    )
-    resid_annual_gas_by_pcode_standardised = standardise_postcode_names(
-        resid_annual_gas_by_pcode_col_names_replaced,
-        target="Dublin Postal District",
-        result="postcodes",
-        pat=r"""     # Replace all substrings
+
+@task(name="Melt annual gas columns into one row per postcode & year")
+def _melt_years(df: pd.DataFrame, release: int) -> pd.DataFrame:
+
+    years = [column for column in df.columns if re.fullmatch(r"\d{4}", str(column))]
+    melted = df.melt(
+        id_vars="postcodes", value_vars=years, var_name="year", value_name="gas_gwh",
+    )
+    return melted.assign(
+        year=melted["year"].astype("int16"),
+        # Areas without any consumption are recorded as '_' or '–'
+        gas_gwh=pd.to_numeric(melted["gas_gwh"], errors="coerce"),
+        release=release,
+    )
+
+
+@task(name="Combine annual gas from all CSO releases")
+def _combine_releases(annual_gas: List[pd.DataFrame]) -> pd.DataFrame:
+    """Combine annual gas from each CSO release keeping only the latest figures.
+
+    Each CSO release republishes all previous years so a year's figures are taken
+    from the most recent release (which may include revisions).
+
+    Args:
+        annual_gas (List[pd.DataFrame]): Annual gas of each release
+
+    Returns:
+        pd.DataFrame: Annual gas with one row per postcode & year
+    """
+    return (
+        pd.concat(annual_gas, ignore_index=True)
+        .sort_values("release", kind="mergesort")
+        .drop_duplicates(subset=["postcodes", "year"], keep="last")
+        .drop(columns="release")
+        .reset_index(drop=True)
+    )
+
+
+@task(name="Link Postcode Demands to Postcode Geometries")
+def _link_demands_to_postcode_geometries(
+    postcode_geometries: gpd.GeoDataFrame, annual_gas: pd.DataFrame,
+) -> gpd.GeoDataFrame:
+    """Link annual gas to every postcode geometry in every year.
+
+    Postcodes without gas data are kept in each year with missing demands so that
+    year stays an integer and no postcode is dropped when partitioning by year.
+
+    Args:
+        postcode_geometries (gpd.GeoDataFrame): Postcode geometries
+        annual_gas (pd.DataFrame): Annual gas with one row per postcode & year
+
+    Returns:
+        gpd.GeoDataFrame: Annual gas with one row per postcode geometry & year
+    """
+    years = annual_gas[["year"]].drop_duplicates()
+    postcode_years = (
+        postcode_geometries.assign(key=0)
+        .merge(years.assign(key=0), on="key")
+        .drop(columns="key")
+    )
+    return postcode_years.merge(annual_gas, how="left", on=["postcodes", "year"])
+
+
+def _standardise_annual_gas_by_postcode(tables: Task, name: str) -> Task:
+
+    raw_annual_gas_by_pcode = _get_gas_table.map(tables, name=unmapped(name))
+    annual_gas_by_pcode_col_names_replaced = _replace_column_names_with_third_row.map(
+        raw_annual_gas_by_pcode,
+    )
+    return standardise_postcode_names.map(
+        annual_gas_by_pcode_col_names_replaced,
+        target=unmapped("Dublin Postal District"),
+        result=unmapped("postcodes"),
+        pat=unmapped(
+            r"""     # Replace all substrings
             0       # starting with 0
             (?=\d)  # followed by a number
             """,
-        repl="",  # with an empty string
-        flags=re.VERBOSE,
-    )
-
-    # Residential County Annual Gas Consumption
-    # -----------------------------------------
-    table_number_of_resid_annual_gas_by_county = 9
-    raw_resid_annual_gas_by_county = raw_gas_tables[
-        table_number_of_resid_annual_gas_by_county
-    ]
-    resid_annual_gas_by_county_col_names_replaced = _replace_column_names_with_third_row(
-        raw_resid_annual_gas_by_county,
-    )
-    resid_annual_gas_by_county_standardised = standardise_co_dublin_string(
-        resid_annual_gas_by_county_col_names_replaced,
-        target="County",
-        result="postcodes",
-        to_replace="Dublin County",
-        value="Co. Dublin",
-    )
-    resid_annual_gas_by_county_and_pcode = join_postcodes_to_counties(
-        objs=[
-            resid_annual_gas_by_pcode_standardised,
-            resid_annual_gas_by_county_standardised,
-        ],
-        axis="index",
+        ),
+        repl=unmapped(""),  # with an empty string
+        flags=unmapped(re.VERBOSE),
+    )
+
+
+def _standardise_annual_gas_by_county(tables: Task, name: str) -> Task:
+
+    raw_annual_gas_by_county = _get_gas_table.map(tables, name=unmapped(name))
+    annual_gas_by_county_col_names_replaced = _replace_column_names_with_third_row.map(
+        raw_annual_gas_by_county,
+    )
+    return standardise_co_dublin_string.map(
+        annual_gas_by_county_col_names_replaced,
+        target=unmapped("County"),
+        result=unmapped("postcodes"),
+        to_replace=unmapped("Dublin County"),
+        value=unmapped("Co. Dublin"),
+    )
+
+
+with Flow("Transform CSO Residential Network Gas Data") as flow:
+
+    fpaths = Parameter("fpaths")
+    releases = Parameter("releases")
+    postcode_geometries_fpath = Parameter("postcode_geometries_fpath")
+    sa_boilers_fpath = Parameter("sa_boilers_fpath")
+
+    # Each CSO release is read & cleaned in parallel as a mapped task
+    raw_gas_tables = _read_gas_tables.map(fpaths)
+    postcode_geometries = gpdt.read_parquet(
+        postcode_geometries_fpath, columns=["postcodes", "geometry"],
+    )
+    sa_boilers = pdt.read_parquet(
+        sa_boilers_fpath, columns=["postcodes", "boiler_type", "total"],
+    )
+
+    # Residential Annual Gas Consumption
+    # ----------------------------------
+    resid_annual_gas_by_pcode_standardised = _standardise_annual_gas_by_postcode(
+        raw_gas_tables, name="resid_annual_gas_by_pcode",
     )
+    resid_annual_gas_by_county_standardised = _standardise_annual_gas_by_county(
+        raw_gas_tables, name="resid_annual_gas_by_county",
+    )
+    resid_annual_gas_by_county_and_pcode = _join_postcodes_to_counties.map(
+        resid_annual_gas_by_pcode_standardised, resid_annual_gas_by_county_standardised,
+    )
+    resid_annual_gas_by_year = _melt_years.map(
+        resid_annual_gas_by_county_and_pcode, releases,
+    )
+    resid_annual_gas = _combine_releases(resid_annual_gas_by_year)
 
     # Residential Postcode Gas Boiler Statistics
     # ------------------------------------------
@@ -136,61 +249,33 @@ with Flow("Transform CSO Residential Network Gas Data") as flow:
         gas_boiler_totals_renamed, boiler_totals_renamed, on=["postcodes"],
     )
     resid_gas_with_boiler_totals = link_postcode_demands_to_boiler_totals(
-        resid_annual_gas_by_county_and_pcode, boiler_totals, how="left", on="postcodes",
+        resid_annual_gas, boiler_totals, how="left", on="postcodes",
     )
 
     # Non-residential Annual Gas Consumption
     # --------------------------------------
-    table_number_of_non_resid_annual_gas_by_pcode = 10
-    raw_non_resid_annual_gas_by_pcode = raw_gas_tables[
-        table_number_of_non_resid_annual_gas_by_pcode
-    ]
-    non_resid_annual_gas_by_pcode_col_names_replaced = _replace_column_names_with_third_row(
-        raw_non_resid_annual_gas_by_pcode,
-    )
-    non_resid_annual_gas_by_pcode_standardised = standardise_postcode_names(
-        non_resid_annual_gas_by_pcode_col_names_replaced,
-        target="Dublin Postal District",
-        result="postcodes",
-        pat=r"""     # Replace all substrings
-            0       # starting with 0
-            (?=\d)  # followed by a number
-            """,
-        repl="",  # with an empty string
-        flags=re.VERBOSE,
-    )
-
-    # Non-residential County Annual Gas Consumption
-    # ---------------------------------------------
-    table_number_of_non_resid_annual_gas_by_county = 8
-    raw_non_resid_annual_gas_by_county = raw_gas_tables[
-        table_number_of_resid_annual_gas_by_county
-    ]
-    non_resid_annual_gas_by_county_col_names_replaced = _replace_column_names_with_third_row(
-        raw_non_resid_annual_gas_by_county,
-    )
-    non_resid_annual_gas_by_county_standardised = standardise_co_dublin_string(
-        non_resid_annual_gas_by_county_col_names_replaced,
-        target="County",
-        result="postcodes",
-        to_replace="Dublin County",
-        value="Co. Dublin",
-    )
-    non_resid_annual_gas_by_county_and_pcode = join_postcodes_to_counties(
-        objs=[
-            non_resid_annual_gas_by_pcode_standardised,
-            non_resid_annual_gas_by_county_standardised,
-        ],
-        axis="index",
+    non_resid_annual_gas_by_pcode_standardised = _standardise_annual_gas_by_postcode(
+        raw_gas_tables, name="non_resid_annual_gas_by_pcode",
+    )
+    non_resid_annual_gas_by_county_standardised = _standardise_annual_gas_by_county(
+        raw_gas_tables, name="non_resid_annual_gas_by_county",
+    )
+    non_resid_annual_gas_by_county_and_pcode = _join_postcodes_to_counties.map(
+        non_resid_annual_gas_by_pcode_standardised,
+        non_resid_annual_gas_by_county_standardised,
     )
+    non_resid_annual_gas_by_year = _melt_years.map(
+        non_resid_annual_gas_by_county_and_pcode, releases,
+    )
+    non_resid_annual_gas = _combine_releases(non_resid_annual_gas_by_year)
 
     # Postcode Geometries
     # -------------------
-    resid_gas_with_postcode_geometries = link_postcode_demands_to_postcode_geometries(
-        postcode_geometries, resid_gas_with_boiler_totals, how="left",
+    resid_gas_with_postcode_geometries = _link_demands_to_postcode_geometries(
+        postcode_geometries, resid_gas_with_boiler_totals,
     )
-    non_resid_gas_with_postcode_geometries = link_postcode_demands_to_postcode_geometries(
-        postcode_geometries, non_resid_annual_gas_by_county_and_pcode, how="left",
+    non_resid_gas_with_postcode_geometries = _link_demands_to_postcode_geometries(
+        postcode_geometries, non_resid_annual_gas,
     )
 
 
@@ -213,7 +298,7 @@ class TransformCSOGas(Task, VisualizeMixin):
 
     def run(
         self,
-        input_filepath: Path,
+        input_filepaths: Dict[int, Path],
         postcodes_filepath: Path,
         small_area_boilers_filepath: Path,
         output_filepath_residential_gas: Path,
@@ -221,8 +306,13 @@ class TransformCSOGas(Task, VisualizeMixin):
     ) -> Path:
         """Run module Prefect flow.
 
+        Each CSO release is cleaned by parallel mapped tasks before being combined
+        into one time series, which is only then linked to boiler totals & postcode
+        geometries.  The results are saved as parquet datasets partitioned by year.
+
         Args:
-            input_filepath (Path): Path to CSO Gas html file
+            input_filepaths (Dict[int, Path]): Maps the year of each CSO release to
+                the path to its Gas html file
             postcodes_filepath (Path): Dublin Postcode Geometries Filepath
             small_area_boilers_filepath (Path): Path to Small Area Boilers
             output_filepath_residential_gas (Path): Path to annual residential gas
@@ -231,16 +321,28 @@ class TransformCSOGas(Task, VisualizeMixin):
                 gas demand
         """
         state = self.flow.run(
-            fpath=input_filepath,
+            fpaths=list(input_filepaths.values()),
+            releases=list(input_filepaths.keys()),
             postcode_geometries_fpath=postcodes_filepath,
             sa_boilers_fpath=small_area_boilers_filepath,
+            executor=LocalDaskExecutor(scheduler="threads"),
         )
 
         residential = state.result[resid_gas_with_postcode_geometries].result
         non_residential = state.result[non_resid_gas_with_postcode_geometries].result
 
-        residential.to_parquet(output_filepath_residential_gas)
-        non_residential.to_parquet(output_filepath_non_residential_gas)
+        write_partitioned_parquet(
+            residential,
+            output_filepath_residential_gas,
+            partition_col="year",
+            sort_by=["postcodes"],
+        )
+        write_partitioned_parquet(
+            non_residential,
+            output_filepath_non_residential_gas,
+            partition_col="year",
+            sort_by=["postcodes"],
+        )
 
 
 transform_cso_gas = TransformCSOGas()
@@ -10,6 +10,8 @@ from prefect import Task
 import drem.utilities.geopandas_tasks as gpdt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
+from drem.utilities.crs import ITM
 from drem.utilities.visualize import VisualizeMixin
 
 
@@ -18,9 +20,9 @@ with Flow("Clean Dublin Postcodes") as flow:
     fpath = Parameter("fpath")
 
     raw_postcodes = gpdt.read_parquet(fpath)
-    postcodes_with_lat_long_crs = gpdt.to_crs(raw_postcodes, epsg=4326)
+    postcodes_with_itm_crs = gpdt.to_crs(raw_postcodes, crs=ITM)
     postcodes_matched_to_co_dublin = pdt.replace_substring_in_column(
-        postcodes_with_lat_long_crs,
+        postcodes_with_itm_crs,
         target="Yelp_postc",
         result="postcodes",
         pat="""
@@ -66,7 +68,7 @@ class TransformDublinPostcodes(Task, VisualizeMixin):
         """
         state = self.flow.run(fpath=input_filepath)
         result = state.result[clean_postcodes].result
-        result.to_parquet(output_filepath)
+        write_parquet(result, output_filepath, sort_by=["postcodes"])
 
 
 transform_dublin_postcodes = TransformDublinPostcodes()
@@ -1,7 +1,11 @@
 """Merge MPRNs and GPRNs in the Monitoring & Reporting (m_and_r) data set.
 
-- Standardise addresses using `pypostal`.
-- Deduplicate standardised addresses to eliminate typos using `string_grouper`
+- Standardise addresses using `pypostal`, once per distinct address, in parallel
+  & memoized on disk in INTERIM_DIR/address_cache so reruns only process new ones.
+- Deduplicate standardised addresses to eliminate typos, comparing only addresses
+  that share a leading token in chunks of bounded size
+- Link M&R buildings to Valuation Office properties via an inverted index of their
+  parsed address components
 
 Note: This module is not included in the prefect pipeline or tested as this would
 require including libpostal in CI which would add a 2-3GB overhead...
@@ -18,10 +22,28 @@ from postal.expand import expand_address
 from postal.parser import parse_address
 from prefect import Flow
 from prefect import task
-from string_grouper import group_similar_strings
 
+from drem.filepaths import INTERIM_DIR
 from drem.filepaths import PROCESSED_DIR
 from drem.filepaths import RAW_DIR
+from drem.load.parquet import write_parquet
+from drem.utilities.addresses import normalise_addresses
+from drem.utilities.dedupe import dedupe_strings
+from drem.utilities.dedupe import get_leading_token_ngrams
+from drem.utilities.link_addresses import link_addresses
+
+
+ADDRESS_CACHE_DIR = INTERIM_DIR / "address_cache"
+
+
+def _expand_first_address(address: str) -> str:
+
+    return expand_address(address)[0]
+
+
+def _parse_address(address: str) -> List[List[str]]:
+
+    return [list(pair) for pair in parse_address(address)]
 
 
 @task
@@ -47,8 +69,10 @@ def _standardise_addresses(
     addresses: pd.DataFrame, on_column: str, to_column: str,
 ) -> pd.DataFrame:
 
-    addresses[to_column] = addresses[on_column].apply(
-        lambda cell: expand_address(cell)[0],
+    addresses[to_column] = normalise_addresses(
+        addresses[on_column],
+        func=_expand_first_address,
+        cache_filepath=ADDRESS_CACHE_DIR / "expand_address.parquet",
     )
 
     return addresses
@@ -100,7 +124,9 @@ def _dedupe_column(df: pd.DataFrame, target: str, result: str) -> pd.DataFrame:
     """Deduplicate similar strings in column.
 
     Will group and rename similar strings such as 'leinster house' and 'lenister house'
-    under a single spelling.
+    under a single spelling.  Only strings sharing a character n-gram of their
+    leading token are compared so memory is bounded by the largest group of such
+    strings, while typos in the first word are still caught.
 
     Args:
         df (pd.DataFrame): DataFrame containing column to be deduped
@@ -110,7 +136,9 @@ def _dedupe_column(df: pd.DataFrame, target: str, result: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame containing deduped column
     """
-    df[result] = group_similar_strings(df[target], min_similarity=0.95)
+    df[result] = dedupe_strings(
+        df[target], blocks=get_leading_token_ngrams(df[target]), min_similarity=0.95,
+    )
 
     return df
 
@@ -138,7 +166,11 @@ def _parse_standardised_address(
     df: pd.DataFrame, target: str, result: str,
 ) -> pd.DataFrame:
 
-    df[result] = df.copy()[target].apply(lambda cell: parse_address(cell))
+    df[result] = normalise_addresses(
+        df[target],
+        func=_parse_address,
+        cache_filepath=ADDRESS_CACHE_DIR / "parse_address.parquet",
+    )
 
     return df
 
@@ -182,10 +214,22 @@ def _drop_columns(df: pd.DataFrame, column_names: List[str]) -> pd.DataFrame:
     return df.drop(columns=column_names)
 
 
+@task
+def _link_m_and_r_to_vo(m_and_r: pd.DataFrame, vo: pd.DataFrame) -> pd.DataFrame:
+
+    return link_addresses(
+        m_and_r,
+        vo.rename(columns={"index": "vo_id"}),
+        left_id="m_and_r_id",
+        right_id="vo_id",
+        address_column="standardised_address",
+    )
+
+
 @task
 def _save_to_parquet_file(df: pd.DataFrame, filepath: Path) -> None:
 
-    df.to_parquet(filepath)
+    write_parquet(df, filepath)
 
 
 with Flow("Merge MPRN and GPRN") as flow:
@@ -252,8 +296,12 @@ with Flow("Merge MPRN and GPRN") as flow:
         how="left",
         indicator=True,
     )
+    m_and_r_with_index_reset = _reset_index(m_and_r_raw)
+    m_and_r_with_id = _rename_columns(
+        m_and_r_with_index_reset, {"index": "m_and_r_id"},
+    )
     m_and_r_with_parsed_address = _parse_standardised_address(
-        m_and_r_raw, target="standardised_address", result="parsed_address",
+        m_and_r_with_id, target="standardised_address", result="parsed_address",
     )
     m_and_r_with_parsed_address_dict = _convert_parsed_address_to_dict(
         m_and_r_with_parsed_address,
@@ -287,3 +335,10 @@ with Flow("Merge MPRN and GPRN") as flow:
     _save_to_parquet_file(
         m_and_r_compatible_with_parquet, PROCESSED_DIR / "m_and_r.parquet",
     )
+
+    m_and_r_linked_to_vo = _link_m_and_r_to_vo(
+        m_and_r_with_parsed_address_expanded, vo_with_parsed_address_expanded,
+    )
+    _save_to_parquet_file(
+        m_and_r_linked_to_vo, PROCESSED_DIR / "m_and_r_vo_links.parquet",
+    )
@@ -7,6 +7,9 @@ import numpy as np
 from prefect import task
 from unidecode import unidecode
 
+from drem.load.parquet import write_parquet
+from drem.utilities.crs import ITM
+
 
 @icontract.ensure(lambda result: len(result["COUNTYNAME"].unique()) == 4)
 def extract_dublin_local_authorities(geometries: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
@@ -30,6 +33,9 @@ def extract_dublin_local_authorities(geometries: gpd.GeoDataFrame) -> gpd.GeoDat
 def transform_sa_geometries(input_filepath: Path, output_filepath: Path) -> None:
     """Transform Small Area geometries.
 
+    Geometries are saved in ITM so that downstream centroids & spatial joins are
+    computed in a projected coordinate reference system.
+
     Args:
         input_filepath (Path): Path to Raw Small Area Geometries Data
         output_filepath (Path): Path to Clean Small Area Geometries Data
@@ -37,9 +43,9 @@ def transform_sa_geometries(input_filepath: Path, output_filepath: Path) -> None
     sa_geometries = (
         gpd.read_parquet(input_filepath)
         .pipe(extract_dublin_local_authorities)
-        .to_crs("epsg:4326")
-        .loc[:, ["SMALL_AREA", "geometry"]]
-        .rename(columns={"SMALL_AREA": "small_area"})
+        .to_crs(ITM)
+        .loc[:, ["SMALL_AREA", "COUNTYNAME", "geometry"]]
+        .rename(columns={"SMALL_AREA": "small_area", "COUNTYNAME": "local_authority"})
     )
 
-    sa_geometries.to_parquet(output_filepath)
+    write_parquet(sa_geometries, output_filepath, sort_by=["small_area"])
@@ -3,9 +3,9 @@ from typing import Any
 from typing import Dict
 from typing import Iterable
 from typing import List
-from typing import Union
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 
 from icontract import require
@@ -18,86 +18,172 @@ from prefect.utilities.debug import raise_on_exception
 import drem.utilities.geopandas_tasks as gpdt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
 from drem.utilities.visualize import VisualizeMixin
 
 
+YEAR_BUILT_TABLE = "Permanent private households by year built "
+BOILER_TABLE = "Permanent private households by central heating "
+
+
 @task
-def _extract_rows_from_glossary(
-    glossary: pd.DataFrame, target: str, table_name: str,
-) -> pd.DataFrame:
+def _extract_glossaries(
+    glossary: pd.DataFrame,
+    target: str,
+    table_names: Iterable[str],
+    column_name_index: str,
+    column_name_values: str,
+) -> Dict[str, Dict[str, str]]:
+    """Extract the glossary of each table in a single pass over the glossary.
 
-    non_empty_rows = glossary[glossary[target].notna()].reset_index()
+    Example:
+        {
+            "Permanent private households by year built ": {
+                "T6_2_PRE19H": "Pre 1919 (No. of households)",
+                ...
+            },
+            ...
+        }
 
-    # The relevant table rows always start one row above the table_name
-    start_of_table = (
-        non_empty_rows.query(f"`{target}` == '{table_name}'").index.item() - 1
-    )
-    next_non_empty_row: int = start_of_table + 2
-    start_index: int = non_empty_rows.iloc[start_of_table]["index"]
-    end_index: int = non_empty_rows.iloc[next_non_empty_row]["index"]
+    Args:
+        glossary (pd.DataFrame): Raw glossary
+        target (str): Name of the column containing table names
+        table_names (Iterable[str]): Names of tables to be extracted
+        column_name_index (str): Name of the column containing encoded column names
+        column_name_values (str): Name of the column containing column descriptions
 
-    return glossary.iloc[start_index:end_index].reset_index(drop=True)
+    Returns:
+        Dict[str, Dict[str, str]]: Maps each table name to its glossary
+    """
+    non_empty_rows = glossary.index[glossary[target].notna()]
+    table_name_positions = {
+        table_name: position
+        for position, table_name in enumerate(glossary.loc[non_empty_rows, target])
+    }
+
+    glossaries = {}
+    for table_name in table_names:
+        # The relevant table rows always start one row above the table_name
+        position = table_name_positions[table_name]
+        start_index = non_empty_rows[position - 1]
+        end_index = (
+            non_empty_rows[position + 1]
+            if position + 1 < len(non_empty_rows)
+            else len(glossary)
+        )
+        table = glossary.iloc[start_index:end_index]
+        glossaries[table_name] = dict(
+            zip(table[column_name_index], table[column_name_values]),
+        )
+
+    return glossaries
 
 
 @task
-def _convert_columns_to_dict(
-    extracted_table: pd.DataFrame, column_name_index: str, column_name_values: str,
-) -> Dict[str, str]:
-
-    return (
-        extracted_table[[column_name_index, column_name_values]]
-        .set_index(column_name_index)
-        .to_dict()[column_name_values]
-    )
+def _get_column_names_in_glossaries(
+    glossaries: Dict[str, Dict[str, str]], additional_columns: List[str],
+) -> List[str]:
+
+    column_names = additional_columns.copy()
+    for glossary in glossaries.values():
+        column_names += [name for name in glossary if name not in column_names]
+
+    return column_names
 
 
 @task
-@require(lambda statistics, glossary: set(glossary.keys()).issubset(statistics.columns))
 @require(
-    lambda statistics, additional_columns: set(additional_columns).issubset(
-        statistics.columns,
+    lambda statistics, glossaries: all(
+        set(glossary.keys()).issubset(statistics.columns)
+        for glossary in glossaries.values()
     ),
 )
-def _extract_column_names_via_glossary(
-    statistics: pd.DataFrame, glossary: Dict[str, str], additional_columns: List[str],
-) -> pd.DataFrame:
+def _decode_tables(
+    statistics: pd.DataFrame, glossaries: Dict[str, Dict[str, str]], id_column: str,
+) -> Dict[str, pd.DataFrame]:
+    """Decode & melt every table in a single pass over the statistics.
 
-    columns_to_extract = additional_columns + list(glossary.keys())
-    return statistics.loc[:, columns_to_extract]
+    Example:
+        Before:
+                  GEOGID  T6_2_PRE19H   T6_5_NCH   ...
+        SA2017_017001001           10          7   ...
 
+        After:
+        {
+            "Permanent private households by year built ":
+                     GEOGID                       variable   value
+            SA2017_017001001  Pre 1919 (No. of households)      10
+            ...
+            "Permanent private households by central heating ":
+                     GEOGID                       variable   value
+            SA2017_017001001            No central heating       7
+            ...
+        }
 
-@task
-def _rename_columns_via_glossary(
-    statistics: pd.DataFrame, glossary: Dict[str, str],
-) -> pd.DataFrame:
+    Args:
+        statistics (pd.DataFrame): Raw statistics with encoded column names
+        glossaries (Dict[str, Dict[str, str]]): Maps each table name to its glossary
+        id_column (str): Name of ID column
 
-    return statistics.rename(columns=glossary)
+    Returns:
+        Dict[str, pd.DataFrame]: Maps each table name to its tidy statistics
+    """
+    column_tables = {
+        column_name: table_name
+        for table_name, glossary in glossaries.items()
+        for column_name in glossary
+    }
+    column_descriptions = {
+        column_name: description
+        for glossary in glossaries.values()
+        for column_name, description in glossary.items()
+    }
 
+    melted = statistics.melt(id_vars=[id_column], value_vars=list(column_tables))
+    tables = melted["variable"].map(column_tables)
+    melted["variable"] = melted["variable"].map(column_descriptions).astype("category")
 
-@task
-def _melt_columns(df: pd.DataFrame, id_vars: List[str], **kwargs: Any) -> pd.DataFrame:
-    """Melt columns into rows.
+    return {
+        table_name: table.reset_index(drop=True).assign(
+            variable=lambda df: df["variable"].cat.remove_unused_categories(),
+        )
+        for table_name, table in melted.groupby(tables, sort=False)
+    }
 
-    Example:
-        Before:
-                  GEOGID  Pre 1919 (No. of households)   ...
-        SA2017_017001001                            10   ...
 
-        After:
-                 GEOGID                       variable   value
-        SA2017_017001001  Pre 1919 (No. of households)      10
-                                                ...        ...
+def _get_categories(values: pd.Series) -> pd.Series:
+
+    # object so string methods also apply to the empty categories of an all-NaN column
+    return pd.Series(values.astype("category").cat.categories, dtype=object)
+
+
+def _broadcast_categories(values: pd.Series, new_categories: pd.Series) -> pd.Series:
+    """Map each value to the new category at the position of its old category.
+
+    As the melted statistics repeat a few distinct labels across every small area,
+    string operations are run once per distinct label (category) & the results are
+    broadcast to every row via the categorical codes.
 
     Args:
-        df (pd.DataFrame): Data to be melted
-        id_vars (List[str]): Name of ID columns
-        **kwargs (Any): passed to
-            https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.melt.html
+        values (pd.Series): Values to be mapped
+        new_categories (pd.Series): New categories aligned with the categories of
+            values
 
     Returns:
-        pd.DataFrame: [description]
+        pd.Series: Categorical if values is categorical, otherwise object
     """
-    return df.melt(id_vars=id_vars, **kwargs)
+    old_codes = values.astype("category").cat.codes.to_numpy()
+    codes_of_new_categories, unique_new_categories = pd.factorize(new_categories)
+    # Missing values (code -1) stay missing & have no new category to index
+    is_not_missing = old_codes != -1
+    new_codes = np.full(len(old_codes), -1)
+    new_codes[is_not_missing] = codes_of_new_categories[old_codes[is_not_missing]]
+    broadcasted = pd.Categorical.from_codes(new_codes, unique_new_categories)
+
+    if pd.api.types.is_categorical_dtype(values):
+        return pd.Series(broadcasted, index=values.index)
+
+    return pd.Series(np.asarray(broadcasted, dtype=object), index=values.index)
 
 
 @task
@@ -109,9 +195,10 @@ def _split_column_in_two_on_substring(
     right_column_name: str,
 ) -> pd.DataFrame:
 
-    df[[left_column_name, right_column_name]] = df[target].str.split(
-        pat=pat, expand=True,
-    )
+    categories = _get_categories(df[target])
+    split_categories = categories.str.split(pat=pat, expand=True)
+    df[left_column_name] = _broadcast_categories(df[target], split_categories[0])
+    df[right_column_name] = _broadcast_categories(df[target], split_categories[1])
 
     return df
 
@@ -121,7 +208,10 @@ def _replace_substring_in_column(
     df: pd.DataFrame, target: str, result: str, pat: str, repl: str, **kwargs: Any,
 ) -> pd.DataFrame:
 
-    df[result] = df[target].str.replace(pat=pat, repl=repl, **kwargs)
+    categories = _get_categories(df[target])
+    df[result] = _broadcast_categories(
+        df[target], categories.str.replace(pat=pat, repl=repl, **kwargs),
+    )
 
     return df
 
@@ -131,32 +221,34 @@ def _strip_column(
     df: pd.DataFrame, target: str, result: str, **kwargs: Any,
 ) -> pd.DataFrame:
 
-    df[result] = df[target].str.strip(**kwargs)
+    categories = _get_categories(df[target])
+    df[result] = _broadcast_categories(df[target], categories.str.strip(**kwargs))
 
     return df
 
 
 @task
 def _pivot_table(
-    df: pd.DataFrame,
-    index: Iterable[str],
-    values: Iterable[str],
-    columns: Iterable[str],
-    **kwargs: Any,
+    df: pd.DataFrame, index: List[str], values: str, columns: str,
 ) -> pd.DataFrame:
+    """Reshape long data to wide, each value of columns becoming a column.
 
-    pivoted = df.pivot_table(
-        index=index, columns=columns, values=values, **kwargs,
-    ).reset_index()
-    pivoted.columns.name = None
-
-    return pivoted
+    Each index/columns pair is unique so the values are reshaped directly rather
+    than aggregated as in pandas.DataFrame.pivot_table.
 
+    Args:
+        df (pd.DataFrame): Long data
+        index (List[str]): Names of columns to use as the new index
+        values (str): Name of column whose values fill the new columns
+        columns (str): Name of column whose values become the new columns
 
-@task
-def _concat(objs: Union[Iterable[pd.DataFrame]], **kwargs: Any) -> pd.DataFrame:
+    Returns:
+        pd.DataFrame: Wide data
+    """
+    pivoted = df.set_index(index + [columns])[values].unstack(columns)
+    pivoted.columns = list(pivoted.columns)
 
-    return pd.concat(objs, **kwargs)
+    return pivoted.reset_index()
 
 
 @task
@@ -167,34 +259,6 @@ def _merge_with_geometries(
     return geometries.merge(df, on=on, **kwargs)
 
 
-@task
-def _link_small_areas_to_postcodes(
-    small_area_statistics: gpd.GeoDataFrame, postcode_geometries: gpd.GeoDataFrame,
-) -> gpd.GeoDataFrame:
-    """Link Small Areas to their corresponding Postcode.
-
-    By finding which Postcode contains which Small Area Centroid.
-
-    Args:
-        small_area_statistics (gpd.GeoDataFrame): Statistics data containing small area
-        geometries
-        postcode_geometries (gpd.GeoDataFrame): Postcode geometries
-
-    Returns:
-        gpd.GeoDataFrame: Statistics data with small areas linked to postcodes
-    """
-    small_area_centroids = small_area_statistics.copy().assign(
-        geometry=lambda gdf: gdf.geometry.centroid,
-    )
-    small_areas_linked_to_postcodes = gpd.sjoin(
-        small_area_centroids, postcode_geometries, how="left",
-    ).drop(columns=["index_right", "geometry"])
-
-    return small_areas_linked_to_postcodes.assign(
-        geometry=small_area_statistics.geometry,
-    )
-
-
 @task
 @require(
     lambda df, columns: set(columns) <= set(df.columns),
@@ -210,34 +274,31 @@ with Flow("Transform Dublin Small Area Statistics") as flow:
     sa_stats_fpath = Parameter("sa_stats_fpath")
     sa_glossary_fpath = Parameter("sa_glossary_fpath")
     sa_geometries_fpath = Parameter("sa_geometries_fpath")
-    postcode_geometries_fpath = Parameter("postcode_geometries_fpath")
+    sa_lookup_fpath = Parameter("sa_lookup_fpath")
 
-    raw_glossary = pdt.read_parquet(sa_glossary_fpath)
-    sa_geometries = gpdt.read_parquet(sa_geometries_fpath)
-    postcode_geometries = gpdt.read_parquet(postcode_geometries_fpath)
+    raw_glossary = pdt.read_parquet(
+        sa_glossary_fpath,
+        columns=["Tables Within Themes", "Column Names", "Description of Field"],
+    )
+    sa_geometries = gpdt.read_parquet(
+        sa_geometries_fpath, columns=["small_area", "geometry"],
+    )
+    sa_lookup = pdt.read_parquet(sa_lookup_fpath, columns=["small_area", "postcodes"])
 
-    raw_year_built_glossary = _extract_rows_from_glossary(
+    glossaries = _extract_glossaries(
         raw_glossary,
         target="Tables Within Themes",
-        table_name="Permanent private households by year built ",
-    )
-    year_built_glossary = _convert_columns_to_dict(
-        raw_year_built_glossary,
+        table_names=[YEAR_BUILT_TABLE, BOILER_TABLE],
         column_name_index="Column Names",
         column_name_values="Description of Field",
     )
-
-    raw_sa_stats = pdt.read_parquet(sa_stats_fpath)
-
-    raw_year_built_stats = _extract_column_names_via_glossary(
-        raw_sa_stats, year_built_glossary, additional_columns=["GEOGID"],
-    )
-    year_built_stats_with_col_names_decoded = _rename_columns_via_glossary(
-        raw_year_built_stats, year_built_glossary,
-    )
-    year_built_stats_with_columns_melted = _melt_columns(
-        year_built_stats_with_col_names_decoded, id_vars=["GEOGID"],
+    sa_stats_columns = _get_column_names_in_glossaries(
+        glossaries, additional_columns=["GEOGID"],
     )
+    raw_sa_stats = pdt.read_parquet(sa_stats_fpath, columns=sa_stats_columns)
+    sa_tables = _decode_tables(raw_sa_stats, glossaries, id_column="GEOGID")
+
+    year_built_stats_with_columns_melted = sa_tables[YEAR_BUILT_TABLE]
     year_built_stats_with_column_split = _split_column_in_two_on_substring(
         year_built_stats_with_columns_melted,
         target="variable",
@@ -273,8 +334,8 @@ with Flow("Transform Dublin Small Area Statistics") as flow:
     year_built_with_dublin_sa_geometries = _merge_with_geometries(
         persons_and_hh_columns, sa_geometries, on=["small_area"],
     )
-    year_built_with_postcodes = _link_small_areas_to_postcodes(
-        year_built_with_dublin_sa_geometries, postcode_geometries,
+    year_built_with_postcodes = pdt.merge(
+        year_built_with_dublin_sa_geometries, sa_lookup, how="left", on="small_area",
     )
     clean_year_built = _get_columns(
         year_built_with_postcodes,
@@ -288,24 +349,7 @@ with Flow("Transform Dublin Small Area Statistics") as flow:
         ],
     )
 
-    raw_boiler_glossary = _extract_rows_from_glossary(
-        raw_glossary,
-        target="Tables Within Themes",
-        table_name="Permanent private households by central heating ",
-    )
-    boiler_glossary = _convert_columns_to_dict(
-        raw_boiler_glossary,
-        column_name_index="Column Names",
-        column_name_values="Description of Field",
-    )
-
-    raw_boiler_stats = _extract_column_names_via_glossary(
-        raw_sa_stats, boiler_glossary, additional_columns=["GEOGID"],
-    )
-    decode_boiler_stats = _rename_columns_via_glossary(
-        raw_boiler_stats, boiler_glossary,
-    )
-    melt_boiler_stats = _melt_columns(decode_boiler_stats, id_vars=["GEOGID"])
+    melt_boiler_stats = sa_tables[BOILER_TABLE]
     rename_boiler_stats_columns = pdt.rename(
         melt_boiler_stats, columns={"variable": "boiler_type", "value": "total"},
     )
@@ -319,8 +363,8 @@ with Flow("Transform Dublin Small Area Statistics") as flow:
     link_boiler_stats_to_sa_geometries = _merge_with_geometries(
         rename_boiler_stats_small_areas, sa_geometries, on=["small_area"],
     )
-    link_boiler_stats_to_postcodes = _link_small_areas_to_postcodes(
-        link_boiler_stats_to_sa_geometries, postcode_geometries,
+    link_boiler_stats_to_postcodes = pdt.merge(
+        link_boiler_stats_to_sa_geometries, sa_lookup, how="left", on="small_area",
     )
     clean_boiler_stats = pdt.get_columns(
         link_boiler_stats_to_postcodes,
@@ -349,7 +393,7 @@ class TransformSaStatistics(Task, VisualizeMixin):
         self,
         input_filepath: Path,
         sa_glossary_filepath: Path,
-        postcodes_filepath: Path,
+        sa_lookup_filepath: Path,
         sa_geometries_filepath: Path,
         output_filepath_period_built: Path,
         output_filepath_boilers: Path,
@@ -359,7 +403,7 @@ class TransformSaStatistics(Task, VisualizeMixin):
         Args:
             input_filepath (Path): Path to Small Area Statistics Raw Data
             sa_glossary_filepath (Path): Path to Small Area Statistics Glossary
-            postcodes_filepath (Path): Path to Postcode Geometries Data
+            sa_lookup_filepath (Path): Path to Small Area to Postcode lookup table
             sa_geometries_filepath (Path): Path to Small Area Geometries Data
             output_filepath_period_built (Path): Path to Small Area Period Built Stats
             output_filepath_boilers (Path): Path to Small Area Period Boiler Stats
@@ -369,7 +413,7 @@ class TransformSaStatistics(Task, VisualizeMixin):
                 parameters=dict(
                     sa_stats_fpath=input_filepath,
                     sa_glossary_fpath=sa_glossary_filepath,
-                    postcode_geometries_fpath=postcodes_filepath,
+                    sa_lookup_fpath=sa_lookup_filepath,
                     sa_geometries_fpath=sa_geometries_filepath,
                 ),
             )
@@ -377,8 +421,14 @@ class TransformSaStatistics(Task, VisualizeMixin):
         period_built = state.result[clean_year_built].result
         boilers = state.result[clean_boiler_stats].result
 
-        period_built.to_parquet(output_filepath_period_built)
-        boilers.to_parquet(output_filepath_boilers)
+        write_parquet(
+            period_built,
+            output_filepath_period_built,
+            sort_by=["small_area", "cso_period_built"],
+        )
+        write_parquet(
+            boilers, output_filepath_boilers, sort_by=["small_area", "boiler_type"],
+        )
 
 
 transform_sa_statistics = TransformSaStatistics()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+
+from os import path
+from pathlib import Path
+from typing import Iterable
+
+import geopandas as gpd
+import pandas as pd
+
+from loguru import logger
+from prefect import Task
+
+from drem.load.parquet import write_parquet
+
+
+def _get_sha256_of_files(filepaths: Iterable[Path], block_size: int = 1 << 20) -> str:
+
+    sha256 = hashlib.sha256()
+    for filepath in filepaths:
+        with open(filepath, "rb") as input_file:
+            for block in iter(lambda: input_file.read(block_size), b""):
+                sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def _get_version_filepath(filepath: Path) -> str:
+
+    return f"{filepath}.version.json"
+
+
+def _read_version(filepath: Path) -> str:
+
+    version_filepath = _get_version_filepath(filepath)
+    if not (path.exists(filepath) and path.exists(version_filepath)):
+        return ""
+
+    with open(version_filepath, "r") as json_file:
+        return json.load(json_file)["sha256"]
+
+
+def link_small_areas_to_postcodes(
+    small_areas: gpd.GeoDataFrame, postcodes: gpd.GeoDataFrame,
+) -> gpd.GeoDataFrame:
+    """Link Small Areas to their corresponding Postcode.
+
+    By finding which Postcode contains which Small Area Centroid.  gpd.sjoin builds
+    an R-tree spatial index of the postcode polygons so each centroid is only tested
+    against the few polygons whose bounding boxes contain it.
+
+    Args:
+        small_areas (gpd.GeoDataFrame): Small Area geometries
+        postcodes (gpd.GeoDataFrame): Postcode geometries
+
+    Returns:
+        gpd.GeoDataFrame: Small Areas with their Postcode
+    """
+    small_area_centroids = small_areas.copy().assign(
+        geometry=lambda gdf: gdf.geometry.centroid,
+    )
+    small_areas_linked_to_postcodes = gpd.sjoin(
+        small_area_centroids, postcodes, how="left",
+    ).drop(columns=["index_right", "geometry"])
+
+    return small_areas_linked_to_postcodes.assign(geometry=small_areas.geometry)
+
+
+class CreateSmallAreaLookup(Task):
+    """Create a Small Area to Postcode to Local Authority lookup table.
+
+    The table is saved alongside a version file containing the SHA-256 of the
+    geometries it was built from so it is only rebuilt when they change. Flows can
+    then link Small Areas to Postcodes or Local Authorities via a plain merge on
+    'small_area' rather than a spatial join.
+
+    Args:
+        Task (prefect.Task): see https://docs.prefect.io/core/concepts/tasks.html
+    """
+
+    def run(
+        self,
+        sa_geometries_filepath: Path,
+        postcodes_filepath: Path,
+        output_filepath: Path,
+    ) -> None:
+        """Create lookup table if it is missing or its geometries have changed.
+
+        Args:
+            sa_geometries_filepath (Path): Path to Clean Small Area Geometries Data
+            postcodes_filepath (Path): Path to Clean Postcode Geometries Data
+            output_filepath (Path): Path to Small Area lookup table
+        """
+        version = _get_sha256_of_files([sa_geometries_filepath, postcodes_filepath])
+        if _read_version(output_filepath) == version:
+            logger.info(f"{output_filepath} is up to date")
+            return
+
+        small_areas = gpd.read_parquet(
+            sa_geometries_filepath,
+            columns=["small_area", "local_authority", "geometry"],
+        )
+        postcodes = gpd.read_parquet(
+            postcodes_filepath, columns=["postcodes", "geometry"],
+        )
+        small_areas_linked_to_postcodes = link_small_areas_to_postcodes(
+            small_areas, postcodes,
+        )
+        lookup = (
+            pd.DataFrame(small_areas_linked_to_postcodes)
+            .loc[:, ["small_area", "postcodes", "local_authority"]]
+            .reset_index(drop=True)
+        )
+
+        write_parquet(lookup, output_filepath, sort_by=["small_area"])
+        with open(_get_version_filepath(output_filepath), "w") as json_file:
+            json.dump({"sha256": version}, json_file)
+
+
+create_small_area_lookup = CreateSmallAreaLookup()
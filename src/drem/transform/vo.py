@@ -1,6 +1,10 @@
+import hashlib
+
+from glob import escape
 from pathlib import Path
 from re import IGNORECASE
 from typing import Any
+from typing import List
 
 import geopandas as gpd
 import numpy as np
@@ -10,51 +14,46 @@ from prefect import Flow
 from prefect import Parameter
 from prefect import Task
 from prefect import task
+from prefect import unmapped
+from prefect.engine.executors import LocalDaskExecutor
 from prefect.utilities.debug import raise_on_exception
 
 import drem.utilities.geopandas_tasks as gpdt
 import drem.utilities.pandas_tasks as pdt
 
+from drem.load.parquet import write_parquet
 from drem.transform.benchmarks import transform_benchmarks
+from drem.utilities.crs import ITM
 from drem.utilities.visualize import VisualizeMixin
 
 
-@task
-def _merge_local_authority_files(dirpath: Path) -> pd.DataFrame:
-
-    dirpath_path = Path(dirpath)
-    files = dirpath_path.glob("*.csv")
-    df = [pd.read_csv(fp) for fp in files]
+# Bump whenever the cleaning steps change so files cleaned by older steps are redone
+CLEANER_VERSION = 1
 
-    return pd.concat(df)
 
-
-@task
-def _fillna_in_columns_where_column_name_contains_substring(
-    df: pd.DataFrame, substring: str, replace_with: str,
+def _clean_address_columns(
+    df: pd.DataFrame, target: str, result: str, replace_empty_with: str,
 ) -> pd.DataFrame:
+    """Merge address columns into one cleaned address column in a single pass.
 
-    columns = df.filter(regex=substring).columns
-    df[columns] = df[columns].fillna(replace_with)
+    Fuses filling missing values with empty strings, merging columns, stripping
+    whitespace & replacing empty addresses so that the DataFrame is only modified
+    once rather than after every step.
 
-    return df
-
-
-@task
-def _merge_string_columns_into_one(
-    df: pd.DataFrame, target: str, result: str,
-) -> pd.DataFrame:
-
-    columns = df.filter(regex=target).columns
-    df[result] = df[columns].astype(str).agg(" ".join, axis=1)
-
-    return df
-
-
-@task
-def _strip_whitespace(df: pd.DataFrame, target: str, result: str) -> pd.DataFrame:
+    Args:
+        df (pd.DataFrame): Data containing address columns
+        target (str): Regular expression matching the names of address columns
+        result (str): Name of the cleaned address column
+        replace_empty_with (str): Replacement for empty addresses
 
-    df[result] = df[target].astype(str).str.strip()
+    Returns:
+        pd.DataFrame: Data with cleaned address column
+    """
+    strings = [
+        df[column].fillna("").astype(str) for column in df.filter(regex=target).columns
+    ]
+    addresses = strings[0].str.cat(strings[1:], sep=" ").str.strip()
+    df[result] = addresses.mask(addresses == "", replace_empty_with)
 
     return df
 
@@ -69,22 +68,11 @@ def _remove_null_address_strings(df: pd.DataFrame, on: str) -> pd.DataFrame:
     return df
 
 
-@task
 def _remove_zero_floor_area_buildings(df: pd.DataFrame) -> pd.DataFrame:
 
     return df.copy().loc[df["Area"] > 0]
 
 
-@task
-def _replace_rows_equal_to_string(
-    df: pd.DataFrame, target: str, result: str, to_replace: str, replace_with: str,
-) -> pd.DataFrame:
-
-    df[result] = df[target].replace({to_replace: replace_with}, regex=False)
-
-    return df
-
-
 @task
 def _remove_symbols_from_column_strings(df: pd.DataFrame, column: str) -> pd.DataFrame:
 
@@ -93,7 +81,6 @@ def _remove_symbols_from_column_strings(df: pd.DataFrame, column: str) -> pd.Dat
     return df
 
 
-@task
 def _remove_whitespace_from_column_strings(df: pd.DataFrame) -> pd.DataFrame:
 
     df.columns = df.columns.str.strip()
@@ -101,23 +88,99 @@ def _remove_whitespace_from_column_strings(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-@task
 def _extract_use_from_vo_uses_column(vo: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
 
+    # Only split each distinct combination of uses once & broadcast via its codes
+    codes, distinct_uses = pd.factorize(vo["Uses"])
     uses = (
-        vo["Uses"]
+        pd.Series(distinct_uses)
         .str.split(", ", expand=True)
         .replace("-", np.nan)
-        .fillna(np.nan)
         .dropna(axis="columns", how="all")
+        .reindex(codes)
     )
 
     use_columns = [f"use_{use_number}" for use_number in uses.columns]
-    vo[use_columns] = uses
+    vo[use_columns] = uses.to_numpy()
 
     return vo
 
 
+def _get_sha256(filepath: Path, block_size: int = 1024 * 1024) -> str:
+
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as input_file:
+        for block in iter(lambda: input_file.read(block_size), b""):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def _get_cached_filepath(filepath: Path, dirpath: Path) -> Path:
+
+    key = f"{CLEANER_VERSION}:{_get_sha256(filepath)}".encode()
+    digest = hashlib.sha256(key).hexdigest()
+    return Path(dirpath) / f"{Path(filepath).stem}.{digest[:16]}.parquet"
+
+
+def _remove_stale_cached_files(cached_filepath: Path) -> None:
+
+    stem = cached_filepath.name.rsplit(".", 2)[0]
+    for stale_filepath in cached_filepath.parent.glob(
+        f"{escape(stem)}.{'[0-9a-f]' * 16}.parquet",
+    ):
+        if stale_filepath != cached_filepath:
+            stale_filepath.unlink()
+
+
+@task
+def _get_local_authority_filepaths(dirpath: Path) -> List[Path]:
+
+    return sorted(Path(dirpath).glob("*.csv"))
+
+
+@task(name="Clean Valuation Office file")
+def _clean_local_authority_file(filepath: Path, cache_dirpath: Path) -> Path:
+    """Clean one local authority/category file, reusing its cached result if any.
+
+    Each clean file is cached in cache_dirpath under a name containing the SHA-256
+    of the raw file & CLEANER_VERSION, so only new or changed files are cleaned
+    again.
+
+    Args:
+        filepath (Path): Path to raw local authority/category file
+        cache_dirpath (Path): Path to directory of cached clean files
+
+    Returns:
+        Path: Path to cached clean file
+    """
+    cached_filepath = _get_cached_filepath(filepath, cache_dirpath)
+    if cached_filepath.exists():
+        return cached_filepath
+
+    vo_raw = pd.read_csv(filepath)
+    vo_removed = _remove_whitespace_from_column_strings(vo_raw)
+    vo_area = _remove_zero_floor_area_buildings(vo_removed)
+    vo_cleaned = _clean_address_columns(
+        vo_area, target="Address", result="Address", replace_empty_with="None",
+    )
+    vo_extracted = _extract_use_from_vo_uses_column(vo_cleaned)
+
+    cached_filepath.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet(vo_extracted.reset_index(drop=True), cached_filepath)
+    _remove_stale_cached_files(cached_filepath)
+
+    return cached_filepath
+
+
+@task
+def _concat_parquet_files(filepaths: List[Path]) -> pd.DataFrame:
+
+    return pd.concat(
+        [pd.read_parquet(filepath) for filepath in filepaths], ignore_index=True,
+    )
+
+
 @task
 def _merge_benchmarks_into_vo(
     vo: pd.DataFrame, benchmarks: pd.DataFrame,
@@ -164,46 +227,23 @@ def _convert_to_geodataframe(df: pd.DataFrame) -> gpd.GeoDataFrame:
         gpd.GeoDataFrame: [description]
     """
     coordinates = gpd.points_from_xy(x=df["X ITM"], y=df["Y ITM"])
-    return gpd.GeoDataFrame(df, geometry=coordinates, crs="epsg:2157")
-
-
-@task
-def _set_coordinate_reference_system_to_lat_long(
-    gdf: gpd.GeoDataFrame,
-) -> gpd.GeoDataFrame:
-
-    return gdf.to_crs("epsg:4326")
+    return gpd.GeoDataFrame(df, geometry=coordinates, crs=ITM)
 
 
 with Flow("Transform Raw VO") as flow:
 
     vo_raw_dirpath = Parameter("vo_raw_dirpath")
+    vo_cache_dirpath = Parameter("vo_cache_dirpath")
     vo_clean_fpath = Parameter("vo_clean_fpath")
     bmarks_dirpath = Parameter("bmarks_dirpath")
     unmatched_fpath = Parameter("unmatched_fpath")
 
     bmarks = transform_benchmarks(bmarks_dirpath)
-    vo_raw = _merge_local_authority_files(vo_raw_dirpath)
-
-    vo_removed = _remove_whitespace_from_column_strings(vo_raw)
-    vo_area = _remove_zero_floor_area_buildings(vo_removed)
-    vo_filled = _fillna_in_columns_where_column_name_contains_substring(
-        vo_area, substring="Address", replace_with="",
+    vo_raw_fpaths = _get_local_authority_filepaths(vo_raw_dirpath)
+    vo_clean_fpaths = _clean_local_authority_file.map(
+        vo_raw_fpaths, cache_dirpath=unmapped(vo_cache_dirpath),
     )
-    vo_merged = _merge_string_columns_into_one(
-        vo_filled, target="Address", result="address_raw",
-    )
-    vo_stripped = _strip_whitespace(
-        vo_merged, target="address_raw", result="address_stripped",
-    )
-    vo_replaced = _replace_rows_equal_to_string(
-        vo_stripped,
-        target="address_stripped",
-        result="Address",
-        to_replace="",
-        replace_with="None",
-    )
-    vo_extracted = _extract_use_from_vo_uses_column(vo_replaced)
+    vo_extracted = _concat_parquet_files(vo_clean_fpaths)
     vo_merged_benchmarks = _merge_benchmarks_into_vo(vo_extracted, bmarks)
 
     vo_save_unmatched = _save_unmatched_vo_uses_to_text_file(
@@ -211,9 +251,8 @@ with Flow("Transform Raw VO") as flow:
     )
     vo_applied = _apply_benchmarks_to_vo_floor_area(vo_save_unmatched)
     vo_gdf = _convert_to_geodataframe(vo_applied)
-    vo_crs = _set_coordinate_reference_system_to_lat_long(vo_gdf)
     vo_columns_selected = pdt.get_columns(
-        vo_crs,
+        vo_gdf,
         [
             "Address",
             "Uses",
@@ -252,22 +291,30 @@ class TransformVO(Task, VisualizeMixin):
         output_filepath: str,
         benchmarks_dirpath: str,
         unmatched_filepath: str,
+        cache_dirpath: str,
     ) -> gpd.GeoDataFrame:
         """Run flow.
 
+        Each local authority/category file is cleaned independently & in parallel,
+        and only if it has changed since it was last cleaned.
+
         Args:
             input_dirpath (str): Path to raw valuation office data
             output_filepath (str): Path to clean valuation office data
             benchmarks_dirpath (str): Path to benchmarks
             unmatched_filepath (str): Path to file containing vo uses for which no
                 benchmarks could be found
+            cache_dirpath (str): Path to directory of cached clean local authority/
+                category files
         """
         with raise_on_exception():
             self.flow.run(
                 vo_raw_dirpath=input_dirpath,
+                vo_cache_dirpath=cache_dirpath,
                 vo_clean_fpath=output_filepath,
                 bmarks_dirpath=benchmarks_dirpath,
                 unmatched_fpath=unmatched_filepath,
+                executor=LocalDaskExecutor(scheduler="threads"),
             )
 
 
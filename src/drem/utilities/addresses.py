@@ -0,0 +1,112 @@
+"""Apply slow address functions such as libpostal's once per distinct address.
+
+Results are memoized in a parquet file keyed by the raw address string so repeated
+addresses (across years, datasets & runs) are only ever processed once.
+"""
+
+import json
+
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+
+from loguru import logger
+
+from drem.load.parquet import write_parquet
+
+
+def _read_cache(filepath: Path) -> Dict[str, str]:
+
+    if not filepath.exists():
+        return {}
+
+    cache = pd.read_parquet(filepath)
+    return dict(zip(cache["address"], cache["result"]))
+
+
+def _write_cache(cache: Dict[str, str], filepath: Path) -> None:
+
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    write_parquet(
+        pd.DataFrame({"address": list(cache.keys()), "result": list(cache.values())}),
+        filepath,
+    )
+
+
+def _apply_in_parallel(
+    func: Callable[[str], Any], addresses: List[str], max_workers: Optional[int],
+) -> List[Any]:
+
+    if max_workers == 1:
+        return [func(address) for address in addresses]
+
+    # Send addresses in large chunks as each call to func only takes microseconds
+    n_workers = max_workers or cpu_count() or 1
+    chunksize = max(1, len(addresses) // (4 * n_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, addresses, chunksize=chunksize))
+
+
+def normalise_addresses(
+    addresses: pd.Series,
+    func: Callable[[str], Any],
+    cache_filepath: Union[str, Path],
+    max_workers: Optional[int] = None,
+) -> pd.Series:
+    """Apply func to each distinct address once, memoizing results on disk.
+
+    Addresses are deduplicated first, addresses already in the cache are looked up
+    & only the remainder are passed to func across a pool of processes.  func must
+    be a module-level function (so it can be pickled) returning a json-serializable
+    result; note that json converts tuples to lists.
+
+    Example:
+        Expand addresses via libpostal,
+        normalise_addresses(
+            vo["Address"], func=expand_first_address, cache_filepath=filepath,
+        )
+
+    Args:
+        addresses (pd.Series): Raw address strings
+        func (Callable[[str], Any]): Function to apply to each address
+        cache_filepath (Union[str, Path]): Path to parquet file of results by raw
+            address, one file per func
+        max_workers (Optional[int], optional): Number of processes; each libpostal
+            process loads ~2GB of models so limit this if memory is short. Set to 1
+            to run in the current process. Defaults to None which uses all CPUs.
+
+    Returns:
+        pd.Series: The result of func for each address
+    """
+    cache_filepath = Path(cache_filepath)
+    codes, distinct_addresses = pd.factorize(addresses)
+    cache = _read_cache(cache_filepath)
+
+    missing_addresses = [
+        address for address in distinct_addresses if address not in cache
+    ]
+    if missing_addresses:
+        logger.info(
+            f"Applying {func.__name__} to {len(missing_addresses)} of "
+            f"{len(distinct_addresses)} distinct addresses",
+        )
+        results = _apply_in_parallel(func, missing_addresses, max_workers)
+        cache.update(zip(missing_addresses, map(json.dumps, results)))
+        _write_cache(cache, cache_filepath)
+
+    distinct_results = pd.Series(
+        [json.loads(cache[address]) for address in distinct_addresses], dtype="object",
+    )
+    return pd.Series(
+        distinct_results.reindex(codes).to_numpy(),
+        index=addresses.index,
+        name=addresses.name,
+    )
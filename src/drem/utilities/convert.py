@@ -1,7 +1,11 @@
+import json
+
 from os import path
 from pathlib import Path
 from typing import Any
+from typing import Dict
 from typing import Optional
+from typing import Union
 
 import dask.dataframe as dd
 import geopandas as gpd
@@ -10,6 +14,28 @@ import prefect
 
 from prefect import task
 
+from drem.load.parquet import convert_dtypes_to_arrow_types
+from drem.load.parquet import write_dask_parquet
+from drem.load.parquet import write_parquet
+from drem.load.parquet import write_parquet_in_chunks
+
+
+def is_up_to_date(output_filepath: str, input_filepath: str) -> bool:
+    """Check if an output file exists & was written after its input was modified.
+
+    So a refreshed download is converted again rather than skipped.
+
+    Args:
+        output_filepath (str): Path to output file or directory
+        input_filepath (str): Path to input file
+
+    Returns:
+        bool: True if output_filepath exists & is newer than input_filepath
+    """
+    return path.exists(output_filepath) and (
+        path.getmtime(output_filepath) >= path.getmtime(input_filepath)
+    )
+
 
 @task
 def excel_to_parquet(input_filepath: str, output_filepath: str) -> None:
@@ -21,49 +47,91 @@ def excel_to_parquet(input_filepath: str, output_filepath: str) -> None:
     """
     logger = prefect.context.get("logger")
 
-    if path.exists(output_filepath):
-        logger.info(f"{output_filepath} already exists")
+    if is_up_to_date(output_filepath, input_filepath):
+        logger.info(f"{output_filepath} is up to date")
     else:
         excel = pd.read_excel(input_filepath, engine="openpyxl")
-        excel.to_parquet(output_filepath)
+        write_parquet(excel, output_filepath)
 
 
 @task
-def csv_to_parquet(input_filepath: str, output_filepath: str, **kwargs: Any) -> None:
-    """Convert csv file to parquet.
+def csv_to_parquet(
+    input_filepath: str,
+    output_filepath: str,
+    chunksize: int = 100000,
+    row_group_size: Optional[int] = None,
+    schema_overrides: Optional[Dict[str, str]] = None,
+    dtypes_filepath: Optional[str] = None,
+    **kwargs: Any,
+) -> None:
+    """Convert csv file to parquet in bounded memory.
+
+    The csv file is read chunksize rows at a time and each chunk is appended to a
+    single parquet file as it is read, so peak memory is set by chunksize rather
+    than by the size of the file.  The parquet schema is locked by the first chunk.
 
     Args:
         input_filepath (str): Path to input file
         output_filepath (str): Path to output file
+        chunksize (int, optional): Number of rows to read at a time. Defaults to
+            100000.
+        row_group_size (Optional[int], optional): Maximum number of rows per
+            parquet row group. Defaults to None which writes one per chunk.
+        schema_overrides (Optional[Dict[str, str]], optional): Maps column names to
+            pandas dtypes such as 'float64' which replace those inferred from the
+            first chunk. Defaults to None.
+        dtypes_filepath (Optional[str], optional): Path to a dtypes json file such as
+            one created by drem.utilities.dtypes.InferCompactDtypes. Defaults to None.
         **kwargs (Any): Passed to pandas.read_csv
     """
     logger = prefect.context.get("logger")
 
-    if path.exists(output_filepath):
-        logger.info(f"{output_filepath} already exists")
+    if is_up_to_date(output_filepath, input_filepath):
+        logger.info(f"{output_filepath} is up to date")
     else:
-        csv = pd.read_csv(input_filepath, **kwargs)
-        csv.to_parquet(output_filepath)
+        if dtypes_filepath:
+            with open(dtypes_filepath, "r") as json_file:
+                kwargs["dtype"] = json.load(json_file)
+        chunks = pd.read_csv(input_filepath, chunksize=chunksize, **kwargs)
+        write_parquet_in_chunks(
+            chunks,
+            output_filepath,
+            schema_overrides=convert_dtypes_to_arrow_types(schema_overrides or {}),
+            row_group_size=row_group_size,
+        )
 
 
 @task
 def csv_to_dask_parquet(
-    input_filepath: str, output_filepath: str, **kwargs: Any,
+    input_filepath: str,
+    output_filepath: str,
+    blocksize: Union[str, int] = "64MB",
+    row_group_size: Optional[int] = None,
+    **kwargs: Any,
 ) -> None:
     """Convert csv file to parquet.
 
+    Each blocksize partition of the csv file is written to its own parquet file so
+    only a few partitions need to be held in memory at a time.
+
     Args:
         input_filepath (str): Path to input file
         output_filepath (str): Path to output file
+        blocksize (Union[str, int], optional): Number of bytes per partition.
+            Defaults to "64MB".
+        row_group_size (Optional[int], optional): Maximum number of rows per
+            parquet row group. Defaults to None which writes one per partition.
         **kwargs (Any): Passed to pandas.read_csv
     """
     logger = prefect.context.get("logger")
 
-    if path.exists(output_filepath):
-        logger.info(f"{output_filepath} already exists")
+    if is_up_to_date(output_filepath, input_filepath):
+        logger.info(f"{output_filepath} is up to date")
     else:
-        csv = dd.read_csv(input_filepath, **kwargs)
-        csv.to_parquet(output_filepath, schema="infer")
+        csv = dd.read_csv(input_filepath, blocksize=blocksize, **kwargs)
+        write_dask_parquet(
+            csv, output_filepath, schema="infer", row_group_size=row_group_size,
+        )
 
 
 @task
@@ -77,8 +145,8 @@ def shapefile_to_parquet(
         output_filepath (str): Path to output file
     """
     logger = prefect.context.get("logger")
-    if path.exists(output_filepath):
-        logger.info(f"{output_filepath} already exists")
+    if is_up_to_date(output_filepath, input_filepath):
+        logger.info(f"{output_filepath} is up to date")
     else:
         shapefile = gpd.read_file(input_filepath, driver="ESRI Shapefile")
-        shapefile.to_parquet(output_filepath)
+        write_parquet(shapefile, output_filepath)
@@ -0,0 +1,76 @@
+from os import path
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Union
+
+import geopandas as gpd
+
+from loguru import logger
+
+from drem.load.parquet import write_parquet
+
+
+# Irish Transverse Mercator, a projected CRS in metres in which centroids, areas,
+# point-in-polygon tests & dissolves are geometrically valid
+ITM = "epsg:2157"
+
+# Latitude/Longitude (WGS84), only used for outputs such as maps
+LAT_LONG = "epsg:4326"
+
+
+def get_reprojected_filepath(filepath: Union[str, Path], crs: str) -> Path:
+    """Get the path of the cached reprojection of a GeoParquet file.
+
+    Example:
+        data/processed/dublin_postcodes.parquet reprojected to 'epsg:4326' is cached
+        at data/processed/dublin_postcodes.epsg4326.parquet
+
+    Args:
+        filepath (Union[str, Path]): Path to a GeoParquet file
+        crs (str): Coordinate reference system such as 'epsg:4326'
+
+    Returns:
+        Path: Path to the cached reprojection
+    """
+    filepath = Path(filepath)
+    crs_name = crs.lower().replace(":", "")
+    return filepath.with_name(f"{filepath.stem}.{crs_name}{filepath.suffix}")
+
+
+def _is_up_to_date(filepath: Path, source_filepath: Path) -> bool:
+
+    return path.exists(filepath) and (
+        path.getmtime(filepath) >= path.getmtime(source_filepath)
+    )
+
+
+def read_parquet_in_crs(
+    filepath: Union[str, Path],
+    crs: str = LAT_LONG,
+    columns: Optional[List[str]] = None,
+) -> gpd.GeoDataFrame:
+    """Read a GeoParquet file reprojected to crs, reprojecting it at most once.
+
+    Reprojecting thousands of polygons takes seconds so the reprojected geometries
+    are cached beside filepath (see get_reprojected_filepath) and reused until
+    filepath is modified.
+
+    Args:
+        filepath (Union[str, Path]): Path to a GeoParquet file
+        crs (str, optional): Coordinate reference system. Defaults to LAT_LONG.
+        columns (Optional[List[str]], optional): Names of columns to read, which must
+            include a geometry column. Defaults to None which reads all columns.
+
+    Returns:
+        gpd.GeoDataFrame: Geometries in crs
+    """
+    reprojected_filepath = get_reprojected_filepath(filepath, crs)
+    if _is_up_to_date(reprojected_filepath, filepath):
+        return gpd.read_parquet(reprojected_filepath, columns=columns)
+
+    logger.info(f"Reprojecting {filepath} to {crs}")
+    reprojected = gpd.read_parquet(filepath).to_crs(crs)
+    write_parquet(reprojected, reprojected_filepath)
+
+    return reprojected if columns is None else reprojected.loc[:, columns]
@@ -1,5 +1,8 @@
 from pathlib import Path
 from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 import dask.dataframe as dd
 import pandas as pd
@@ -8,19 +11,29 @@ from prefect import task
 
 
 @task
-def read_parquet(filepath: Path, **kwargs: Any) -> dd.DataFrame:
+def read_parquet(
+    filepath: Path,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[List[Tuple[str, str, Any]]]] = None,
+    **kwargs: Any,
+) -> dd.DataFrame:
     """Read a Parquet file into a Dask DataFrame.
 
     See https://docs.dask.org/en/latest/dataframe-api.html#dask.dataframe.DataFrame
 
     Args:
         filepath (Path): Path to Dask-compatible Parquet file
-        **kwargs (Any): Passed to dask.dataframe.to_parquet
+        columns (Optional[List[str]], optional): Names of columns to read. Defaults
+            to None which reads all columns.
+        filters (Optional[List[List[Tuple[str, str, Any]]]], optional): Filters in
+            disjunctive normal form such as [[("CountyName", "==", "Dublin 1")]] used
+            to skip partitions & row groups. Defaults to None.
+        **kwargs (Any): Passed to dask.dataframe.read_parquet
 
     Returns:
         dd.DataFrame: Dask DataFrame
     """
-    return dd.read_parquet(filepath, **kwargs)
+    return dd.read_parquet(filepath, columns=columns, filters=filters, **kwargs)
 
 
 @task
@@ -0,0 +1,194 @@
+"""Group similar strings such as 'leinster house' & 'lenister house'.
+
+Strings are only compared to others in the same block (e.g. the same postcode or
+a character n-gram of the same first word) and in chunks of bounded size, so memory
+is bounded by the largest block rather than growing with the square of the number
+of strings.
+"""
+
+from collections import Counter
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+def _get_ngrams(string: str, ngram_size: int) -> List[str]:
+
+    padded_string = f" {string} "
+    return [
+        padded_string[start : start + ngram_size]
+        for start in range(len(padded_string) - ngram_size + 1)
+    ]
+
+
+def _get_idf(ngrams: List[List[str]]) -> Dict[str, float]:
+
+    document_frequency = Counter(ngram for row in ngrams for ngram in set(row))
+    n_documents = len(ngrams)
+    return {
+        ngram: np.log((1 + n_documents) / (1 + frequency)) + 1
+        for ngram, frequency in document_frequency.items()
+    }
+
+
+def _get_tfidf_matrix(
+    ngrams: List[List[str]], idf: Dict[str, float],
+) -> sparse.csr_matrix:
+
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    columns: List[int] = []
+    values: List[float] = []
+    for row, row_ngrams in enumerate(ngrams):
+        for ngram in row_ngrams:
+            rows.append(row)
+            columns.append(vocabulary.setdefault(ngram, len(vocabulary)))
+            values.append(idf[ngram])
+
+    # Duplicate (row, column) entries are summed so each value is tf * idf
+    matrix = sparse.csr_matrix(
+        (values, (rows, columns)), shape=(len(ngrams), len(vocabulary)), dtype=float,
+    )
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    return sparse.diags(1 / np.where(norms == 0, 1, norms)) @ matrix
+
+
+def _get_similar_pairs(
+    matrix: sparse.csr_matrix, min_similarity: float, chunk_size: int,
+) -> np.ndarray:
+
+    pairs = []
+    for start in range(0, matrix.shape[0], chunk_size):
+        similarities = (matrix[start : start + chunk_size] @ matrix.T).tocoo()
+        rows = similarities.row + start
+        is_match = (similarities.data >= min_similarity) & (similarities.col > rows)
+        pairs.append(np.column_stack([rows[is_match], similarities.col[is_match]]))
+
+    return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=int)
+
+
+def get_tfidf_matrix(strings: pd.Series, ngram_size: int = 3) -> sparse.csr_matrix:
+    """Vectorise strings as L2-normalised TF-IDF weighted character n-grams.
+
+    The dot product of two rows is the cosine similarity of their strings.
+
+    Args:
+        strings (pd.Series): Strings to be vectorised
+        ngram_size (int, optional): Number of characters per n-gram. Defaults to 3.
+
+    Returns:
+        sparse.csr_matrix: One row per string & one column per distinct n-gram
+    """
+    ngrams = [_get_ngrams(string, ngram_size) for string in strings]
+    return _get_tfidf_matrix(ngrams, _get_idf(ngrams))
+
+
+def get_leading_tokens(strings: pd.Series) -> pd.Series:
+    """Get the first word of each string for use as a blocking key.
+
+    Args:
+        strings (pd.Series): Strings such as addresses
+
+    Returns:
+        pd.Series: The first word of each string
+    """
+    return strings.str.split(n=1).str[0]
+
+
+def get_leading_token_ngrams(strings: pd.Series, ngram_size: int = 3) -> pd.Series:
+    """Get the character n-grams of the first word of each string as blocking keys.
+
+    Unlike blocking by leading token, strings with a typo in their first word such
+    as 'leinster house' & 'lenister house' still share a block via ' le' or 'ter'.
+
+    Args:
+        strings (pd.Series): Strings such as addresses
+        ngram_size (int, optional): Number of characters per n-gram. Defaults to 3.
+
+    Returns:
+        pd.Series: A tuple of the n-grams of the first word of each string
+    """
+    return get_leading_tokens(strings).map(
+        lambda token: tuple(_get_ngrams(token, ngram_size))
+        if isinstance(token, str)
+        else (),
+    )
+
+
+def dedupe_strings(
+    strings: pd.Series,
+    blocks: Optional[pd.Series] = None,
+    min_similarity: float = 0.95,
+    ngram_size: int = 3,
+    chunk_size: int = 1000,
+) -> pd.Series:
+    """Replace each string with a canonical spelling of the group it is similar to.
+
+    Strings are vectorised as TF-IDF weighted character n-grams & strings whose
+    cosine similarity is at least min_similarity are grouped along with any strings
+    similar to them in turn.  Only strings in the same block are compared, & at
+    most chunk_size strings are compared to their block at once, so blocks can be
+    deduplicated independently & in bounded memory.  A string whose blocking key is
+    a tuple is compared to the strings in each of its blocks, so groups may span
+    blocks.
+
+    The canonical spelling of a group is its alphabetically first string, so it
+    does not depend on the order of the strings and can be used as a stable ID.
+
+    Example:
+        Deduplicate addresses within each postcode,
+        dedupe_strings(mprn["address"], blocks=mprn["postcodes"])
+
+    Args:
+        strings (pd.Series): Strings to be deduplicated
+        blocks (Optional[pd.Series], optional): Blocking key of each string such as
+            its postcode, local authority or get_leading_token_ngrams(strings), or a
+            tuple of such keys. Defaults to None which compares all strings to one
+            another.
+        min_similarity (float, optional): Minimum cosine similarity of strings in a
+            group. Defaults to 0.95.
+        ngram_size (int, optional): Number of characters per n-gram. Defaults to 3.
+        chunk_size (int, optional): Number of strings compared at once. Defaults to
+            1000.
+
+    Returns:
+        pd.Series: The canonical spelling of each string
+    """
+    if blocks is None:
+        blocks = pd.Series("", index=strings.index)
+
+    distinct = pd.DataFrame(
+        {"block": blocks.to_numpy(), "string": strings.to_numpy()},
+    ).drop_duplicates(ignore_index=True)
+    ngrams = [_get_ngrams(string, ngram_size) for string in distinct["string"]]
+    idf = _get_idf(ngrams)
+
+    memberships = distinct["block"].explode().dropna()
+    blocks_positions = memberships.groupby(memberships, sort=False).indices
+    pairs = [np.empty((0, 2), dtype=int)]
+    for block_positions in blocks_positions.values():
+        block_indices = memberships.index.to_numpy()[block_positions]
+        matrix = _get_tfidf_matrix([ngrams[index] for index in block_indices], idf)
+        block_pairs = _get_similar_pairs(matrix, min_similarity, chunk_size)
+        pairs.append(block_indices[block_pairs])
+    pairs = np.concatenate(pairs)
+
+    n_distinct = len(distinct)
+    graph = sparse.coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n_distinct,) * 2,
+    )
+    _, groups = connected_components(graph, directed=False)
+    distinct["canonical"] = distinct["string"].groupby(groups).transform("min")
+
+    return (
+        pd.DataFrame({"block": blocks.to_numpy(), "string": strings.to_numpy()})
+        .merge(distinct, on=["block", "string"], how="left")["canonical"]
+        .set_axis(strings.index)
+        .rename(strings.name)
+    )
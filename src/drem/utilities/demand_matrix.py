@@ -0,0 +1,161 @@
+"""Store long-form meter demands as a dense meters by timesteps matrix.
+
+A matrix of n meters by m half hours is saved in a directory as three .npy files:
+
+- demands.npy: float32 demands of shape (n, m), NaN where a meter has no reading
+- ids.npy: sorted meter ids labelling each row
+- datetimes.npy: sorted datetime64[ns] timestamps labelling each column
+
+so the demands of any sample of meters can be summed per half hour as a row-sum of
+a memory-mapped array rather than via a groupby.
+"""
+
+from functools import reduce
+from pathlib import Path
+from typing import Iterable
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from loguru import logger
+
+
+DEMANDS_FILENAME = "demands.npy"
+IDS_FILENAME = "ids.npy"
+DATETIMES_FILENAME = "datetimes.npy"
+
+
+def _read_row_groups(
+    dirpath: Path, columns: Iterable[str],
+) -> Iterable[Tuple[np.ndarray, ...]]:
+
+    for filepath in sorted(dirpath.rglob("*.parquet")):
+        parquet_file = pq.ParquetFile(filepath)
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group, columns=list(columns))
+            yield tuple(table.column(column).to_numpy() for column in columns)
+
+
+def _get_unique_ids(dirpath: Path, on: str) -> np.ndarray:
+
+    # Only the distinct ids of each row group are held in memory at once
+    return reduce(
+        np.union1d, (np.unique(ids) for (ids,) in _read_row_groups(dirpath, [on])),
+    )
+
+
+def _sum_by_cell(
+    rows: np.ndarray, columns: np.ndarray, values: np.ndarray, n_columns: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+    cells, cell_codes = np.unique(
+        rows.astype("int64") * n_columns + columns, return_inverse=True,
+    )
+    cell_rows, cell_columns = np.divmod(cells, n_columns)
+    return cell_rows, cell_columns, np.bincount(cell_codes, weights=values)
+
+
+def write_demand_matrix(
+    dirpath: Union[str, Path],
+    savedirpath: Union[str, Path],
+    datetimes: np.ndarray,
+    on: str = "id",
+) -> None:
+    """Write a long-form parquet dataset of demands to a dense memory-mapped matrix.
+
+    The dataset is read one row group at a time so only one row group & the pages
+    of the matrix being filled are held in memory.
+
+    Readings of a meter at the same timestamp are summed into one cell, as they are
+    by a groupby on datetime.  In the CRU data the two extra half hours (ids 49 &
+    50) of the day the clocks go back map onto 00:30 & 01:00 of the next day, so
+    those cells hold the sum of two different half hours.
+
+    Args:
+        dirpath (Union[str, Path]): Path to a parquet dataset with columns on,
+            'datetime' & 'demand'
+        savedirpath (Union[str, Path]): Path to directory where the matrix is saved
+        datetimes (np.ndarray): Timestamps of the matrix columns; readings at other
+            timestamps are skipped
+        on (str, optional): Name of meter id column. Defaults to "id".
+    """
+    dirpath = Path(dirpath)
+    savedirpath = Path(savedirpath)
+    savedirpath.mkdir(parents=True, exist_ok=True)
+
+    ids = _get_unique_ids(dirpath, on)
+    datetimes = np.unique(datetimes.astype("datetime64[ns]"))
+    np.save(savedirpath / IDS_FILENAME, ids)
+    np.save(savedirpath / DATETIMES_FILENAME, datetimes)
+
+    demands = np.lib.format.open_memmap(
+        savedirpath / DEMANDS_FILENAME,
+        mode="w+",
+        dtype="float32",
+        shape=(len(ids), len(datetimes)),
+    )
+    demands[:] = np.nan
+
+    for row_ids, row_datetimes, row_demands in _read_row_groups(
+        dirpath, [on, "datetime", "demand"],
+    ):
+        columns = np.searchsorted(datetimes, row_datetimes.astype("datetime64[ns]"))
+        is_on_a_column = columns < len(datetimes)
+        is_on_a_column[is_on_a_column] = (
+            datetimes[columns[is_on_a_column]] == row_datetimes[is_on_a_column]
+        )
+        is_on_a_column &= ~np.isnan(row_demands)
+        cell_rows, cell_columns, cell_demands = _sum_by_cell(
+            np.searchsorted(ids, row_ids[is_on_a_column]),
+            columns[is_on_a_column],
+            row_demands[is_on_a_column],
+            len(datetimes),
+        )
+        demands[cell_rows, cell_columns] = (
+            np.nan_to_num(demands[cell_rows, cell_columns]) + cell_demands
+        )
+
+    demands.flush()
+    logger.info(f"Wrote {len(ids)} x {len(datetimes)} demand matrix to {savedirpath}")
+
+
+def read_demand_matrix(
+    dirpath: Union[str, Path],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Read a demand matrix saved by write_demand_matrix without copying it.
+
+    The demands are memory-mapped read-only so slicing rows only reads their pages.
+
+    Example:
+        Sum the demands of a sample of meters per half hour,
+        demands, ids, datetimes = read_demand_matrix(dirpath)
+        np.nansum(demands[get_rows(ids, sample_ids)], axis=0)
+
+    Args:
+        dirpath (Union[str, Path]): Path to directory containing the matrix
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Demands (meters by half hours),
+            meter ids & datetimes
+    """
+    dirpath = Path(dirpath)
+    return (
+        np.load(dirpath / DEMANDS_FILENAME, mmap_mode="r"),
+        np.load(dirpath / IDS_FILENAME),
+        np.load(dirpath / DATETIMES_FILENAME),
+    )
+
+
+def get_rows(ids: np.ndarray, sample_ids: Iterable) -> np.ndarray:
+    """Get the matrix rows of a sample of meters.
+
+    Args:
+        ids (np.ndarray): Sorted meter ids of the matrix rows
+        sample_ids (Iterable): Meter ids, each of which must be in ids
+
+    Returns:
+        np.ndarray: Row number of each sampled meter
+    """
+    return np.searchsorted(ids, np.asarray(sample_ids))
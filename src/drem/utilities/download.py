@@ -1,47 +1,321 @@
+import hashlib
+import json
+import os
+import re
+
+from email.utils import formatdate
 from os import path
 from pathlib import Path
+from threading import Lock
 from typing import Any
+from typing import Dict
+from typing import Optional
 
 import requests
 
+from loguru import logger
 from prefect import Task
 from tqdm import tqdm
 
 
-def download_file_from_response(response: requests.Response, filepath: str) -> None:
+MANIFEST_LOCK = Lock()
+
+
+def _get_partial_filepath(filepath: str) -> str:
+
+    return f"{filepath}.part"
+
+
+def _get_validator_filepath(filepath: str) -> str:
+
+    return f"{filepath}.part.validator"
+
+
+def _save_validator(response: requests.Response, filepath: str) -> None:
+
+    # If-Range only accepts a strong ETag or a Last-Modified date
+    etag = response.headers.get("etag", "")
+    if etag and not etag.startswith("W/"):
+        validator = etag
+    else:
+        validator = response.headers.get("last-modified")
+
+    validator_filepath = _get_validator_filepath(filepath)
+    if validator:
+        with open(validator_filepath, "w") as validator_file:
+            validator_file.write(validator)
+    else:
+        _remove_validator(filepath)
+
+
+def _remove_validator(filepath: str) -> None:
+
+    validator_filepath = _get_validator_filepath(filepath)
+    if path.exists(validator_filepath):
+        os.remove(validator_filepath)
+
+
+def _get_range_headers(filepath: str) -> Dict[str, str]:
+
+    # A partial download is only resumed if the server can confirm via If-Range that
+    # the file is unchanged since it started, otherwise the whole file is sent again
+    partial_filepath = _get_partial_filepath(filepath)
+    validator_filepath = _get_validator_filepath(filepath)
+    if path.exists(partial_filepath) and path.exists(validator_filepath):
+        with open(validator_filepath, "r") as validator_file:
+            validator = validator_file.read()
+        return {
+            "Range": f"bytes={path.getsize(partial_filepath)}-",
+            "If-Range": validator,
+        }
+
+    return {}
+
+
+def _get_resume_position(response: requests.Response) -> int:
+
+    content_range = re.match(
+        r"bytes (\d+)-", response.headers.get("content-range", ""),
+    )
+    if response.status_code == 206 and content_range:
+        return int(content_range.group(1))
+
+    return 0
+
+
+def _get_sha256(filepath: str, block_size: int = 1024 * 1024) -> str:
+
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
+
+def _finalise_partial_download(
+    response: requests.Response, filepath: str, sha256: Optional[str],
+) -> bool:
+
+    # A server answers a Range request starting at the end of the file with a 416 so
+    # the partial download may already be complete
+    partial_filepath = _get_partial_filepath(filepath)
+    content_range = re.match(
+        r"bytes \*/(\d+)", response.headers.get("content-range", ""),
+    )
+    if sha256:
+        is_complete = _get_sha256(partial_filepath) == sha256.lower()
+    else:
+        is_complete = bool(content_range) and (
+            int(content_range.group(1)) == path.getsize(partial_filepath)
+        )
+
+    if is_complete:
+        os.replace(partial_filepath, filepath)
+    else:
+        logger.warning(f"Discarding {partial_filepath} as it cannot be resumed")
+        os.remove(partial_filepath)
+    _remove_validator(filepath)
+
+    return is_complete
+
+
+def download_file_from_response(
+    response: requests.Response, filepath: str, sha256: Optional[str] = None,
+) -> None:
     """Download file to filepath via a HTTP response from a POST or GET request.
 
+    Data is streamed to `<filepath>.part` which is only renamed to filepath once the
+    download completes, so an interrupted download is never mistaken for a complete
+    one. If the response is a `206 Partial Content` response to a `Range` request the
+    download resumes from where `<filepath>.part` left off, otherwise the ETag or
+    Last-Modified date of the response is saved so that an interrupted download can
+    later be resumed via an `If-Range` request.
+
     Args:
         response (requests.Response): A HTTP response from a POST or GET request
         filepath (str): Save path destination for downloaded file
+        sha256 (Optional[str], optional): Expected SHA-256 hex digest of the
+            downloaded file. Defaults to None.
+
+    Raises:
+        ValueError: If the downloaded file does not match the expected checksum
     """
+    partial_filepath = _get_partial_filepath(filepath)
+    resume_position = _get_resume_position(response)
+    if not resume_position:
+        _save_validator(response, filepath)
+
     total_size_in_bytes = int(response.headers.get("content-length", 0))
     block_size = 1024  # 1 Kilobyte
-    progress_bar = tqdm(total=total_size_in_bytes, unit="iB", unit_scale=True)
+    progress_bar = tqdm(
+        total=resume_position + total_size_in_bytes,
+        initial=resume_position,
+        unit="iB",
+        unit_scale=True,
+    )
 
-    with open(filepath, "wb") as save_destination:
+    mode = "r+b" if resume_position else "wb"
+    with open(partial_filepath, mode) as save_destination:
 
+        save_destination.seek(resume_position)
+        save_destination.truncate()
         for stream_data in response.iter_content(block_size):
             progress_bar.update(len(stream_data))
             save_destination.write(stream_data)
 
     progress_bar.close()
 
+    if sha256 and _get_sha256(partial_filepath) != sha256.lower():
+        os.remove(partial_filepath)
+        _remove_validator(filepath)
+        raise ValueError(f"{filepath} does not match SHA-256 checksum {sha256}!")
+
+    os.replace(partial_filepath, filepath)
+    _remove_validator(filepath)
+
+
+def _read_manifest(manifest_filepath: str) -> Dict[str, Dict[str, Any]]:
+
+    if path.exists(manifest_filepath):
+        with open(manifest_filepath, "r") as json_file:
+            return json.load(json_file)
+
+    return {}
+
+
+def _write_manifest(
+    manifest: Dict[str, Dict[str, Any]], manifest_filepath: str,
+) -> None:
+
+    temporary_filepath = f"{manifest_filepath}.tmp"
+    with open(temporary_filepath, "w") as json_file:
+        json.dump(manifest, json_file, indent=4, sort_keys=True)
+    os.replace(temporary_filepath, manifest_filepath)
+
+
+def _update_manifest(
+    manifest_filepath: str, url: str, response: requests.Response, filepath: str,
+) -> None:
+
+    with MANIFEST_LOCK:
+        manifest = _read_manifest(manifest_filepath)
+        manifest[url] = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "size": path.getsize(filepath),
+            "sha256": _get_sha256(filepath),
+        }
+
+        _write_manifest(manifest, manifest_filepath)
+
+
+def _seed_manifest(manifest_filepath: str, url: str, filepath: str) -> None:
 
-def download(url: str, filepath: Path) -> None:
+    # Files downloaded before the manifest existed are assumed to be up to date as
+    # of when they were last modified
+    with MANIFEST_LOCK:
+        manifest = _read_manifest(manifest_filepath)
+        manifest[url] = {
+            "etag": None,
+            "last_modified": formatdate(path.getmtime(filepath), usegmt=True),
+            "size": path.getsize(filepath),
+            "sha256": _get_sha256(filepath),
+        }
+        _write_manifest(manifest, manifest_filepath)
+
+
+def _get_conditional_headers(
+    manifest_filepath: str, url: str, filepath: str,
+) -> Dict[str, str]:
+
+    entry = _read_manifest(manifest_filepath).get(url)
+    if not entry or not path.exists(filepath):
+        return {}
+
+    # Local file no longer matches what was downloaded so fetch it again
+    if entry["size"] != path.getsize(filepath):
+        return {}
+
+    headers = {}
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    return headers
+
+
+def download(
+    url: str,
+    filepath: Path,
+    session: Optional[requests.Session] = None,
+    sha256: Optional[str] = None,
+    manifest_filepath: Optional[str] = None,
+) -> None:
     """Download a file from url to filepath.
 
     If no filepath is entered the file name will be inferred from the url
-    and saved to the 'external' dir in the data directory.
+    and saved to the 'external' dir in the data directory.  If a partial download
+    exists from a previous run it is resumed via a HTTP `Range` request which only
+    applies if the upstream file is unchanged (`If-Range`); if the server cannot
+    satisfy the range the partial download is kept if it is complete (its size or
+    SHA-256 match) or is otherwise discarded and downloaded again once.
+
+    If a manifest is used the ETag, Last-Modified, size and SHA-256 of each
+    download are recorded in it so that later downloads of the same url issue a
+    conditional GET and only transfer data if the upstream file has changed. A file
+    which already exists but is not in the manifest is not downloaded again but is
+    added to the manifest as last modified when the local file was.
 
     Args:
         url (str): url linking to data to be downloaded
         filepath (Path): Save destination for data
+        session (Optional[requests.Session], optional): A session to reuse pooled,
+            keep-alive connections across downloads. Defaults to None.
+        sha256 (Optional[str], optional): Expected SHA-256 hex digest of the
+            downloaded file. Defaults to None.
+        manifest_filepath (Optional[str], optional): Path to a JSON download
+            manifest. Defaults to None.
     """
-    with requests.get(url=url, stream=True) as response:
+    requester = session if session else requests
+
+    if (
+        manifest_filepath
+        and path.exists(filepath)
+        and url not in _read_manifest(manifest_filepath)
+    ):
+        logger.info(f"Adding existing {filepath} to {manifest_filepath}")
+        _seed_manifest(manifest_filepath, url, filepath)
+        return
+
+    headers = _get_range_headers(filepath)
+    if manifest_filepath:
+        headers = _get_conditional_headers(manifest_filepath, url, filepath) or headers
+
+    with requester.get(url=url, headers=headers, stream=True) as response:
+
+        if response.status_code == 304:
+            logger.info(f"Skipping download as {filepath} is up to date with {url}")
+            return
+
+        if response.status_code == 416 and path.exists(
+            _get_partial_filepath(filepath),
+        ):
+            is_downloaded = _finalise_partial_download(response, filepath, sha256)
+        else:
+            response.raise_for_status()
+            download_file_from_response(response, filepath, sha256=sha256)
+            is_downloaded = True
+
+    # The partial download was discarded so retry once without a Range request
+    if not is_downloaded:
+        with requester.get(url=url, stream=True) as response:
+            response.raise_for_status()
+            download_file_from_response(response, filepath, sha256=sha256)
 
-        response.raise_for_status()
-        download_file_from_response(response, filepath)
+    if manifest_filepath:
+        _update_manifest(manifest_filepath, url, response, filepath)
 
 
 def _raise_for_empty_arguments(*args):
@@ -69,7 +343,13 @@ class Download(Task):
     """
 
     def __init__(
-        self, url: str, dirpath: str, filename: str, **kwargs: Any,
+        self,
+        url: str,
+        dirpath: str,
+        filename: str,
+        sha256: Optional[str] = None,
+        manifest_filepath: Optional[str] = None,
+        **kwargs: Any,
     ):
         """Initialise 'Download' Task.
 
@@ -78,23 +358,33 @@ class Download(Task):
                 http://www.urltodata.ie/data.csv. Defaults to None.
             filename (str): Name of file to be downloaded
             dirpath (str): Path to save directory
+            sha256 (Optional[str], optional): Expected SHA-256 hex digest of the
+                downloaded file. Defaults to None.
+            manifest_filepath (Optional[str], optional): Path to a JSON download
+                manifest.  If set an existing file is only downloaded again if its
+                upstream source has changed.  Defaults to None.
             **kwargs (Any): see https://docs.prefect.io/core/concepts/tasks.html
         """
         self.url = url
         self.dirpath = dirpath
         self.filename = filename
+        self.sha256 = sha256
+        self.manifest_filepath = manifest_filepath
 
         super().__init__(**kwargs)
 
     def run(self) -> None:
         """Download data directly from URL to savepath."""
         savepath = path.join(self.dirpath, self.filename)
-        if path.exists(savepath):
+        if path.exists(savepath) and not self.manifest_filepath:
             self.logger.info(f"Skipping download as {savepath} exists!")
         else:
-            with requests.get(url=self.url, stream=True) as response:
-                response.raise_for_status()
-                download_file_from_response(response, savepath)
+            download(
+                url=self.url,
+                filepath=savepath,
+                sha256=self.sha256,
+                manifest_filepath=self.manifest_filepath,
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+import json
+
+from os import path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from zipfile import ZipFile
+
+import numpy as np
+import pandas as pd
+import prefect
+
+from prefect import Task
+
+
+INTEGER_DTYPES = ("int8", "int16", "int32", "int64")
+
+
+def _create_column_profile() -> Dict[str, Any]:
+
+    return {
+        "kinds": set(),
+        "has_missing_values": False,
+        "min": np.inf,
+        "max": -np.inf,
+        "is_integral": True,
+        "is_float32_safe": True,
+        "categories": set(),
+    }
+
+
+def _get_kind(values: pd.Series) -> str:
+
+    if pd.api.types.is_bool_dtype(values):
+        return "bool"
+    elif pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+
+    return "string"
+
+
+def _is_float32_safe(values: np.ndarray, max_decimals: int) -> bool:
+    """Check if values survive a round trip through float32 at their precision.
+
+    The precision of each column is taken to be the fewest decimal places (up to
+    max_decimals) that exactly reproduce its values, so 1234.56 is float32 safe
+    whereas 1234567.89 is not.
+
+    Args:
+        values (np.ndarray): Non-missing float64 values
+        max_decimals (int): Maximum number of decimal places to consider
+
+    Returns:
+        bool: True if values can be stored as float32 without losing precision
+    """
+    if np.abs(values).max() > np.finfo(np.float32).max:
+        return False
+
+    round_tripped = values.astype(np.float32).astype(np.float64)
+    for decimals in range(max_decimals + 1):
+        if np.array_equal(np.round(values, decimals), values):
+            return np.array_equal(np.round(round_tripped, decimals), values)
+
+    return False
+
+
+def _update_column_profile(
+    profile: Dict[str, Any], values: pd.Series, max_categories: int, max_decimals: int,
+) -> None:
+
+    non_missing_values = values.dropna()
+    profile["has_missing_values"] |= len(non_missing_values) < len(values)
+    if non_missing_values.empty:
+        return
+
+    kind = _get_kind(non_missing_values)
+    profile["kinds"].add(kind)
+
+    if kind == "numeric":
+        numbers = non_missing_values.to_numpy(dtype=np.float64)
+        profile["min"] = min(profile["min"], numbers.min())
+        profile["max"] = max(profile["max"], numbers.max())
+        profile["is_integral"] &= bool(np.all(np.mod(numbers, 1) == 0))
+        if not profile["is_integral"] and profile["is_float32_safe"]:
+            profile["is_float32_safe"] = _is_float32_safe(numbers, max_decimals)
+
+    elif kind == "string" and profile["categories"] is not None:
+        profile["categories"].update(non_missing_values.unique())
+        if len(profile["categories"]) > max_categories:
+            profile["categories"] = None
+
+
+def _get_integer_dtype(profile: Dict[str, Any]) -> Optional[str]:
+
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= profile["min"] and profile["max"] <= info.max:
+            # pandas' capitalised integer dtypes can hold missing values
+            return dtype.capitalize() if profile["has_missing_values"] else dtype
+
+    return None
+
+
+def _get_compact_dtype(profile: Dict[str, Any]) -> str:
+
+    kinds = profile["kinds"]
+    if not kinds:
+        return "float32"
+
+    elif kinds == {"bool"} and not profile["has_missing_values"]:
+        return "bool"
+
+    elif kinds == {"numeric"}:
+        integer_dtype = _get_integer_dtype(profile) if profile["is_integral"] else None
+        if integer_dtype:
+            return integer_dtype
+        return "float32" if profile["is_float32_safe"] else "float64"
+
+    return "string" if profile["categories"] is None else "category"
+
+
+def infer_compact_dtypes(
+    chunks: Iterable[pd.DataFrame], max_categories: int = 255, max_decimals: int = 6,
+) -> Dict[str, str]:
+    """Infer the narrowest safe dtype of each column in a single pass over chunks.
+
+    Integer columns are narrowed to the smallest integer dtype that fits their range
+    (a nullable 'Int' dtype if values are missing), floats to float32 where no
+    precision is lost and strings with few unique values to categories.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): DataFrames sharing the same columns such as
+            those returned by pandas.read_csv with chunksize
+        max_categories (int, optional): Maximum number of unique values for a string
+            column to be stored as a category. Defaults to 255.
+        max_decimals (int, optional): Maximum number of decimal places for a float
+            column to be stored as float32. Defaults to 6.
+
+    Returns:
+        Dict[str, str]: Maps column names to pandas dtypes
+    """
+    profiles: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunks:
+        for column, values in chunk.items():
+            profile = profiles.setdefault(column, _create_column_profile())
+            _update_column_profile(profile, values, max_categories, max_decimals)
+
+    return {column: _get_compact_dtype(profile) for column, profile in profiles.items()}
+
+
+class InferCompactDtypes(Task):
+    """Create prefect.Task to infer a compact dtypes json file from a raw csv file.
+
+    Args:
+        Task (prefect.Task): see  https://docs.prefect.io/core/concepts/tasks.html
+    """
+
+    def run(
+        self,
+        input_filepath: str,
+        output_filepath: str,
+        dtypes_filepath: Optional[str] = None,
+        filename: Optional[str] = None,
+        chunksize: int = 100000,
+        max_categories: int = 255,
+        **kwargs: Any,
+    ) -> None:
+        """Scan csv file once & save the narrowest safe dtype of each column to json.
+
+        The json file can be passed as the dtypes of BerPublicSearchToDaskParquet or
+        csv_to_parquet.
+
+        Args:
+            input_filepath (str): Path to input data
+            output_filepath (str): Path to output dtypes json file
+            dtypes_filepath (Optional[str], optional): Path to a dtypes json file used
+                to read the input data so that columns declared as 'string' are never
+                parsed as numbers. Defaults to None.
+            filename (Optional[str], optional): Name of the file within a zipped
+                input_filepath. Defaults to None.
+            chunksize (int, optional): Number of rows to read at a time. Defaults to
+                100000.
+            max_categories (int, optional): Maximum number of unique values for a
+                string column to be stored as a category. Defaults to 255.
+            **kwargs (Any): Passed to pandas.read_csv
+        """
+        logger = prefect.context.get("logger")
+        if path.exists(output_filepath):
+            logger.info(f"{output_filepath} already exists")
+            return
+
+        if dtypes_filepath:
+            with open(dtypes_filepath, "r") as json_file:
+                dtypes = json.load(json_file)
+            kwargs["dtype"] = {
+                column: "object"
+                for column, dtype in dtypes.items()
+                if dtype == "string"
+            }
+
+        if filename:
+            with ZipFile(input_filepath) as zipped_file, zipped_file.open(
+                filename,
+            ) as raw_file:
+                chunks = pd.read_csv(raw_file, chunksize=chunksize, **kwargs)
+                compact_dtypes = infer_compact_dtypes(chunks, max_categories)
+        else:
+            chunks = pd.read_csv(input_filepath, chunksize=chunksize, **kwargs)
+            compact_dtypes = infer_compact_dtypes(chunks, max_categories)
+
+        with open(output_filepath, "w") as json_file:
+            json.dump(compact_dtypes, json_file, indent=4)
@@ -1,10 +1,14 @@
 from pathlib import Path
 from typing import Any
+from typing import List
+from typing import Optional
 
 import geopandas as gpd
 
 from prefect import task
 
+from drem.load.parquet import write_parquet
+
 
 @task
 def to_crs(gdf: gpd.GeoDataFrame, **kwargs: Any) -> gpd.GeoDataFrame:
@@ -23,19 +27,23 @@ def to_crs(gdf: gpd.GeoDataFrame, **kwargs: Any) -> gpd.GeoDataFrame:
 
 
 @task
-def read_parquet(filepath: Path, **kwargs: Any) -> gpd.GeoDataFrame:
+def read_parquet(
+    filepath: Path, columns: Optional[List[str]] = None, **kwargs: Any,
+) -> gpd.GeoDataFrame:
     """Load a Parquet object from the file path, returning a GeoDataFrame.
 
     See https://geopandas.org/reference/geopandas.read_parquet.html
 
     Args:
         filepath (Path): Path to file
+        columns (Optional[List[str]], optional): Names of columns to read, which must
+            include a geometry column. Defaults to None which reads all columns.
         **kwargs (Any): Passed to geopandas.read_parquet
 
     Returns:
         gpd.GeoDataFrame: GeoDataFrame
     """
-    return gpd.read_parquet(filepath, **kwargs)
+    return gpd.read_parquet(filepath, columns=columns, **kwargs)
 
 
 @task
@@ -54,7 +62,7 @@ def to_parquet(
     Returns:
         gpd.GeoDataFrame: GeoDataFrame
     """
-    return gdf.to_parquet(filepath, **kwargs)
+    return write_parquet(gdf, filepath, **kwargs)
 
 
 @task
@@ -0,0 +1,183 @@
+import json
+import re
+
+from os import path
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+
+from loguru import logger
+from lxml import etree
+
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def _get_text(element: etree._Element) -> str:
+
+    return re.sub(r"\s+", " ", "".join(element.itertext())).strip()
+
+
+def _get_table_title(table: etree._Element, heading: Optional[str]) -> str:
+
+    caption = table.find("caption")
+    if caption is not None:
+        return _get_text(caption)
+
+    first_row = next(table.iter("tr"), None)
+    if first_row is not None:
+        return _get_text(first_row)
+
+    return heading or ""
+
+
+def _get_table_rows(table: etree._Element) -> List[List[str]]:
+
+    rows = []
+    for row in table.iter("tr"):
+        cells = []
+        for cell in row.iterchildren("td", "th"):
+            # Repeat spanned cells as pandas.read_html does
+            cells += [_get_text(cell)] * int(cell.get("colspan", 1))
+        rows.append(cells)
+
+    return rows
+
+
+def _remove_thousands_separators(
+    df: pd.DataFrame, thousands: Optional[str],
+) -> pd.DataFrame:
+
+    if not thousands:
+        return df
+
+    separator = re.escape(thousands)
+    number = re.compile(rf"^-?\d{{1,3}}({separator}\d{{3}})+(\.\d+)?$")
+    return df.applymap(
+        lambda cell: cell.replace(thousands, "")
+        if isinstance(cell, str) and number.match(cell)
+        else cell,
+    )
+
+
+def _convert_rows_to_dataframe(
+    rows: List[List[str]], thousands: Optional[str],
+) -> pd.DataFrame:
+
+    df = pd.DataFrame(rows)
+    return df.mask(df.isna() | df.eq("")).pipe(_remove_thousands_separators, thousands)
+
+
+def _get_cache_filepath(filepath: Union[str, Path]) -> Path:
+
+    return Path(filepath).with_suffix(".tables.json")
+
+
+def _read_cache(
+    cache_filepath: Path, filepath: Union[str, Path], titles: Dict[str, str],
+) -> Optional[Dict[str, List[List[str]]]]:
+
+    if not path.exists(cache_filepath) or (
+        path.getmtime(cache_filepath) < path.getmtime(filepath)
+    ):
+        return None
+
+    with open(cache_filepath, "r") as json_file:
+        cache = json.load(json_file)
+
+    if cache["titles"] != titles:
+        return None
+
+    return cache["tables"]
+
+
+def _extract_table_rows(
+    filepath: Union[str, Path], titles: Dict[str, str],
+) -> Dict[str, List[List[str]]]:
+
+    patterns = {name: re.compile(title) for name, title in titles.items()}
+    tables: Dict[str, List[List[str]]] = {}
+    heading = None
+
+    for _, element in etree.iterparse(
+        str(filepath), events=("end",), tag=("table",) + HEADING_TAGS, html=True,
+    ):
+        if element.tag in HEADING_TAGS:
+            heading = _get_text(element)
+            continue
+
+        title = _get_table_title(element, heading)
+        for name, pattern in patterns.items():
+            if name not in tables and (
+                pattern.search(title) or (heading and pattern.search(heading))
+            ):
+                tables[name] = _get_table_rows(element)
+                break
+
+        # Free each parsed table as only the matching tables are kept
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        if len(tables) == len(patterns):
+            break
+
+    missing_tables = set(titles) - set(tables)
+    if missing_tables:
+        raise ValueError(
+            f"No tables in {filepath} match {[titles[n] for n in missing_tables]}!",
+        )
+
+    return tables
+
+
+def read_html_tables(
+    filepath: Union[str, Path], titles: Dict[str, str], thousands: Optional[str] = ",",
+) -> Dict[str, pd.DataFrame]:
+    """Read only the HTML tables whose title matches a pattern into DataFrames.
+
+    The HTML is parsed once by a streaming lxml parser which discards each table as
+    soon as it has been checked.  A table's title is its <caption>, or its first
+    row if it has no caption; a table also matches if the heading preceding it does.
+    Like pandas.read_html every cell is read as text, spanned cells are repeated,
+    thousands separators are removed from numbers and empty cells are read as NaN.
+
+    The matched tables are cached in a json file beside filepath (e.g.
+    cso_gas_2019.tables.json) which is reused until filepath or titles change.
+
+    Example:
+        Read Table 4B of the CSO Networked Gas Consumption release,
+        read_html_tables(
+            "cso_gas_2019.html",
+            titles={"residential": "Consumption by Dublin Postal District for Res"},
+        )["residential"]
+
+    Args:
+        filepath (Union[str, Path]): Path to HTML file
+        titles (Dict[str, str]): Maps names to regular expressions matching the title
+            of each table to be read; the first table to match is read
+        thousands (Optional[str], optional): Thousands separator. Defaults to ",".
+
+    Raises:
+        ValueError: If a title matches no table
+
+    Returns:
+        Dict[str, pd.DataFrame]: Maps names to tables
+    """
+    cache_filepath = _get_cache_filepath(filepath)
+    tables = _read_cache(cache_filepath, filepath, titles)
+
+    if tables is None:
+        logger.info(f"Extracting {list(titles)} tables from {filepath}")
+        tables = _extract_table_rows(filepath, titles)
+        with open(cache_filepath, "w") as json_file:
+            json.dump({"titles": titles, "tables": tables}, json_file)
+
+    return {
+        name: _convert_rows_to_dataframe(rows, thousands)
+        for name, rows in tables.items()
+    }
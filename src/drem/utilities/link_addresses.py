@@ -0,0 +1,169 @@
+"""Link records in two data sets by their parsed addresses.
+
+Rather than comparing every pair of records, an inverted index maps each blocking
+key (such as a road & house number) to the records containing it so only records
+sharing at least one key are scored.
+"""
+
+from typing import List
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from icontract import require
+
+from drem.utilities.dedupe import get_tfidf_matrix
+
+
+BLOCKING_KEYS: List[List[str]] = [
+    ["road", "house_number"],
+    ["house"],
+    ["road", "postcode"],
+]
+
+
+def _get_blocking_keys(
+    df: pd.DataFrame, id_column: str, blocking_keys: List[List[str]],
+) -> pd.DataFrame:
+
+    keys = [pd.DataFrame({"id": df[id_column].iloc[:0], "key": pd.Series(dtype=str)})]
+    for key_number, columns in enumerate(blocking_keys):
+        components = df.dropna(subset=columns)
+        key = (
+            components[columns[0]]
+            .astype(str)
+            .str.cat(
+                [components[column].astype(str) for column in columns[1:]], sep="|",
+            )
+        )
+        keys.append(
+            pd.DataFrame(
+                {"id": components[id_column].to_numpy(), "key": f"{key_number}:" + key},
+            ),
+        )
+
+    return pd.concat(keys, ignore_index=True).drop_duplicates()
+
+
+def _build_inverted_index(
+    keys: pd.DataFrame, max_records_per_key: Optional[int],
+) -> pd.DataFrame:
+
+    if max_records_per_key is None:
+        return keys
+
+    # Drop keys such as 'dublin 2' shared by so many records that they don't help
+    records_per_key = keys.groupby("key")["id"].transform("size")
+    return keys[records_per_key <= max_records_per_key]
+
+
+def _get_candidates(
+    left_keys: pd.DataFrame, inverted_index: pd.DataFrame,
+) -> pd.DataFrame:
+
+    return (
+        left_keys.merge(inverted_index, on="key", suffixes=("_left", "_right"))
+        .loc[:, ["id_left", "id_right"]]
+        .drop_duplicates(ignore_index=True)
+    )
+
+
+def _score_candidates(
+    candidates: pd.DataFrame,
+    left_addresses: pd.Series,
+    right_addresses: pd.Series,
+    chunk_size: int,
+) -> np.ndarray:
+
+    matrix = get_tfidf_matrix(
+        pd.concat([left_addresses, right_addresses], ignore_index=True),
+    )
+    left_rows = left_addresses.index.get_indexer(candidates["id_left"])
+    right_rows = len(left_addresses) + right_addresses.index.get_indexer(
+        candidates["id_right"],
+    )
+
+    scores = [np.empty(0)]
+    for start in range(0, len(candidates), chunk_size):
+        end = start + chunk_size
+        similarities = matrix[left_rows[start:end]].multiply(
+            matrix[right_rows[start:end]],
+        )
+        scores.append(np.asarray(similarities.sum(axis=1)).ravel())
+
+    return np.concatenate(scores)
+
+
+@require(lambda left_id, right_id: left_id != right_id)
+def link_addresses(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    left_id: str,
+    right_id: str,
+    address_column: str,
+    blocking_keys: Optional[List[List[str]]] = None,
+    max_records_per_key: Optional[int] = 100,
+    min_score: float = 0.5,
+    chunk_size: int = 100000,
+) -> pd.DataFrame:
+    """Link each left record to the right records with similar addresses.
+
+    Candidate links are found by looking up each left record's blocking keys in an
+    inverted index of the right records' keys, & are then scored by the cosine
+    similarity of the TF-IDF weighted character n-grams of their addresses.
+
+    Example:
+        Link M&R buildings to Valuation Office properties,
+        link_addresses(
+            m_and_r, vo, left_id="mprn", right_id="vo_id",
+            address_column="standardised_address",
+        )
+
+    Args:
+        left (pd.DataFrame): Records to be linked containing id, address & parsed
+            address component columns such as those of libpostal.parse_address
+        right (pd.DataFrame): Records to be linked to
+        left_id (str): Name of column uniquely identifying each left record
+        right_id (str): Name of column uniquely identifying each right record
+        address_column (str): Name of full address column in left & right
+        blocking_keys (Optional[List[List[str]]], optional): Combinations of address
+            component columns that candidates must share; combinations with columns
+            missing from left or right are skipped. Defaults to None which uses
+            BLOCKING_KEYS.
+        max_records_per_key (Optional[int], optional): Skip keys shared by more right
+            records than this. Defaults to 100.
+        min_score (float, optional): Minimum score of a link. Defaults to 0.5.
+        chunk_size (int, optional): Number of candidates scored at once. Defaults to
+            100000.
+
+    Returns:
+        pd.DataFrame: Link table of left_id, right_id & score, sorted by left_id &
+            descending score
+    """
+    if blocking_keys is None:
+        blocking_keys = BLOCKING_KEYS
+    columns = set(left.columns) & set(right.columns)
+    blocking_keys = [key for key in blocking_keys if set(key).issubset(columns)]
+
+    left = left.drop_duplicates(subset=left_id)
+    right = right.drop_duplicates(subset=right_id)
+
+    inverted_index = _build_inverted_index(
+        _get_blocking_keys(right, right_id, blocking_keys), max_records_per_key,
+    )
+    candidates = _get_candidates(
+        _get_blocking_keys(left, left_id, blocking_keys), inverted_index,
+    )
+    candidates["score"] = _score_candidates(
+        candidates,
+        pd.Series(left[address_column].to_numpy(), index=left[left_id]),
+        pd.Series(right[address_column].to_numpy(), index=right[right_id]),
+        chunk_size,
+    )
+
+    return (
+        candidates[candidates["score"] >= min_score]
+        .rename(columns={"id_left": left_id, "id_right": right_id})
+        .sort_values([left_id, "score"], ascending=[True, False], ignore_index=True)
+    )
@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import Any
 from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import Union
 
 import pandas as pd
@@ -133,20 +134,41 @@ class Rename(Task):
         return df.rename(**kwargs)
 
 
+@task
+def astype(df: pd.DataFrame, **kwargs: Any) -> pd.DataFrame:
+    """Cast a pandas object to a specified dtype.
+
+    See https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.astype.html
+
+    Args:
+        df (pd.DataFrame): Any DataFrame
+        **kwargs (Any): Passed to pandas.DataFrame.astype
+
+    Returns:
+        pd.DataFrame: DataFrame cast to dtype
+    """
+    return df.astype(**kwargs)
+
+
 @task(name="Read Parquet file")
-def read_parquet(filepath: Path, **kwargs: Any) -> pd.DataFrame:
+def read_parquet(
+    filepath: Path, columns: Optional[List[str]] = None, **kwargs: Any,
+) -> pd.DataFrame:
     """Load a parquet object from the file path, returning a DataFrame.
 
     See https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_parquet.html
 
     Args:
         filepath (Path): Path to file
+        columns (Optional[List[str]], optional): Names of columns to read so that
+            only these columns are loaded from disk. Defaults to None which reads
+            all columns.
         **kwargs (Any): Passed to pandas.read_parquet
 
     Returns:
         pd.DataFrame: DataFrame
     """
-    return pd.read_parquet(filepath, **kwargs)
+    return pd.read_parquet(filepath, columns=columns, **kwargs)
 
 
 @task(name="Read HTML File")
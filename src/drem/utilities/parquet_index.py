@@ -0,0 +1,123 @@
+from os import path
+from pathlib import Path
+from typing import Iterable
+from typing import Union
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from loguru import logger
+
+from drem.load.parquet import write_parquet
+
+
+def get_index_filepath(dirpath: Union[str, Path]) -> Path:
+    """Get the path of the sidecar index of a parquet dataset.
+
+    Example:
+        data/processed/SM_electricity is indexed at
+        data/processed/SM_electricity.index.parquet
+
+    Args:
+        dirpath (Union[str, Path]): Path to a parquet dataset directory
+
+    Returns:
+        Path: Path to the sidecar index
+    """
+    return Path(f"{dirpath}.index.parquet")
+
+
+def write_parquet_index(dirpath: Union[str, Path], on: str) -> None:
+    """Index which file & row group of a parquet dataset contains each value of on.
+
+    Only column on is read.  The index is most effective (& smallest) if the dataset
+    is sorted by on so each value is contained by only one or two row groups.
+
+    Args:
+        dirpath (Union[str, Path]): Path to a parquet dataset directory
+        on (str): Name of the column to index such as a meter id
+    """
+    dirpath = Path(dirpath)
+    row_groups = []
+    for filepath in sorted(dirpath.rglob("*.parquet")):
+        parquet_file = pq.ParquetFile(filepath)
+        for row_group in range(parquet_file.num_row_groups):
+            values = (
+                parquet_file.read_row_group(row_group, columns=[on])
+                .column(on)
+                .to_pandas()
+                .unique()
+            )
+            row_groups.append(
+                pd.DataFrame(
+                    {
+                        on: values,
+                        "filepath": str(filepath.relative_to(dirpath)),
+                        "row_group": row_group,
+                    },
+                ),
+            )
+
+    write_parquet(
+        pd.concat(row_groups, ignore_index=True),
+        get_index_filepath(dirpath),
+        sort_by=[on],
+    )
+
+
+def has_parquet_index(dirpath: Union[str, Path]) -> bool:
+    """Check if a parquet dataset has an index newer than its files.
+
+    Args:
+        dirpath (Union[str, Path]): Path to a parquet dataset directory
+
+    Returns:
+        bool: True if the dataset has an up to date index
+    """
+    index_filepath = get_index_filepath(dirpath)
+    if not path.exists(index_filepath):
+        return False
+
+    last_modified = max(
+        (path.getmtime(filepath) for filepath in Path(dirpath).rglob("*.parquet")),
+        default=0,
+    )
+    return path.getmtime(index_filepath) >= last_modified
+
+
+def read_parquet_by_index(
+    dirpath: Union[str, Path], on: str, values: Iterable,
+) -> pd.DataFrame:
+    """Read only the rows of a parquet dataset whose column on contains values.
+
+    Only the row groups listed by the dataset's index (see write_parquet_index) as
+    containing values are read.
+
+    Args:
+        dirpath (Union[str, Path]): Path to an indexed parquet dataset directory
+        on (str): Name of the indexed column such as a meter id
+        values (Iterable): Values to be read
+
+    Returns:
+        pd.DataFrame: Rows whose column on contains values
+    """
+    dirpath = Path(dirpath)
+    values = pd.unique(pd.Series(values))
+    index = pd.read_parquet(get_index_filepath(dirpath))
+    row_groups = index[index[on].isin(values)].drop_duplicates(
+        subset=["filepath", "row_group"],
+    )
+    logger.debug(f"Reading {len(row_groups)} row groups of {dirpath}")
+
+    tables = [
+        pq.ParquetFile(dirpath / filepath)
+        .read_row_groups(sorted(file_row_groups["row_group"]))
+        .to_pandas()
+        for filepath, file_row_groups in row_groups.groupby("filepath")
+    ]
+    if not tables:
+        schema = pq.read_schema(next(dirpath.rglob("*.parquet")))
+        return schema.empty_table().to_pandas()
+
+    df = pd.concat(tables, ignore_index=True)
+    return df[df[on].isin(values)].reset_index(drop=True)
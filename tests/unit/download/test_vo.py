@@ -0,0 +1,60 @@
+import re
+
+from os import listdir
+from pathlib import Path
+
+import responses
+
+from drem.download.vo import VO_CATEGORIES
+from drem.download.vo import _download_by_local_authority
+
+
+@responses.activate
+def test_download_by_local_authority_saves_a_file_per_category(tmp_path: Path) -> None:
+    """Save one file for each local authority & category.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    responses.add(
+        responses.GET,
+        re.compile(r"https://api\.valoff\.ie/.*"),
+        body="Address 1,Area\n2-4 Crown Alley,45\n",
+        status=200,
+    )
+
+    failed_downloads = _download_by_local_authority(
+        str(tmp_path), ["FINGAL COUNTY COUNCIL", "DUBLIN CITY COUNCIL"], max_workers=4,
+    )
+
+    assert failed_downloads == {}
+    assert len(listdir(tmp_path)) == 2 * len(VO_CATEGORIES)
+    assert "FINGAL COUNTY COUNCIL - FUEL or DEPOT.csv" in listdir(tmp_path)
+
+
+@responses.activate
+def test_download_by_local_authority_reports_failed_downloads(tmp_path: Path) -> None:
+    """Report failed downloads rather than raising.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    responses.add(
+        responses.GET,
+        re.compile(r"https://api\.valoff\.ie/.*CategorySelected=OFFICE&.*"),
+        status=404,
+    )
+    responses.add(
+        responses.GET,
+        re.compile(r"https://api\.valoff\.ie/.*"),
+        body="Address 1,Area\n2-4 Crown Alley,45\n",
+        status=200,
+    )
+
+    failed_downloads = _download_by_local_authority(
+        str(tmp_path), ["FINGAL COUNTY COUNCIL"], max_workers=4,
+    )
+
+    failed_filepath = str(tmp_path / "FINGAL COUNTY COUNCIL - OFFICE.csv")
+    assert list(failed_downloads.keys()) == [failed_filepath]
+    assert len(listdir(tmp_path)) == len(VO_CATEGORIES) - 1
@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import dask.dataframe as dd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from drem.load.parquet import get_parquet_write_profile
+from drem.load.parquet import rewrite_parquet
+from drem.load.parquet import write_dask_parquet
+from drem.load.parquet import write_parquet
+from drem.load.parquet import write_parquet_in_chunks
+from drem.load.parquet import write_partitioned_parquet
+
+
+def test_get_parquet_write_profile_ignores_unset_overrides() -> None:
+    """Fall back to the profile for overrides set to None."""
+    output = get_parquet_write_profile(compression_level=19, row_group_size=None)
+
+    assert output["compression"] == "zstd"
+    assert output["compression_level"] == 19
+    assert output["row_group_size"] is not None
+
+
+def test_write_parquet_sorts_rows_and_compresses(tmp_path: Path) -> None:
+    """Write sorted rows with the project compression codec.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "data.parquet"
+    data = pd.DataFrame({"small_area": [3, 1, 2], "value": ["c", "a", "b"]})
+    expected_output = pd.DataFrame({"small_area": [1, 2, 3], "value": ["a", "b", "c"]})
+
+    write_parquet(data, filepath, sort_by=["small_area"])
+
+    column_metadata = pq.ParquetFile(filepath).metadata.row_group(0).column(0)
+    assert column_metadata.compression == "ZSTD"
+    assert_frame_equal(pd.read_parquet(filepath), expected_output)
+
+
+def test_rewrite_parquet_applies_new_row_group_size(tmp_path: Path) -> None:
+    """Rewrite an existing file in place under a new write profile.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "data.parquet"
+    data = pd.DataFrame({"small_area": [1, 2, 3, 4]})
+    data.to_parquet(filepath, compression="snappy")
+
+    rewrite_parquet(filepath, row_group_size=2)
+
+    assert pq.ParquetFile(filepath).num_row_groups == 2
+    assert_frame_equal(pd.read_parquet(filepath), data)
+
+
+def test_write_partitioned_parquet_replaces_existing_partitions(
+    tmp_path: Path,
+) -> None:
+    """Write one directory per partition value, dropping stale partitions.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "gas.parquet"
+    write_partitioned_parquet(
+        pd.DataFrame({"postcodes": ["Dublin 1"], "year": [2010], "gas_gwh": [1.0]}),
+        dirpath,
+        partition_col="year",
+    )
+    data = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 2", "Dublin 1", "Dublin 1"],
+            "year": [2019, 2019, 2011],
+            "gas_gwh": [3.0, 2.0, 1.0],
+        },
+    )
+    expected_output = pd.DataFrame(
+        {"postcodes": ["Dublin 1", "Dublin 2"], "gas_gwh": [2.0, 3.0]},
+    )
+
+    write_partitioned_parquet(
+        data, dirpath, partition_col="year", sort_by=["postcodes"],
+    )
+
+    assert sorted(p.name for p in dirpath.iterdir()) == ["year=2011", "year=2019"]
+    assert_frame_equal(
+        pd.read_parquet(dirpath / "year=2019" / "part.0.parquet"), expected_output,
+    )
+
+
+def test_write_parquet_in_chunks_replaces_stale_partitioned_datasets(
+    tmp_path: Path,
+) -> None:
+    """Discard a dataset left by a crashed run & replace an existing dataset.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "ber.parquet"
+    data = pd.DataFrame({"county": ["Dublin 1", "Co. Cork"], "value": [1, 2]})
+    write_parquet_in_chunks([data], str(filepath), partition_cols=["county"])
+    # A crashed run leaves a partially written dataset behind
+    write_parquet_in_chunks([data], f"{filepath}.part", partition_cols=["county"])
+
+    write_parquet_in_chunks([data], str(filepath), partition_cols=["county"])
+
+    assert len(pd.read_parquet(filepath)) == 2
+    assert not Path(f"{filepath}.part").exists()
+
+
+def test_write_parquet_in_chunks_writes_empty_file_from_schema(tmp_path: Path) -> None:
+    """Write a file with no rows if there are no chunks but a schema is given.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "data.parquet"
+    schema = pa.schema([("small_area", pa.int64())])
+
+    write_parquet_in_chunks([], str(filepath), schema=schema)
+
+    assert pq.read_table(filepath).schema.equals(schema)
+    assert pq.read_table(filepath).num_rows == 0
+
+
+def test_write_parquet_in_chunks_raises_error_if_no_chunks_or_schema(
+    tmp_path: Path,
+) -> None:
+    """Raise a clear error rather than renaming a file that was never written.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    with pytest.raises(ValueError):
+        write_parquet_in_chunks([], str(tmp_path / "data.parquet"))
+
+
+def test_write_dask_parquet_replaces_existing_dataset(tmp_path: Path) -> None:
+    """Delete part files of an existing dataset rather than mixing them with new ones.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "data.parquet"
+    data = pd.DataFrame({"small_area": [1, 2, 3, 4]})
+    write_dask_parquet(dd.from_pandas(data, npartitions=2), dirpath)
+
+    write_dask_parquet(dd.from_pandas(data.iloc[:1], npartitions=1), dirpath)
+
+    assert len(pd.read_parquet(dirpath)) == 1
@@ -14,6 +14,9 @@ from drem.plot.elec_diversity_curve import _calculate_relative_peak_demand
 from drem.plot.elec_diversity_curve import _extract_sample
 from drem.plot.elec_diversity_curve import _get_random_sample
 from drem.plot.elec_diversity_curve import _get_unique_column_values
+from drem.plot.elec_diversity_curve import get_percentile_bands
+from drem.plot.elec_diversity_curve import simulate_relative_peak_demands
+from drem.utilities.parquet_index import write_parquet_index
 
 
 def test_get_unique_column_values() -> None:
@@ -89,6 +92,31 @@ def test_extract_sample() -> None:
     assert_frame_equal(output, expected_output)
 
 
+def test_extract_sample_reads_indexed_row_groups(tmp_path: Path) -> None:
+    """Get sample data via the dataset index rather than scanning the DataFrame.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "SM_electricity"
+    mkdir(dirpath)
+    elec_demands = pd.DataFrame(
+        {
+            "id": pd.Series([1000, 1392, 1392], dtype="int16"),
+            "demand": pd.Series([1, 0.14, 0.138], dtype="float32"),
+        },
+    )
+    elec_demands.to_parquet(dirpath / "part.0.parquet", row_group_size=1)
+    write_parquet_index(dirpath, on="id")
+    expected_output = elec_demands.iloc[1:].reset_index(drop=True)
+
+    output = _extract_sample.run(
+        elec_demands.iloc[:0], on="id", ids=np.array([1392]), dirpath=dirpath,
+    )
+
+    assert_frame_equal(output, expected_output)
+
+
 def test_calculate_relative_peak_demand() -> None:
     """Calculate peak demand of time-series relative to sample size."""
     sample_demand = pd.DataFrame(
@@ -113,3 +141,60 @@ def test_calculate_relative_peak_demand() -> None:
     )
 
     assert output == expected_output
+
+
+def test_simulate_relative_peak_demands_of_every_meter_equal_peak_demand() -> None:
+    """Relative peak demand of identical meters is their peak demand."""
+    demands = np.array([[0.14, np.nan, 0.138], [0.14, np.nan, 0.138]], dtype="float32")
+    expected_output = pd.DataFrame(
+        {
+            "sample_size": [1, 1, 1, 2, 2, 2],
+            "simulation": [0, 1, 2, 0, 1, 2],
+            "relative_peak_demand": 0.14,
+        },
+    )
+
+    output = simulate_relative_peak_demands(
+        demands, sample_sizes=[1, 2], number_of_simulations=3, chunk_size=2,
+    )
+
+    assert_frame_equal(output, expected_output)
+
+
+def test_simulate_relative_peak_demands_sums_coincident_demands() -> None:
+    """Sum demands of distinct sampled meters in each half hour before the peak."""
+    demands = np.array([[1, 2], [3, 1]], dtype="float32")
+
+    output = simulate_relative_peak_demands(
+        demands, sample_sizes=[2], number_of_simulations=50, seed=1,
+    )
+
+    assert set(output["relative_peak_demand"]) == {2}
+
+
+def test_simulate_relative_peak_demands_raises_error_if_sample_exceeds_meters() -> None:
+    """Raise error if there are too few meters to draw a sample of distinct meters."""
+    demands = np.array([[1, 2], [3, 1]], dtype="float32")
+
+    with pytest.raises(ValueError):
+        simulate_relative_peak_demands(
+            demands, sample_sizes=[3], number_of_simulations=1,
+        )
+
+
+def test_get_percentile_bands() -> None:
+    """Summarise relative peak demands of simulations by sample size."""
+    simulations = pd.DataFrame(
+        {
+            "sample_size": [1, 1, 1, 2, 2, 2],
+            "simulation": [0, 1, 2, 0, 1, 2],
+            "relative_peak_demand": [1.0, 2.0, 3.0, 1.0, 1.0, 1.0],
+        },
+    )
+    expected_output = pd.DataFrame(
+        {"sample_size": [1, 2], "mean": [2.0, 1.0], "percentile_50": [2.0, 1.0]},
+    )
+
+    output = get_percentile_bands(simulations, percentiles=[50])
+
+    assert_frame_equal(output, expected_output)
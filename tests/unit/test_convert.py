@@ -0,0 +1,156 @@
+import json
+
+from pathlib import Path
+from zipfile import ZipFile
+
+import pandas as pd
+
+from pandas.testing import assert_frame_equal
+
+from drem.convert import BerPublicSearchToDaskParquet
+from drem.convert import BerPublicSearchZipToParquet
+from drem.convert import _convert_ber_publicsearch_to_parquet_via_arrow
+
+
+def test_ber_publicsearch_zip_to_parquet_matches_zipped_txt(tmp_path: Path) -> None:
+    """Stream zipped txt file to parquet in chunks without extracting it.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "BERPublicsearch.zip"
+    output_filepath = tmp_path / "BERPublicsearch.parquet"
+    dtypes_filepath = tmp_path / "BERPublicsearch.json"
+    with ZipFile(input_filepath, "w") as zipped_file:
+        zipped_file.writestr(
+            "BERPublicsearch.txt",
+            "CountyName\tYear_of_Construction\nDublin 1\t1891\nCo. Cork\t2005\n"
+            + "Dublin 8\t2015\n",
+        )
+    with open(dtypes_filepath, "w") as json_file:
+        json.dump({"Year_of_Construction": "float64"}, json_file)
+    expected_output = pd.DataFrame(
+        {
+            "CountyName": ["Dublin 1", "Co. Cork", "Dublin 8"],
+            "Year_of_Construction": [1891.0, 2005.0, 2015.0],
+        },
+    )
+
+    convert_ber = BerPublicSearchZipToParquet()
+    convert_ber.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        dtypes_filepath=dtypes_filepath,
+        chunksize=2,
+    )
+
+    assert_frame_equal(pd.read_parquet(output_filepath), expected_output)
+
+
+def test_ber_publicsearch_to_parquet_via_arrow_skips_malformed_lines(
+    tmp_path: Path,
+) -> None:
+    """Convert latin-1 txt file to parquet via arrow & skip malformed lines.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "BERPublicsearch.txt"
+    output_filepath = tmp_path / "BERPublicsearch.parquet"
+    dtypes_filepath = tmp_path / "BERPublicsearch.json"
+    with open(input_filepath, "w", encoding="latin-1") as txt_file:
+        txt_file.write(
+            "CountyName\tYear_of_Construction\tEnergyRating\n"
+            + "Dublin 1\t1891\tA1\nCo. Dún Laoghaire\t2005\t\nDublin 8\t2015\tB2\textra\n",
+        )
+    with open(dtypes_filepath, "w") as json_file:
+        json.dump(
+            {"Year_of_Construction": "int16", "EnergyRating": "category"}, json_file,
+        )
+    expected_output = pd.DataFrame(
+        {
+            "CountyName": ["Dublin 1", "Co. Dún Laoghaire"],
+            "Year_of_Construction": pd.Series([1891, 2005], dtype="int16"),
+            "EnergyRating": pd.Categorical(["A1", None]),
+        },
+    )
+
+    convert_ber = BerPublicSearchToDaskParquet()
+    convert_ber.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        dtypes_filepath=dtypes_filepath,
+        engine="pyarrow",
+    )
+
+    assert_frame_equal(pd.read_parquet(output_filepath), expected_output)
+
+
+def test_ber_publicsearch_zip_to_parquet_partitions_by_county(tmp_path: Path) -> None:
+    """Write one Hive partition per county so counties can be read selectively.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "BERPublicsearch.zip"
+    output_filepath = tmp_path / "BERPublicsearch.parquet"
+    dtypes_filepath = tmp_path / "BERPublicsearch.json"
+    with ZipFile(input_filepath, "w") as zipped_file:
+        zipped_file.writestr(
+            "BERPublicsearch.txt",
+            "CountyName\tYear_of_Construction\nDublin 1\t1891\nCo. Cork\t2005\n"
+            + "Dublin 1\t2015\n",
+        )
+    with open(dtypes_filepath, "w") as json_file:
+        json.dump({"Year_of_Construction": "float64"}, json_file)
+    expected_output = pd.DataFrame({"Year_of_Construction": [1891.0, 2015.0]})
+
+    convert_ber = BerPublicSearchZipToParquet()
+    convert_ber.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        dtypes_filepath=dtypes_filepath,
+        chunksize=2,
+        partition_cols=["CountyName"],
+    )
+
+    output = pd.read_parquet(
+        output_filepath, filters=[("CountyName", "==", "Dublin 1")],
+    ).drop(columns="CountyName")
+    # Chunk files within a partition are uniquely named so are read in any order
+    sorted_output = output.sort_values("Year_of_Construction").reset_index(drop=True)
+    assert_frame_equal(sorted_output, expected_output)
+
+
+def test_convert_ber_publicsearch_to_parquet_via_arrow_in_blocks(
+    tmp_path: Path,
+) -> None:
+    """Split lines across blocks & count malformed lines in every block.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "BERPublicsearch.txt"
+    output_filepath = tmp_path / "BERPublicsearch.parquet"
+    with open(input_filepath, "w", encoding="latin-1") as txt_file:
+        txt_file.write(
+            "CountyName\tYear_of_Construction\n"
+            + "Dublin 1\t1891\nbad\nCo. Dún Laoghaire\t2005\nDublin\t8\t2015\n\n"
+            + "Dublin 8\t2015",
+        )
+    expected_output = pd.DataFrame(
+        {
+            "CountyName": ["Dublin 1", "Co. Dún Laoghaire", "Dublin 8"],
+            "Year_of_Construction": pd.Series([1891, 2005, 2015], dtype="int16"),
+        },
+    )
+
+    skipped_lines = _convert_ber_publicsearch_to_parquet_via_arrow(
+        input_filepath,
+        output_filepath,
+        dtypes={"Year_of_Construction": "int16"},
+        block_size=16,
+    )
+
+    assert skipped_lines == 2
+    assert_frame_equal(pd.read_parquet(output_filepath), expected_output)
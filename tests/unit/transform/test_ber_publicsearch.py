@@ -1,8 +1,14 @@
+from os import mkdir
+from pathlib import Path
+
 import pandas as pd
 
 from pandas.testing import assert_frame_equal
 
 from drem.transform.ber_publicsearch import _bin_year_of_construction_as_in_census
+from drem.transform.ber_publicsearch import (
+    _get_filters_for_partitions_containing_substring,
+)
 
 
 def test_bin_year_of_construction_as_in_census() -> None:
@@ -21,3 +27,23 @@ def test_bin_year_of_construction_as_in_census() -> None:
     )
 
     assert_frame_equal(output, expected_output)
+
+
+def test_get_filters_for_partitions_containing_substring(tmp_path: Path) -> None:
+    """Select only Hive partitions whose value contains substring.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    for county in ("Co. Cork", "Co.%20Dublin", "Dublin 1"):
+        mkdir(tmp_path / f"CountyName={county}")
+    expected_output = [
+        [("CountyName", "==", "Co. Dublin")],
+        [("CountyName", "==", "Dublin 1")],
+    ]
+
+    output = _get_filters_for_partitions_containing_substring.run(
+        tmp_path, partition_col="CountyName", substring="Dublin",
+    )
+
+    assert output == expected_output
@@ -1,16 +1,20 @@
 from os import mkdir
 from pathlib import Path
 
+import dask.dataframe as dd
 import pandas as pd
 import pytest
 
 from pandas.testing import assert_frame_equal
 from prefect import Task
 
+from drem.transform.cru_electricity import DATETIME_LOOKUP
 from drem.transform.cru_electricity import CleanCRUElecDemand
 from drem.transform.cru_electricity import _convert_dayid_to_datetime
+from drem.transform.cru_electricity import _lookup_dayid_datetime
 from drem.transform.cru_electricity import _read_txt_files
 from drem.transform.cru_electricity import _slice_timeid_column
+from drem.transform.cru_electricity import _split_timeid_column
 
 
 @pytest.fixture
@@ -103,6 +107,43 @@ def test_slice_timeid_column() -> None:
     assert_frame_equal(output, expected_output)
 
 
+def test_split_timeid_column() -> None:
+    """Split 19503 into 195 and 3 for all rows via integer division."""
+    timeid = pd.DataFrame({"timeid": pd.Series([19503, 19504], dtype="int32")})
+    expected_output = pd.DataFrame(
+        {
+            "day": pd.Series([195, 195], dtype="int16"),
+            "halfhourly_id": pd.Series([3, 4], dtype="int8"),
+        },
+    )
+
+    output = _split_timeid_column.run(timeid)
+
+    assert_frame_equal(output, expected_output)
+
+
+def test_datetime_lookup_covers_every_day_and_halfhour_of_the_trial() -> None:
+    """Look up one datetime per day (195 to 730) & half hour (0 to 50)."""
+    assert DATETIME_LOOKUP.shape == (536, 51)
+    assert DATETIME_LOOKUP[0, 3] == pd.Timestamp("2009-07-15 01:30:00")
+    assert DATETIME_LOOKUP[-1, 48] == pd.Timestamp("2011-01-02 00:00:00")
+
+
+def test_lookup_dayid_datetime_matches_convert_dayid_to_datetime() -> None:
+    """Look up the same datetimes as are calculated via timedeltas."""
+    dayid = pd.DataFrame(
+        {
+            "day": pd.Series([195, 195, 452, 730], dtype="int16"),
+            "halfhourly_id": pd.Series([3, 4, 49, 48], dtype="int8"),
+        },
+    )
+    expected_output = _convert_dayid_to_datetime.run(dayid.copy())
+
+    output = _lookup_dayid_datetime.run(dd.from_pandas(dayid, npartitions=2))
+
+    assert_frame_equal(output.compute(), expected_output)
+
+
 def test_convert_dayid_to_datetime() -> None:
     """Convert each day/halfhourly_id into a corresponding datetime."""
     dayid = pd.DataFrame(
@@ -149,3 +190,38 @@ def test_clean_cru_elec_demand_run(clean_cru_elec_demand: Task) -> None:
     output = clean_cru_elec_demand.run().compute().reset_index(drop=True)
 
     assert_frame_equal(output, expected_output)
+
+
+def test_clean_cru_elec_demand_run_with_string_timeid(
+    raw_elec_demands_dirpath: Path, clean_elec_demands_dirpath: Path,
+) -> None:
+    """Slicing timeid strings gives the same output as integer division.
+
+    Args:
+        raw_elec_demands_dirpath (Path): Path to a directory containing dummy data files
+            called 'raw'
+        clean_elec_demands_dirpath (Path):  Path to a temporary, empty directory called
+            'processed'
+    """
+    expected_output = (
+        CleanCRUElecDemand(
+            dirpath=raw_elec_demands_dirpath,
+            savepath=clean_elec_demands_dirpath.with_name("integer"),
+        )
+        .run()
+        .compute()
+        .reset_index(drop=True)
+    )
+
+    output = (
+        CleanCRUElecDemand(
+            dirpath=raw_elec_demands_dirpath,
+            savepath=clean_elec_demands_dirpath,
+            integer_timeid=False,
+        )
+        .run()
+        .compute()
+        .reset_index(drop=True)
+    )
+
+    assert_frame_equal(output, expected_output)
@@ -1,7 +1,15 @@
+from pathlib import Path
+
+import geopandas as gpd
 import pandas as pd
 
 from pandas.testing import assert_frame_equal
+from shapely.geometry import Point
 
+from drem.load.parquet import write_partitioned_parquet
+from drem.transform.cso_gas import _combine_releases
+from drem.transform.cso_gas import _link_demands_to_postcode_geometries
+from drem.transform.cso_gas import _melt_years
 from drem.transform.cso_gas import _replace_column_names_with_third_row
 
 
@@ -13,3 +21,99 @@ def test_replace_column_name_with_third_row():
     output = _replace_column_names_with_third_row.run(raw_data)
 
     assert_frame_equal(output, expected_output)
+
+
+def test_melt_years() -> None:
+    """Melt year columns into one row per postcode & year."""
+    raw_data = pd.DataFrame(
+        {"postcodes": ["Dublin 1"], "County": [None], "2011": ["1000"], "2012": ["_"]},
+    )
+    expected_output = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 1"],
+            "year": pd.Series([2011, 2012], dtype="int16"),
+            "gas_gwh": [1000.0, None],
+            "release": [2019, 2019],
+        },
+    )
+
+    output = _melt_years.run(raw_data, release=2019)
+
+    assert_frame_equal(output, expected_output)
+
+
+def test_combine_releases_keeps_latest_release_of_each_year() -> None:
+    """Keep each year's figures from the most recent release."""
+    release_2019 = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 1"],
+            "year": [2018, 2019],
+            "gas_gwh": [1.0, 2.0],
+            "release": [2019, 2019],
+        },
+    )
+    release_2020 = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 1"],
+            "year": [2019, 2020],
+            "gas_gwh": [2.5, 3.0],
+            "release": [2020, 2020],
+        },
+    )
+    expected_output = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 1", "Dublin 1"],
+            "year": [2018, 2019, 2020],
+            "gas_gwh": [1.0, 2.5, 3.0],
+        },
+    )
+
+    output = _combine_releases.run([release_2020, release_2019])
+
+    assert_frame_equal(
+        output.sort_values("year", ignore_index=True), expected_output,
+    )
+
+
+def test_link_demands_to_postcode_geometries_keeps_postcodes_without_gas(
+    tmp_path: Path,
+) -> None:
+    """Keep postcodes without gas data in every year through a partitioned dataset.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "residential_postcode_gas.parquet"
+    postcode_geometries = gpd.GeoDataFrame(
+        {"postcodes": ["Dublin 1", "Dublin 2"]},
+        geometry=[Point(715000, 734000), Point(716000, 733000)],
+        crs="epsg:2157",
+    )
+    annual_gas = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 1", "Co. Dublin"],
+            "year": pd.Series([2018, 2019, 2019], dtype="int16"),
+            "gas_gwh": [1.0, 2.0, 3.0],
+        },
+    )
+    expected_output = pd.DataFrame(
+        {
+            "postcodes": ["Dublin 1", "Dublin 2", "Dublin 1", "Dublin 2"],
+            "gas_gwh": [1.0, None, 2.0, None],
+            "year": pd.Series([2018, 2018, 2019, 2019], dtype="int16"),
+        },
+    )
+
+    linked = _link_demands_to_postcode_geometries.run(postcode_geometries, annual_gas)
+    write_partitioned_parquet(
+        linked, dirpath, partition_col="year", sort_by=["postcodes"],
+    )
+    # As read by drem.estimate.residential_demand
+    output = gpd.read_parquet(dirpath).astype({"year": "int16"})
+
+    assert_frame_equal(
+        pd.DataFrame(output.drop(columns="geometry"))
+        .sort_values(["year", "postcodes"])
+        .reset_index(drop=True),
+        expected_output,
+    )
@@ -1,6 +1,7 @@
 from typing import Dict
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -8,17 +9,15 @@ from geopandas.testing import assert_geodataframe_equal
 from icontract import ViolationError
 from pandas.testing import assert_frame_equal
 from shapely.geometry import Point
-from shapely.geometry import Polygon
 
-from drem.transform.sa_statistics import _convert_columns_to_dict
-from drem.transform.sa_statistics import _extract_column_names_via_glossary
-from drem.transform.sa_statistics import _extract_rows_from_glossary
+from drem.transform.sa_statistics import BOILER_TABLE
+from drem.transform.sa_statistics import YEAR_BUILT_TABLE
+from drem.transform.sa_statistics import _decode_tables
+from drem.transform.sa_statistics import _extract_glossaries
+from drem.transform.sa_statistics import _get_column_names_in_glossaries
 from drem.transform.sa_statistics import _get_columns
-from drem.transform.sa_statistics import _link_small_areas_to_postcodes
-from drem.transform.sa_statistics import _melt_columns
 from drem.transform.sa_statistics import _merge_with_geometries
 from drem.transform.sa_statistics import _pivot_table
-from drem.transform.sa_statistics import _rename_columns_via_glossary
 from drem.transform.sa_statistics import _replace_substring_in_column
 from drem.transform.sa_statistics import _split_column_in_two_on_substring
 from drem.transform.sa_statistics import _strip_column
@@ -100,192 +99,6 @@ def raw_statistics() -> pd.DataFrame:
     )
 
 
-def test_extracted_year_built_table_from_glossary_matches_expected(
-    raw_glossary: pd.DataFrame,
-) -> None:
-    """Extracted year built table matches matches expected table.
-
-    Args:
-        raw_glossary (pd.DataFrame): Raw glossary table
-    """
-    expected_output = pd.DataFrame(
-        {
-            "Tables Within Themes": [
-                "Table 2",
-                "Permanent private households by year built ",
-            ],
-            "Column Names": ["T6_2_PRE19H", "T6_2_PRE19P"],
-            "Description of Field": [
-                "Pre 1919 (No. of households)",
-                "Pre 1919 (No. of persons)",
-            ],
-        },
-    )
-
-    output = _extract_rows_from_glossary.run(
-        raw_glossary,
-        target="Tables Within Themes",
-        table_name="Permanent private households by year built ",
-    )
-
-    assert_frame_equal(output, expected_output)
-
-
-def test_extracted_boiler_type_table_from_glossary_matches_expected(
-    raw_glossary: pd.DataFrame,
-) -> None:
-    """Extracted boiler type table matches matches expected table.
-
-    Args:
-        raw_glossary (pd.DataFrame): Raw glossary table
-    """
-    expected_output = pd.DataFrame(
-        {
-            "Tables Within Themes": [
-                "Table 5",
-                "Permanent private households by central heating ",
-            ],
-            "Column Names": ["T6_5_NCH", "T6_5_OCH"],
-            "Description of Field": ["No central heating", "Oil"],
-        },
-    )
-
-    output = _extract_rows_from_glossary.run(
-        raw_glossary,
-        target="Tables Within Themes",
-        table_name="Permanent private households by central heating ",
-    )
-
-    assert_frame_equal(output, expected_output)
-
-
-def test_convert_columns_to_dict_as_expected(
-    year_built_glossary: pd.DataFrame,
-) -> None:
-    """Extract 2 DataFrame columns and convert to Dict.
-
-    Args:
-        year_built_glossary (pd.DataFrame): Year built glossary
-    """
-    raw_year_built_glossary = pd.DataFrame(
-        {
-            "Tables Within Themes": [
-                "Table 2",
-                "Permanent private households by year built ",
-            ],
-            "Column Names": ["T6_2_PRE19H", "T6_2_PRE19P"],
-            "Description of Field": [
-                "Pre 1919 (No. of households)",
-                "Pre 1919 (No. of persons)",
-            ],
-        },
-    )
-    expected_output = year_built_glossary
-
-    output = _convert_columns_to_dict.run(
-        raw_year_built_glossary,
-        column_name_index="Column Names",
-        column_name_values="Description of Field",
-    )
-
-    assert output == expected_output
-
-
-def test_extract_year_built_column_names_via_glossary(
-    raw_statistics: pd.DataFrame, year_built_glossary: Dict[str, str],
-) -> None:
-    """Extract year built column names from DataFrame via glossary.
-
-    Args:
-        raw_statistics (pd.DataFrame):  Raw Statistics
-        year_built_glossary (Dict[str, str]): Year built glossary
-    """
-    expected_output = pd.DataFrame(
-        {"GEOGID": ["SA2017_017001001"], "T6_2_PRE19H": [10], "T6_2_PRE19P": [20]},
-    )
-
-    output = _extract_column_names_via_glossary.run(
-        raw_statistics, year_built_glossary, additional_columns=["GEOGID"],
-    )
-
-    assert_frame_equal(output, expected_output)
-
-
-def test_extract_column_names_via_glossary_raises_error_with_unknown_columns(
-    raw_statistics: pd.DataFrame, year_built_glossary: Dict[str, str],
-) -> None:
-    """Raise error with unknown additional columns.
-
-    Args:
-        raw_statistics (pd.DataFrame):  Raw Statistics
-        year_built_glossary (Dict[str, str]): Year built glossary
-    """
-    with pytest.raises(ViolationError):
-        _extract_column_names_via_glossary.run(
-            raw_statistics, year_built_glossary, additional_columns=["I break things"],
-        )
-
-
-def test_extract_column_names_via_glossary_raises_error_with_unknown_glossary(
-    raw_statistics: pd.DataFrame,
-) -> None:
-    """Raise error with a dictionary with keys not in DataFrame columns.
-
-    Args:
-        raw_statistics (pd.DataFrame):  Raw Statistics
-    """
-    hot_potato_glossary = {"I break things": "in pandas"}
-
-    with pytest.raises(ViolationError):
-        _extract_column_names_via_glossary.run(
-            raw_statistics, hot_potato_glossary, additional_columns=["GEOGID"],
-        )
-
-
-def test_rename_columns_via_glossary(year_built_glossary: Dict[str, str]) -> None:
-    """Rename year built column names via glossary.
-
-    Args:
-        year_built_glossary (Dict[str, str]): Year built glossary
-    """
-    before_renaming = pd.DataFrame(
-        {"GEOGID": ["SA2017_017001001"], "T6_2_PRE19H": [10], "T6_2_PRE19P": [20]},
-    )
-    expected_output = pd.DataFrame(
-        {
-            "GEOGID": ["SA2017_017001001"],
-            "Pre 1919 (No. of households)": [10],
-            "Pre 1919 (No. of persons)": [20],
-        },
-    )
-
-    output = _rename_columns_via_glossary.run(before_renaming, year_built_glossary)
-
-    assert_frame_equal(output, expected_output)
-
-
-def test_melt_columns() -> None:
-    """Melt selected columns to rows."""
-    before_melt = pd.DataFrame(
-        {
-            "GEOGID": ["SA2017_017001001"],
-            "Pre 1919 (No. of households)": [10],
-            "Pre 1919 (No. of persons)": [25],
-        },
-    )
-    expected_output = pd.DataFrame(
-        {
-            "GEOGID": ["SA2017_017001001", "SA2017_017001001"],
-            "variable": ["Pre 1919 (No. of households)", "Pre 1919 (No. of persons)"],
-            "value": [10, 25],
-        },
-    )
-
-    output = _melt_columns.run(before_melt, id_vars="GEOGID")
-
-    assert_frame_equal(output, expected_output)
-
-
 def test_split_column_in_two_on_substring() -> None:
     """Split column in two on substring."""
     before_split = pd.DataFrame(
@@ -348,6 +161,20 @@ def test_strip_column() -> None:
     assert_frame_equal(output, expected_output)
 
 
+def test_strip_column_of_missing_values() -> None:
+    """Keep missing values missing when a column has no strings to strip."""
+    before_strip = pd.DataFrame({"dirty_column": [np.nan, np.nan]})
+    expected_output = pd.DataFrame(
+        {"dirty_column": [np.nan, np.nan], "clean_column": [np.nan, np.nan]},
+    )
+
+    output = _strip_column.run(
+        before_strip, target="dirty_column", result="clean_column",
+    )
+
+    assert_frame_equal(output, expected_output, check_dtype=False)
+
+
 def test_pivot_table() -> None:
     """Pivot table to expected format."""
     before_pivot_table = pd.DataFrame(
@@ -377,6 +204,37 @@ def test_pivot_table() -> None:
     assert_frame_equal(output, expected_output, check_like=True)
 
 
+def test_split_column_in_two_on_substring_keeps_categories() -> None:
+    """Split the categories of a categorical column rather than every row."""
+    before_split = pd.DataFrame(
+        {
+            "variable": pd.Categorical(
+                [
+                    "Pre 1919 (No. of households)",
+                    "Pre 1919 (No. of persons)",
+                    "Pre 1919 (No. of households)",
+                ],
+            ),
+        },
+    )
+    expected_output = before_split.assign(
+        raw_year_built=pd.Categorical(["Pre 1919 ", "Pre 1919 ", "Pre 1919 "]),
+        raw_households_and_persons=pd.Categorical(
+            ["No. of households)", "No. of persons)", "No. of households)"],
+        ),
+    )
+
+    output = _split_column_in_two_on_substring.run(
+        before_split,
+        target="variable",
+        pat=r"(",
+        left_column_name="raw_year_built",
+        right_column_name="raw_households_and_persons",
+    )
+
+    assert_frame_equal(output, expected_output)
+
+
 def test_merge_with_geometries() -> None:
     """Geometries are added to Statistics."""
     statistics: pd.DataFrame = pd.DataFrame(
@@ -394,53 +252,102 @@ def test_merge_with_geometries() -> None:
     assert_geodataframe_equal(output, expected_output)
 
 
-def test_link_small_areas_to_postcodes() -> None:
-    """Small Areas that are 'mostly' in Postcode are linked to Postcode."""
-    small_areas = gpd.GeoDataFrame(
-        {
-            "period_built": ["before 1919", "after 2010"],
-            "households": [3, 4],
-            "people": [10, 12],
-            "small_area": [1, 2],
-            "geometry": [
-                Polygon([(1, 0), (1, 1), (3, 1)]),
-                Polygon([(1, 0), (1, 1), (0, 1)]),
-            ],
+def test_get_columns_raises_error_if_passed_nonexistent_column_name() -> None:
+    """Raise error if passed non-existent column name."""
+    i_am_data = pd.DataFrame({"my_name_is": ["what"]})
+
+    with pytest.raises(ViolationError):
+        _get_columns.run(i_am_data, ["my_name_is", "i_dont_exist"])
+
+
+def test_get_column_names_in_glossaries_is_unique_and_ordered() -> None:
+    """Combine glossary column names so only these are read from disk."""
+    year_built_glossary = {"T6_2_PRE19H": "Pre 1919 (No. of households)"}
+    boiler_glossary = {"T6_5_NCH": "No central heating", "T6_2_PRE19H": "Duplicate"}
+    expected_output = ["GEOGID", "T6_2_PRE19H", "T6_5_NCH"]
+
+    output = _get_column_names_in_glossaries.run(
+        {"year built": year_built_glossary, "central heating": boiler_glossary},
+        additional_columns=["GEOGID"],
+    )
+
+    assert output == expected_output
+
+
+def test_extract_glossaries_of_multiple_tables(
+    raw_glossary: pd.DataFrame, year_built_glossary: Dict[str, str],
+) -> None:
+    """Extract the glossaries of several tables at once.
+
+    Args:
+        raw_glossary (pd.DataFrame): Raw glossary table
+        year_built_glossary (Dict[str, str]): Year built glossary
+    """
+    expected_output = {
+        YEAR_BUILT_TABLE: year_built_glossary,
+        BOILER_TABLE: {"T6_5_NCH": "No central heating", "T6_5_OCH": "Oil"},
+        "Number of households with internet\t": {
+            "T15_3_B": "Broadband",
+            "T15_3_OTH": "Other",
         },
+    }
+
+    output = _extract_glossaries.run(
+        raw_glossary,
+        target="Tables Within Themes",
+        table_names=list(expected_output.keys()),
+        column_name_index="Column Names",
+        column_name_values="Description of Field",
     )
 
-    postcodes = gpd.GeoDataFrame(
+    assert output == expected_output
+
+
+def test_decode_tables_in_one_pass(
+    raw_statistics: pd.DataFrame, year_built_glossary: Dict[str, str],
+) -> None:
+    """Decode & melt each table into its own tidy DataFrame.
+
+    Args:
+        raw_statistics (pd.DataFrame):  Raw Statistics
+        year_built_glossary (Dict[str, str]): Year built glossary
+    """
+    glossaries = {
+        YEAR_BUILT_TABLE: year_built_glossary,
+        BOILER_TABLE: {"T6_5_NCH": "No central heating", "T6_5_OCH": "Oil"},
+    }
+    expected_year_built = pd.DataFrame(
         {
-            "postcodes": ["Co. Dublin", "Dublin 1"],
-            "geometry": [
-                Polygon([(0, 0), (3, 0), (0, 3)]),  # only overlaps with small_area=1
-                Polygon([(3, 3), (0, 3), (3, 0)]),  # mostly overlaps with small_area==1
-            ],
+            "GEOGID": ["SA2017_017001001", "SA2017_017001001"],
+            "variable": pd.Categorical(
+                ["Pre 1919 (No. of households)", "Pre 1919 (No. of persons)"],
+            ),
+            "value": [10, 20],
         },
     )
-
-    expected_output = gpd.GeoDataFrame(
+    expected_boilers = pd.DataFrame(
         {
-            "period_built": ["before 1919", "after 2010"],
-            "households": [3, 4],
-            "people": [10, 12],
-            "small_area": [1, 2],
-            "geometry": [
-                Polygon([(1, 0), (1, 1), (3, 1)]),
-                Polygon([(1, 0), (1, 1), (0, 1)]),
-            ],
-            "postcodes": ["Co. Dublin", "Co. Dublin"],
+            "GEOGID": ["SA2017_017001001", "SA2017_017001001"],
+            "variable": pd.Categorical(["No central heating", "Oil"]),
+            "value": [7, 12],
         },
     )
 
-    output = _link_small_areas_to_postcodes.run(small_areas, postcodes)
+    output = _decode_tables.run(raw_statistics, glossaries, id_column="GEOGID")
 
-    assert_geodataframe_equal(output, expected_output, check_like=True)
+    assert_frame_equal(output[YEAR_BUILT_TABLE], expected_year_built)
+    assert_frame_equal(output[BOILER_TABLE], expected_boilers)
 
 
-def test_get_columns_raises_error_if_passed_nonexistent_column_name() -> None:
-    """Raise error if passed non-existent column name."""
-    i_am_data = pd.DataFrame({"my_name_is": ["what"]})
+def test_decode_tables_raises_error_with_unknown_glossary(
+    raw_statistics: pd.DataFrame,
+) -> None:
+    """Raise error with a glossary with keys not in DataFrame columns.
+
+    Args:
+        raw_statistics (pd.DataFrame):  Raw Statistics
+    """
+    hot_potato_glossaries = {"Table": {"I break things": "in pandas"}}
 
     with pytest.raises(ViolationError):
-        _get_columns.run(i_am_data, ["my_name_is", "i_dont_exist"])
+        _decode_tables.run(raw_statistics, hot_potato_glossaries, id_column="GEOGID")
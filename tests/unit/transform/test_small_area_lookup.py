@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+
+from geopandas.testing import assert_geodataframe_equal
+from pandas.testing import assert_frame_equal
+from shapely.geometry import Polygon
+
+from drem.transform.small_area_lookup import CreateSmallAreaLookup
+from drem.transform.small_area_lookup import link_small_areas_to_postcodes
+
+
+def test_link_small_areas_to_postcodes() -> None:
+    """Small Areas that are 'mostly' in Postcode are linked to Postcode."""
+    small_areas = gpd.GeoDataFrame(
+        {
+            "period_built": ["before 1919", "after 2010"],
+            "households": [3, 4],
+            "people": [10, 12],
+            "small_area": [1, 2],
+            "geometry": [
+                Polygon([(1, 0), (1, 1), (3, 1)]),
+                Polygon([(1, 0), (1, 1), (0, 1)]),
+            ],
+        },
+    )
+
+    postcodes = gpd.GeoDataFrame(
+        {
+            "postcodes": ["Co. Dublin", "Dublin 1"],
+            "geometry": [
+                Polygon([(0, 0), (3, 0), (0, 3)]),  # only overlaps with small_area=1
+                Polygon([(3, 3), (0, 3), (3, 0)]),  # mostly overlaps with small_area==1
+            ],
+        },
+    )
+
+    expected_output = gpd.GeoDataFrame(
+        {
+            "period_built": ["before 1919", "after 2010"],
+            "households": [3, 4],
+            "people": [10, 12],
+            "small_area": [1, 2],
+            "geometry": [
+                Polygon([(1, 0), (1, 1), (3, 1)]),
+                Polygon([(1, 0), (1, 1), (0, 1)]),
+            ],
+            "postcodes": ["Co. Dublin", "Co. Dublin"],
+        },
+    )
+
+    output = link_small_areas_to_postcodes(small_areas, postcodes)
+
+    assert_geodataframe_equal(output, expected_output, check_like=True)
+
+
+def test_create_small_area_lookup_is_only_rebuilt_if_geometries_change(
+    tmp_path: Path,
+) -> None:
+    """Rebuild lookup table if and only if its geometries have changed.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    sa_geometries_filepath = tmp_path / "small_area_geometries.parquet"
+    postcodes_filepath = tmp_path / "dublin_postcodes.parquet"
+    output_filepath = tmp_path / "small_area_lookup.parquet"
+    gpd.GeoDataFrame(
+        {
+            "small_area": ["1", "2"],
+            "local_authority": ["Dublin City", "Fingal"],
+            "geometry": [
+                Polygon([(1, 0), (1, 1), (3, 1)]),
+                Polygon([(1, 0), (1, 1), (0, 1)]),
+            ],
+        },
+    ).to_parquet(sa_geometries_filepath)
+    gpd.GeoDataFrame(
+        {
+            "postcodes": ["Co. Dublin", "Dublin 1"],
+            "geometry": [
+                Polygon([(0, 0), (3, 0), (0, 3)]),
+                Polygon([(3, 3), (0, 3), (3, 0)]),
+            ],
+        },
+    ).to_parquet(postcodes_filepath)
+    expected_output = pd.DataFrame(
+        {
+            "small_area": ["1", "2"],
+            "postcodes": ["Co. Dublin", "Co. Dublin"],
+            "local_authority": ["Dublin City", "Fingal"],
+        },
+    )
+
+    create_small_area_lookup = CreateSmallAreaLookup()
+    create_small_area_lookup.run(
+        sa_geometries_filepath, postcodes_filepath, output_filepath,
+    )
+    first_modified_time = output_filepath.stat().st_mtime_ns
+    create_small_area_lookup.run(
+        sa_geometries_filepath, postcodes_filepath, output_filepath,
+    )
+    unchanged_modified_time = output_filepath.stat().st_mtime_ns
+
+    gpd.read_parquet(postcodes_filepath).assign(
+        postcodes=["Dublin 2", "Dublin 1"],
+    ).to_parquet(postcodes_filepath)
+    create_small_area_lookup.run(
+        sa_geometries_filepath, postcodes_filepath, output_filepath,
+    )
+
+    assert unchanged_modified_time == first_modified_time
+    assert_frame_equal(
+        pd.read_parquet(output_filepath),
+        expected_output.assign(postcodes=["Dublin 2", "Dublin 2"]),
+    )
@@ -5,82 +5,20 @@ import geopandas as gpd
 import numpy as np
 import pandas as pd
 
+from _pytest.monkeypatch import MonkeyPatch
 from geopandas.testing import assert_geodataframe_equal
 from pandas.testing import assert_frame_equal
 from shapely.geometry import Point
 
-from drem.transform.vo import _merge_local_authority_files
+from drem.transform.vo import CLEANER_VERSION
 from drem.transform.vo import _apply_benchmarks_to_vo_floor_area
+from drem.transform.vo import _clean_address_columns
+from drem.transform.vo import _clean_local_authority_file
 from drem.transform.vo import _convert_to_geodataframe
 from drem.transform.vo import _extract_use_from_vo_uses_column
-from drem.transform.vo import _fillna_in_columns_where_column_name_contains_substring
 from drem.transform.vo import _merge_benchmarks_into_vo
-from drem.transform.vo import _merge_string_columns_into_one
 from drem.transform.vo import _remove_null_address_strings
-from drem.transform.vo import _replace_rows_equal_to_string
 from drem.transform.vo import _save_unmatched_vo_uses_to_text_file
-from drem.transform.vo import _strip_whitespace
-
-
-def test_fillna_in_columns_where_column_name_contains_substring() -> None:
-    """Fillna in columns where column name matches substring with replacement string."""
-    columns = pd.DataFrame(
-        {
-            "Address 1": [np.nan, "2-4 Crown Alley, Dublin 2, Ireland"],
-            "Address 2": [np.nan, np.nan],
-            "Company Name": ["No Name", "Codema"],
-        },
-    )
-    expected_output = pd.DataFrame(
-        {
-            "Address 1": ["", "2-4 Crown Alley, Dublin 2, Ireland"],
-            "Address 2": ["", ""],
-            "Company Name": ["No Name", "Codema"],
-        },
-    )
-
-    output = _fillna_in_columns_where_column_name_contains_substring.run(
-        columns, substring="Address", replace_with="",
-    )
-
-    assert_frame_equal(output, expected_output)
-
-
-def test_merge_address_columns_into_one() -> None:
-    """Merge string columns into one."""
-    addresses = pd.DataFrame(
-        {"Address 1": ["7 Rowanbyrne"], "Address 2": ["Blackrock"]},
-    )
-
-    expected_output = pd.DataFrame(
-        {
-            "Address 1": ["7 Rowanbyrne"],
-            "Address 2": ["Blackrock"],
-            "Address": ["7 Rowanbyrne Blackrock"],
-        },
-    )
-
-    output: pd.DataFrame = _merge_string_columns_into_one.run(
-        addresses, target="Address", result="Address",
-    )
-    assert_frame_equal(output, expected_output)
-
-
-def test_strip_whitespace() -> None:
-    """Strip whitespace from strings in rows."""
-    addresses = pd.DataFrame({"Address": ["   2-4 Crown Alley, Dublin 2, Ireland "]})
-    expected_output = pd.DataFrame(
-        {
-            "Address": ["   2-4 Crown Alley, Dublin 2, Ireland "],
-            "Address_stripped": ["2-4 Crown Alley, Dublin 2, Ireland"],
-        },
-    )
-
-    output = _strip_whitespace.run(
-        addresses, target="Address", result="Address_stripped"
-    )
-
-    assert_frame_equal(output, expected_output)
 
 
 def test_remove_null_address_strings() -> None:
@@ -109,22 +47,20 @@ def test_remove_null_address_strings() -> None:
     assert_frame_equal(output, expected_output)
 
 
-def test_replace_rows_equal_to_string() -> None:
-    """Replace string in column with new string."""
-    addresses = pd.DataFrame({"Address": ["", "2-4 Crown Alley, Dublin 2, Ireland"]})
-    expected_output = pd.DataFrame(
+def test_clean_address_columns() -> None:
+    """Merge, strip & replace empty addresses in one pass."""
+    addresses = pd.DataFrame(
         {
-            "Address": ["", "2-4 Crown Alley, Dublin 2, Ireland"],
-            "Address_replaced": ["None", "2-4 Crown Alley, Dublin 2, Ireland"],
+            "Address 1": [np.nan, " 2-4 Crown Alley", np.nan],
+            "Address 2": [np.nan, np.nan, "Blackrock"],
         },
     )
+    expected_output = addresses.assign(
+        Address=["None", "2-4 Crown Alley", "Blackrock"],
+    )
 
-    output: pd.DataFrame = _replace_rows_equal_to_string.run(
-        addresses,
-        target="Address",
-        result="Address_replaced",
-        to_replace="",
-        replace_with="None",
+    output: pd.DataFrame = _clean_address_columns(
+        addresses, target="Address", result="Address", replace_empty_with="None",
     )
 
     assert_frame_equal(output, expected_output)
@@ -141,7 +77,25 @@ def test_extract_use_from_vo_uses_column() -> None:
         },
     )
 
-    output: pd.DataFrame = _extract_use_from_vo_uses_column.run(vo)
+    output: pd.DataFrame = _extract_use_from_vo_uses_column(vo)
+
+    assert_frame_equal(output, expected_output)
+
+
+def test_extract_use_from_vo_uses_column_with_repeated_and_missing_uses() -> None:
+    """Split repeated 'Uses' once & leave missing uses empty."""
+    vo = pd.DataFrame(
+        {"Uses": ["WAREHOUSE, -", np.nan, "WAREHOUSE, -"]}, index=[3, 3, 4],
+    )
+    expected_output = pd.DataFrame(
+        {
+            "Uses": ["WAREHOUSE, -", np.nan, "WAREHOUSE, -"],
+            "use_0": ["WAREHOUSE", np.nan, "WAREHOUSE"],
+        },
+        index=[3, 3, 4],
+    )
+
+    output: pd.DataFrame = _extract_use_from_vo_uses_column(vo)
 
     assert_frame_equal(output, expected_output)
 
@@ -241,3 +195,65 @@ def test_convert_to_geodataframe() -> None:
 
     output: gpd.GeoDataFrame = _convert_to_geodataframe.run(coordinates)
     assert_geodataframe_equal(output, expected_output)
+
+
+def test_clean_local_authority_file_only_cleans_changed_files(tmp_path: Path) -> None:
+    """Reuse cached clean file until raw file changes.
+
+    Args:
+        tmp_path (Path): Pytest plugin to create a temporary filepath
+    """
+    filepath = tmp_path / "FINGAL COUNTY COUNCIL - OFFICE.csv"
+    cache_dirpath = tmp_path / "interim"
+    raw_vo = pd.DataFrame(
+        {
+            " Uses": ["OFFICE (INDUSTRIAL), -", "OFFICE (INDUSTRIAL), -"],
+            " Address 1": ["Unit A8", "Unit A9"],
+            "Address 2": ["Ladyswell Road", np.nan],
+            "Area": [135.41, 0],
+        },
+    )
+    raw_vo.to_csv(filepath, index=False)
+    expected_output = pd.DataFrame(
+        {
+            "Uses": ["OFFICE (INDUSTRIAL), -"],
+            "Address 1": ["Unit A8"],
+            "Address 2": ["Ladyswell Road"],
+            "Area": [135.41],
+            "Address": ["Unit A8 Ladyswell Road"],
+            "use_0": ["OFFICE (INDUSTRIAL)"],
+        },
+    )
+
+    cached_filepath = _clean_local_authority_file.run(filepath, cache_dirpath)
+    output = pd.read_parquet(cached_filepath)
+    reused_filepath = _clean_local_authority_file.run(filepath, cache_dirpath)
+    raw_vo.assign(Area=[135.41, 10]).to_csv(filepath, index=False)
+    recleaned_filepath = _clean_local_authority_file.run(filepath, cache_dirpath)
+
+    assert_frame_equal(output, expected_output)
+    assert reused_filepath == cached_filepath
+    assert list(cache_dirpath.iterdir()) == [recleaned_filepath]
+
+
+def test_clean_local_authority_file_recleans_files_if_cleaner_changes(
+    tmp_path: Path, monkeypatch: MonkeyPatch,
+) -> None:
+    """Ignore cached clean files written by an older version of the cleaning steps.
+
+    Args:
+        tmp_path (Path): Pytest plugin to create a temporary filepath
+        monkeypatch (MonkeyPatch): Pytest plugin to patch module attributes
+    """
+    filepath = tmp_path / "FINGAL COUNTY COUNCIL - OFFICE.csv"
+    cache_dirpath = tmp_path / "interim"
+    pd.DataFrame(
+        {"Uses": ["OFFICE (INDUSTRIAL), -"], "Address 1": ["Unit A8"], "Area": [135]},
+    ).to_csv(filepath, index=False)
+
+    cached_filepath = _clean_local_authority_file.run(filepath, cache_dirpath)
+    monkeypatch.setattr("drem.transform.vo.CLEANER_VERSION", CLEANER_VERSION + 1)
+    recleaned_filepath = _clean_local_authority_file.run(filepath, cache_dirpath)
+
+    assert recleaned_filepath != cached_filepath
+    assert list(cache_dirpath.iterdir()) == [recleaned_filepath]
@@ -0,0 +1,63 @@
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from pandas.testing import assert_series_equal
+
+from drem.utilities.addresses import normalise_addresses
+
+
+def test_normalise_addresses_applies_func_in_parallel(tmp_path: Path) -> None:
+    """Apply func to every address across a process pool.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    addresses = pd.Series(
+        ["7 rathmines rd", "1 main st", "7 rathmines rd"], index=[3, 5, 8], name="a",
+    )
+    expected_output = pd.Series(
+        ["7 RATHMINES RD", "1 MAIN ST", "7 RATHMINES RD"],
+        index=[3, 5, 8],
+        name="a",
+        dtype="object",
+    )
+
+    output = normalise_addresses(
+        addresses, func=str.upper, cache_filepath=tmp_path / "upper.parquet",
+    )
+
+    assert_series_equal(output, expected_output)
+
+
+def test_normalise_addresses_only_applies_func_to_new_distinct_addresses(
+    tmp_path: Path,
+) -> None:
+    """Apply func once per distinct address & reuse the cache on later calls.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    calls: List[str] = []
+
+    def _split(address: str) -> List[str]:
+        calls.append(address)
+        return address.split()
+
+    cache_filepath = tmp_path / "split.parquet"
+    normalise_addresses(
+        pd.Series(["1 main st", "1 main st"]),
+        func=_split,
+        cache_filepath=cache_filepath,
+        max_workers=1,
+    )
+    output = normalise_addresses(
+        pd.Series(["2 main st", "1 main st"]),
+        func=_split,
+        cache_filepath=cache_filepath,
+        max_workers=1,
+    )
+
+    assert calls == ["1 main st", "2 main st"]
+    assert output.tolist() == [["2", "main", "st"], ["1", "main", "st"]]
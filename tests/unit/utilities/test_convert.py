@@ -1,8 +1,13 @@
+import json
+
+from os import utime
 from pathlib import Path
 
 import geopandas as gpd
 import pandas as pd
+import pyarrow.parquet as pq
 
+from pandas.testing import assert_frame_equal
 from shapely.geometry import Point
 
 from drem.utilities import convert
@@ -25,6 +30,79 @@ def test_convert_csv_to_parquet(tmp_path: Path) -> None:
     assert output_filepath.exists()
 
 
+def test_convert_csv_to_parquet_reconverts_refreshed_input(tmp_path: Path) -> None:
+    """Skip conversion only if the output is newer than the input.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "data.csv"
+    output_filepath = tmp_path / "data.parquet"
+    pd.DataFrame({"col": [1, 2, 3]}).to_csv(input_filepath, index=False)
+    convert.csv_to_parquet.run(
+        input_filepath=input_filepath, output_filepath=output_filepath,
+    )
+    pd.DataFrame({"col": [4]}).to_csv(input_filepath, index=False)
+    output_mtime = output_filepath.stat().st_mtime
+    utime(input_filepath, (output_mtime + 1, output_mtime + 1))
+
+    convert.csv_to_parquet.run(
+        input_filepath=input_filepath, output_filepath=output_filepath,
+    )
+
+    assert_frame_equal(pd.read_parquet(output_filepath), pd.DataFrame({"col": [4]}))
+
+
+def test_convert_csv_to_parquet_in_chunks_locks_schema(tmp_path: Path) -> None:
+    """Convert csv file to parquet chunk by chunk with an overridden schema.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "data.csv"
+    output_filepath = tmp_path / "data.parquet"
+    pd.DataFrame({"col": [1, 2, None, 4, 5]}).to_csv(input_filepath, index=False)
+    expected_output = pd.DataFrame({"col": [1, 2, None, 4, 5]})
+
+    convert.csv_to_parquet.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        chunksize=2,
+        row_group_size=1,
+        schema_overrides={"col": "float64"},
+    )
+
+    assert pq.ParquetFile(output_filepath).num_row_groups == 5
+    assert_frame_equal(pd.read_parquet(output_filepath), expected_output)
+
+
+def test_convert_csv_to_parquet_with_categories_growing_across_chunks(
+    tmp_path: Path,
+) -> None:
+    """Convert csv file to parquet with categorical dtypes read from json.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "data.csv"
+    output_filepath = tmp_path / "data.parquet"
+    dtypes_filepath = tmp_path / "dtypes.json"
+    categories = ["a", "b"] + [f"category_{number}" for number in range(200)]
+    pd.DataFrame({"col": categories}).to_csv(input_filepath, index=False)
+    with open(dtypes_filepath, "w") as json_file:
+        json.dump({"col": "category"}, json_file)
+
+    convert.csv_to_parquet.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        chunksize=2,
+        dtypes_filepath=dtypes_filepath,
+    )
+
+    output = pd.read_parquet(output_filepath)
+    assert output["col"].astype(str).tolist() == categories
+
+
 def test_convert_csv_to_dask_parquet(tmp_path: Path) -> None:
     """Convert csv file to dask parquet.
 
@@ -0,0 +1,44 @@
+from os import utime
+from pathlib import Path
+
+import geopandas as gpd
+
+from geopandas.testing import assert_geodataframe_equal
+from shapely.geometry import Point
+
+from drem.utilities.crs import ITM
+from drem.utilities.crs import LAT_LONG
+from drem.utilities.crs import get_reprojected_filepath
+from drem.utilities.crs import read_parquet_in_crs
+
+
+def test_read_parquet_in_crs_caches_reprojection_until_source_changes(
+    tmp_path: Path,
+) -> None:
+    """Reproject once & reuse cached geometries until source file is modified.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "buildings.parquet"
+    buildings = gpd.GeoDataFrame(
+        {"building": [1], "geometry": [Point(715830.0, 734697.0)]}, crs=ITM,
+    )
+    buildings.to_parquet(filepath)
+    expected_output = buildings.to_crs(LAT_LONG)
+
+    output = read_parquet_in_crs(filepath, LAT_LONG)
+    cached_filepath = get_reprojected_filepath(filepath, LAT_LONG)
+    cached_modified_time = cached_filepath.stat().st_mtime_ns
+    cached_output = read_parquet_in_crs(filepath, LAT_LONG)
+    unchanged_modified_time = cached_filepath.stat().st_mtime_ns
+
+    source_modified_time = cached_modified_time / 10 ** 9 + 1
+    utime(filepath, (source_modified_time, source_modified_time))
+    read_parquet_in_crs(filepath, LAT_LONG)
+
+    assert cached_filepath == tmp_path / "buildings.epsg4326.parquet"
+    assert_geodataframe_equal(output, expected_output)
+    assert_geodataframe_equal(cached_output, expected_output)
+    assert unchanged_modified_time == cached_modified_time
+    assert cached_filepath.stat().st_mtime_ns > cached_modified_time
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from pandas.testing import assert_series_equal
+
+from drem.utilities.dedupe import dedupe_strings
+from drem.utilities.dedupe import get_leading_token_ngrams
+from drem.utilities.dedupe import get_leading_tokens
+
+
+ADDRESSES = pd.Series(
+    [
+        "leinster house kildare street",
+        "trinity college",
+        "lenister house kildare street",
+        "leinster house kildare street",
+    ],
+    index=[7, 3, 5, 0],
+    name="address",
+)
+
+
+def test_dedupe_strings_groups_similar_strings_under_first_spelling() -> None:
+    """Replace similar strings with the alphabetically first string of the group."""
+    expected_output = pd.Series(
+        [
+            "leinster house kildare street",
+            "trinity college",
+            "leinster house kildare street",
+            "leinster house kildare street",
+        ],
+        index=[7, 3, 5, 0],
+        name="address",
+    )
+
+    output = dedupe_strings(ADDRESSES, min_similarity=0.7, chunk_size=1)
+
+    assert_series_equal(output, expected_output)
+
+
+def test_dedupe_strings_only_compares_strings_in_the_same_block() -> None:
+    """Don't group similar strings in different blocks."""
+    output = dedupe_strings(
+        ADDRESSES, blocks=get_leading_tokens(ADDRESSES), min_similarity=0.7,
+    )
+
+    assert_series_equal(output, ADDRESSES)
+
+
+def test_dedupe_strings_groups_strings_with_typos_in_first_word() -> None:
+    """Group strings sharing an n-gram of their first word across blocks."""
+    strings = pd.Series(["leinster house", "lenister house", "trinity college"])
+    expected_output = pd.Series(["leinster house", "leinster house", "trinity college"])
+
+    output = dedupe_strings(
+        strings, blocks=get_leading_token_ngrams(strings), min_similarity=0.5,
+    )
+
+    assert_series_equal(output, expected_output)
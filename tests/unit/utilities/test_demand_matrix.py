@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from numpy.testing import assert_array_equal
+
+from drem.load.parquet import write_parquet
+from drem.utilities.demand_matrix import get_rows
+from drem.utilities.demand_matrix import read_demand_matrix
+from drem.utilities.demand_matrix import write_demand_matrix
+
+
+def test_write_demand_matrix_fills_gaps_with_nan(tmp_path: Path) -> None:
+    """Pivot long-form demands into a meters by half hours matrix.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "SM_electricity"
+    dirpath.mkdir()
+    demands = pd.DataFrame(
+        {
+            "id": pd.Series([1000, 1392, 1392, 1000], dtype="int16"),
+            "datetime": pd.Series(
+                [
+                    "2009-07-15 01:30:00",
+                    "2009-07-15 01:30:00",
+                    "2009-07-15 02:00:00",
+                    "2009-07-16 00:00:00",
+                ],
+                dtype="datetime64[ns]",
+            ),
+            "demand": pd.Series([1, 0.14, 0.138, 5], dtype="float32"),
+        },
+    )
+    write_parquet(demands, dirpath / "part.0.parquet", row_group_size=2)
+    datetimes = np.array(
+        ["2009-07-15T02:00", "2009-07-15T01:30", "2009-07-15T02:30"],
+        dtype="datetime64[ns]",
+    )
+    expected_demands = np.array(
+        [[1, np.nan, np.nan], [0.14, 0.138, np.nan]], dtype="float32",
+    )
+
+    write_demand_matrix(dirpath, tmp_path / "matrix", datetimes=datetimes)
+    output_demands, output_ids, output_datetimes = read_demand_matrix(
+        tmp_path / "matrix",
+    )
+
+    assert isinstance(output_demands, np.memmap)
+    assert_array_equal(output_demands, expected_demands)
+    assert_array_equal(output_ids, np.array([1000, 1392], dtype="int16"))
+    assert_array_equal(output_datetimes, np.sort(datetimes))
+    assert_array_equal(get_rows(output_ids, [1392, 1000]), np.array([1, 0]))
+
+
+def test_write_demand_matrix_sums_readings_at_the_same_datetime(tmp_path: Path) -> None:
+    """Sum readings sharing a meter & half hour such as those when clocks go back.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "SM_electricity"
+    dirpath.mkdir()
+    demands = pd.DataFrame(
+        {
+            "id": pd.Series([1000, 1000, 1000, 1392], dtype="int16"),
+            "datetime": pd.Series(
+                [
+                    "2009-10-25 00:30:00",
+                    "2009-10-25 01:00:00",
+                    "2009-10-25 01:00:00",
+                    "2009-10-25 01:00:00",
+                ],
+                dtype="datetime64[ns]",
+            ),
+            "demand": pd.Series([1, 0.5, 0.25, np.nan], dtype="float32"),
+        },
+    )
+    write_parquet(demands, dirpath / "part.0.parquet", row_group_size=2)
+    datetimes = np.array(["2009-10-25T00:30", "2009-10-25T01:00"], dtype="datetime64")
+    expected_demands = np.array([[1, 0.75], [np.nan, np.nan]], dtype="float32")
+
+    write_demand_matrix(dirpath, tmp_path / "matrix", datetimes=datetimes)
+    output_demands, _, _ = read_demand_matrix(tmp_path / "matrix")
+
+    assert_array_equal(output_demands, expected_demands)
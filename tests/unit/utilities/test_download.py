@@ -1,3 +1,5 @@
+import json
+
 from pathlib import Path
 
 import pytest
@@ -49,3 +51,242 @@ def test_download_task_raises_error_when_url_not_found(tmp_path: Path) -> None:
     )
     with pytest.raises(HTTPError):
         download.run()
+
+
+@responses.activate
+def test_download_task_resumes_partial_download(tmp_path: Path) -> None:
+    """Resume a partial download via a HTTP Range request.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    with open(tmp_path / f"{filename}.part", "wb") as partial_file:
+        partial_file.write(b"1,2,")
+    with open(tmp_path / f"{filename}.part.validator", "w") as validator_file:
+        validator_file.write('"v1"')
+
+    def _respond_to_range_request(request):  # noqa: WPS430
+        assert request.headers["Range"] == "bytes=4-"
+        assert request.headers["If-Range"] == '"v1"'
+        return (206, {"Content-Range": "bytes 4-5/6"}, b"3\n")
+
+    responses.add_callback(
+        responses.GET, "http://www.urltodata.ie", callback=_respond_to_range_request,
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie", dirpath=str(tmp_path), filename=filename,
+    )
+    download.run()
+
+    assert (tmp_path / filename).read_bytes() == b"1,2,3\n"
+    assert not (tmp_path / f"{filename}.part").exists()
+    assert not (tmp_path / f"{filename}.part.validator").exists()
+
+
+@responses.activate
+def test_download_task_restarts_partial_download_without_validator(
+    tmp_path: Path,
+) -> None:
+    """Download the whole file again if a partial download can't be validated.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    with open(tmp_path / f"{filename}.part", "wb") as partial_file:
+        partial_file.write(b"9,9,")
+
+    def _respond_to_request(request):  # noqa: WPS430
+        assert "Range" not in request.headers
+        return (200, {}, b"1,2,3\n")
+
+    responses.add_callback(
+        responses.GET, "http://www.urltodata.ie", callback=_respond_to_request,
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie", dirpath=str(tmp_path), filename=filename,
+    )
+    download.run()
+
+    assert (tmp_path / filename).read_bytes() == b"1,2,3\n"
+
+
+@responses.activate
+def test_download_task_keeps_complete_partial_download(tmp_path: Path) -> None:
+    """Keep a complete partial download if its range can't be resumed.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    with open(tmp_path / f"{filename}.part", "wb") as partial_file:
+        partial_file.write(b"1,2,3\n")
+    with open(tmp_path / f"{filename}.part.validator", "w") as validator_file:
+        validator_file.write('"v1"')
+    responses.add(
+        responses.GET,
+        "http://www.urltodata.ie",
+        status=416,
+        headers={"Content-Range": "bytes */6"},
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie", dirpath=str(tmp_path), filename=filename,
+    )
+    download.run()
+
+    assert (tmp_path / filename).read_bytes() == b"1,2,3\n"
+    assert not (tmp_path / f"{filename}.part").exists()
+
+
+@responses.activate
+def test_download_task_restarts_unresumable_partial_download(tmp_path: Path) -> None:
+    """Discard a partial download & restart it if its range can't be resumed.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    with open(tmp_path / f"{filename}.part", "wb") as partial_file:
+        partial_file.write(b"9,9,9,9\n")
+    with open(tmp_path / f"{filename}.part.validator", "w") as validator_file:
+        validator_file.write('"v1"')
+
+    def _respond_to_request(request):  # noqa: WPS430
+        if "Range" in request.headers:
+            return (416, {"Content-Range": "bytes */6"}, b"")
+        return (200, {}, b"1,2,3\n")
+
+    responses.add_callback(
+        responses.GET, "http://www.urltodata.ie", callback=_respond_to_request,
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie", dirpath=str(tmp_path), filename=filename,
+    )
+    download.run()
+
+    assert (tmp_path / filename).read_bytes() == b"1,2,3\n"
+    assert not (tmp_path / f"{filename}.part").exists()
+
+
+@responses.activate
+def test_download_task_retries_unresumable_partial_download_once(
+    tmp_path: Path,
+) -> None:
+    """Raise rather than retry forever if the server never satisfies a request.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    with open(tmp_path / f"{filename}.part", "wb") as partial_file:
+        partial_file.write(b"9,9,9,9\n")
+    with open(tmp_path / f"{filename}.part.validator", "w") as validator_file:
+        validator_file.write('"v1"')
+    responses.add(
+        responses.GET,
+        "http://www.urltodata.ie",
+        status=416,
+        headers={"Content-Range": "bytes */6"},
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie", dirpath=str(tmp_path), filename=filename,
+    )
+    with pytest.raises(HTTPError):
+        download.run()
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_download_task_raises_error_on_checksum_mismatch(tmp_path: Path) -> None:
+    """Raise error and discard download if checksum doesn't match.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    responses.add(
+        responses.GET, "http://www.urltodata.ie", body=b"1,2,3\n", status=200,
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie",
+        dirpath=str(tmp_path),
+        filename=filename,
+        sha256="not-the-sha256-of-the-data",
+    )
+    with pytest.raises(ValueError):
+        download.run()
+
+    assert not (tmp_path / filename).exists()
+    assert not (tmp_path / f"{filename}.part").exists()
+
+
+@responses.activate
+def test_download_task_skips_unchanged_file_in_manifest(tmp_path: Path) -> None:
+    """Only transfer data if upstream file changed since last download.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    manifest_filepath = str(tmp_path / "download_manifest.json")
+
+    def _respond_to_conditional_request(request):  # noqa: WPS430
+        if request.headers.get("If-None-Match") == '"v1"':
+            return (304, {}, b"")
+        return (200, {"ETag": '"v1"'}, b"1,2,3\n")
+
+    responses.add_callback(
+        responses.GET,
+        "http://www.urltodata.ie",
+        callback=_respond_to_conditional_request,
+    )
+
+    download = Download(
+        url="http://www.urltodata.ie",
+        dirpath=str(tmp_path),
+        filename=filename,
+        manifest_filepath=manifest_filepath,
+    )
+    download.run()
+    download.run()
+
+    with open(manifest_filepath, "r") as json_file:
+        manifest = json.load(json_file)
+
+    assert [call.response.status_code for call in responses.calls] == [200, 304]
+    assert manifest["http://www.urltodata.ie"]["etag"] == '"v1"'
+    assert (tmp_path / filename).read_bytes() == b"1,2,3\n"
+
+
+@responses.activate
+def test_download_task_adds_existing_file_to_manifest(tmp_path: Path) -> None:
+    """Don't download a file which exists but isn't yet in the manifest.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filename = "data.csv"
+    manifest_filepath = str(tmp_path / "download_manifest.json")
+    (tmp_path / filename).write_bytes(b"1,2,3\n")
+
+    download = Download(
+        url="http://www.urltodata.ie",
+        dirpath=str(tmp_path),
+        filename=filename,
+        manifest_filepath=manifest_filepath,
+    )
+    download.run()
+
+    with open(manifest_filepath, "r") as json_file:
+        manifest = json.load(json_file)
+    assert not responses.calls
+    assert manifest["http://www.urltodata.ie"]["size"] == 6
+    assert manifest["http://www.urltodata.ie"]["last_modified"]
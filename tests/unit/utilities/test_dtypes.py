@@ -0,0 +1,81 @@
+import json
+
+from pathlib import Path
+
+import pandas as pd
+
+from drem.utilities.dtypes import InferCompactDtypes
+from drem.utilities.dtypes import infer_compact_dtypes
+
+
+def test_infer_compact_dtypes_narrows_each_column_across_chunks() -> None:
+    """Infer the narrowest dtype which holds every chunk's values."""
+    chunks = [
+        pd.DataFrame(
+            {
+                "small_int": [1, 2],
+                "int_with_missing": [1.0, None],
+                "wide_int": [0, 1],
+                "float32": [1234.56, 0.1],
+                "float64": [1.5, 2.5],
+                "category": ["A1", "B2"],
+                "string": ["a", "b"],
+                "bool": [True, False],
+            },
+        ),
+        pd.DataFrame(
+            {
+                "small_int": [-100, 100],
+                "int_with_missing": [300.0, 4.0],
+                "wide_int": [0, 40000],
+                "float32": [2.25, 3.0],
+                "float64": [1234567.89, 2.5],
+                "category": ["A1", "A1"],
+                "string": ["c", "d"],
+                "bool": [True, True],
+            },
+        ),
+    ]
+    expected_output = {
+        "small_int": "int8",
+        "int_with_missing": "Int16",
+        "wide_int": "int32",
+        "float32": "float32",
+        "float64": "float64",
+        "category": "category",
+        "string": "string",
+        "bool": "bool",
+    }
+
+    output = infer_compact_dtypes(chunks, max_categories=3)
+
+    assert output == expected_output
+
+
+def test_infer_compact_dtypes_keeps_declared_strings(tmp_path: Path) -> None:
+    """Never parse columns declared as strings as numbers.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    input_filepath = tmp_path / "data.csv"
+    output_filepath = tmp_path / "compact_dtypes.json"
+    dtypes_filepath = tmp_path / "dtypes.json"
+    pd.DataFrame({"code": ["01", "02", "03"], "value": [1, 2, 3]}).to_csv(
+        input_filepath, index=False,
+    )
+    with open(dtypes_filepath, "w") as json_file:
+        json.dump({"code": "string", "value": "float64"}, json_file)
+    expected_output = {"code": "category", "value": "int8"}
+
+    infer_dtypes = InferCompactDtypes()
+    infer_dtypes.run(
+        input_filepath=input_filepath,
+        output_filepath=output_filepath,
+        dtypes_filepath=dtypes_filepath,
+        chunksize=2,
+    )
+
+    with open(output_filepath, "r") as json_file:
+        output = json.load(json_file)
+    assert output == expected_output
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from drem.utilities.html_tables import read_html_tables
+
+
+HTML = """
+<html><body>
+<h2>Networked Gas Consumption</h2>
+<table>
+    <tr><td colspan="2">Table 1 Networked Gas Consumption by Sector</td></tr>
+    <tr><td>Sector</td><td>2019</td></tr>
+    <tr><td>Residential</td><td>8,000</td></tr>
+</table>
+<table>
+    <caption>Table 2 Networked Gas Consumption by County</caption>
+    <tr><td>County</td><td>2019</td></tr>
+    <tr><td>Dublin County</td><td></td></tr>
+</table>
+</body></html>
+"""
+
+
+@pytest.fixture
+def html_filepath(tmp_path: Path) -> Path:
+    """Save a CSO-like HTML page with two tables to a file.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+
+    Returns:
+        Path: Path to HTML file
+    """
+    filepath = tmp_path / "cso_gas.html"
+    filepath.write_text(HTML)
+    return filepath
+
+
+def test_read_html_tables_locates_tables_by_title(html_filepath: Path) -> None:
+    """Read only the tables whose caption or first row matches each title.
+
+    Args:
+        html_filepath (Path): Path to HTML file
+    """
+    expected_output = {
+        "by_county": pd.DataFrame(
+            {0: ["County", "Dublin County"], 1: ["2019", np.nan]},
+        ),
+        "by_sector": pd.DataFrame(
+            {
+                0: [
+                    "Table 1 Networked Gas Consumption by Sector",
+                    "Sector",
+                    "Residential",
+                ],
+                1: ["Table 1 Networked Gas Consumption by Sector", "2019", "8000"],
+            },
+        ),
+    }
+
+    output = read_html_tables(
+        html_filepath, titles={"by_county": "by County", "by_sector": "by Sector"},
+    )
+
+    assert output.keys() == expected_output.keys()
+    for name, table in expected_output.items():
+        assert_frame_equal(output[name], table)
+
+
+def test_read_html_tables_reuses_cached_tables(html_filepath: Path) -> None:
+    """Read cached tables until the titles change.
+
+    Args:
+        html_filepath (Path): Path to HTML file
+    """
+    titles = {"by_county": "by County"}
+    read_html_tables(html_filepath, titles=titles)
+    cache_filepath = html_filepath.with_suffix(".tables.json")
+    cached_modified_time = cache_filepath.stat().st_mtime_ns
+
+    read_html_tables(html_filepath, titles=titles)
+    unchanged_modified_time = cache_filepath.stat().st_mtime_ns
+    read_html_tables(html_filepath, titles={"by_sector": "by Sector"})
+
+    assert unchanged_modified_time == cached_modified_time
+    assert "by Sector" in cache_filepath.read_text()
+
+
+def test_read_html_tables_raises_error_if_title_not_found(html_filepath: Path) -> None:
+    """Raise error if no table matches a title.
+
+    Args:
+        html_filepath (Path): Path to HTML file
+    """
+    with pytest.raises(ValueError):
+        read_html_tables(html_filepath, titles={"by_meter": "Number of Meters"})
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from pandas.testing import assert_frame_equal
+
+from drem.utilities.link_addresses import link_addresses
+
+
+M_AND_R = pd.DataFrame(
+    {
+        "address": [
+            "1 kildare street dublin 2",
+            "leinster house dublin 2",
+            "9 nowhere road",
+        ],
+        "road": ["kildare street", None, "nowhere road"],
+        "house_number": ["1", None, "9"],
+        "house": [None, "leinster house", None],
+    },
+)
+VO = pd.DataFrame(
+    {
+        "vo_id": [10, 11, 12],
+        "address": [
+            "2 kildare street dublin 2",
+            "leinster house kildare street dublin 2",
+            "1 kildare street dublin 2",
+        ],
+        "road": ["kildare street", "kildare street", "kildare street"],
+        "house_number": ["2", None, "1"],
+        "house": [None, "leinster house", None],
+    },
+)
+
+
+def test_link_addresses_only_scores_records_sharing_a_blocking_key() -> None:
+    """Link records sharing a road & house number or a house name."""
+    expected_output = pd.DataFrame(
+        {
+            "address": ["1 kildare street dublin 2", "leinster house dublin 2"],
+            "vo_id": [12, 11],
+        },
+    )
+
+    output = link_addresses(
+        M_AND_R, VO, left_id="address", right_id="vo_id", address_column="address",
+    )
+
+    assert_frame_equal(output.drop(columns="score"), expected_output)
+    assert output["score"].iloc[0] == pytest.approx(1)
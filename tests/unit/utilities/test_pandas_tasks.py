@@ -1,5 +1,7 @@
 import re
 
+from pathlib import Path
+
 import pandas as pd
 import pytest
 
@@ -76,3 +78,18 @@ def test_replace_substring_in_column_replaces_co_dublin_in_postcodes() -> None:
         flags=re.VERBOSE,
     )
     assert_frame_equal(output, expected_output)
+
+
+def test_read_parquet_only_reads_columns(tmp_path: Path) -> None:
+    """Only read the specified columns from parquet.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    filepath = tmp_path / "data.parquet"
+    pd.DataFrame({"wanted": [1, 2], "unwanted": ["a", "b"]}).to_parquet(filepath)
+    expected_output = pd.DataFrame({"wanted": [1, 2]})
+
+    output = pdt.read_parquet.run(filepath, columns=["wanted"])
+
+    assert_frame_equal(output, expected_output)
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pandas as pd
+
+from pandas.testing import assert_frame_equal
+
+from drem.load.parquet import write_parquet
+from drem.utilities.parquet_index import get_index_filepath
+from drem.utilities.parquet_index import has_parquet_index
+from drem.utilities.parquet_index import read_parquet_by_index
+from drem.utilities.parquet_index import write_parquet_index
+
+
+def test_read_parquet_by_index_only_reads_row_groups_containing_values(
+    tmp_path: Path,
+) -> None:
+    """Read the rows of sampled ids from the row groups listed in the index.
+
+    Args:
+        tmp_path (Path): see https://docs.pytest.org/en/stable/tmpdir.html
+    """
+    dirpath = tmp_path / "SM_electricity"
+    dirpath.mkdir()
+    demands = pd.DataFrame(
+        {
+            "id": pd.Series([1000, 1000, 1392, 1392, 1500, 1500], dtype="int16"),
+            "demand": pd.Series([1, 2, 3, 4, 5, 6], dtype="float32"),
+        },
+    )
+    write_parquet(demands.iloc[:4], dirpath / "part.0.parquet", row_group_size=2)
+    write_parquet(
+        demands.iloc[4:].reset_index(drop=True), dirpath / "part.1.parquet",
+    )
+    expected_index = pd.DataFrame(
+        {
+            "id": pd.Series([1000, 1392, 1500], dtype="int16"),
+            "filepath": ["part.0.parquet", "part.0.parquet", "part.1.parquet"],
+            "row_group": [0, 1, 0],
+        },
+    )
+    expected_output = demands.iloc[2:].reset_index(drop=True)
+
+    write_parquet_index(dirpath, on="id")
+    output = read_parquet_by_index(dirpath, on="id", values=[1500, 1392])
+
+    assert has_parquet_index(dirpath)
+    assert_frame_equal(pd.read_parquet(get_index_filepath(dirpath)), expected_index)
+    assert_frame_equal(output, expected_output)